@@ -4,10 +4,11 @@ from django.urls import reverse
 from apps.projects import models as project_models
 from apps.welds import models as weld_models
 from apps.wps import models as wps_models
+from config.query_budgets import QueryBudgetMixin
 from . import models
 
 
-class WeldingBookUiTests(TestCase):
+class WeldingBookUiTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         from django.contrib.auth import get_user_model
 
@@ -205,3 +206,14 @@ class WeldingBookUiTests(TestCase):
         response = self.client.post(reverse("document_delete", args=[item.id]))
         self.assertEqual(response.status_code, 302)
         self.assertFalse(models.Document.objects.filter(id=item.id).exists())
+
+    def test_list_stays_within_query_budget(self):
+        for index in range(3):
+            project = project_models.Project.objects.create(
+                name=f"Project {index}", code=f"P-{index}", units="metric", status="active",
+                standard_set=["ASME_IX"],
+            )
+            models.Document.objects.create(
+                project=project, type="Welding Book", title=f"WB-{index}", status="active"
+            )
+        self.assertWithinQueryBudget(self.client.get(reverse("document_list")))
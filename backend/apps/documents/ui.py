@@ -3,7 +3,7 @@ import uuid
 
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404, redirect, render
 
 from . import models
@@ -49,30 +49,45 @@ def _missing_wps_for_publish(document):
     return list(qs.exclude(status=wps_models.Wps.STATUS_APPROVED).order_by("code"))
 
 
-def _book_composition(document):
-    welding_map_count = (
-        weld_models.WeldMap.objects.filter(
-            project=document.project,
-            drawing__equipment_id=document.equipment_id,
-        ).count()
-        if document.equipment_id
-        else weld_models.WeldMap.objects.filter(project=document.project).count()
+def _grouped_counts(queryset, project_ids, equipment_field):
+    """``{(project_id, equipment_id): count}`` plus ``(project_id, None)`` project totals."""
+    counts = {}
+    rows = (
+        queryset.filter(project_id__in=project_ids)
+        .values_list("project_id", equipment_field)
+        .annotate(total=Count("id"))
+        .order_by()
     )
-    weld_scope = weld_models.Weld.objects.filter(project=document.project)
-    if document.equipment_id:
-        weld_scope = weld_scope.filter(drawing__equipment_id=document.equipment_id)
-    welding_list_count = weld_scope.count()
-    wps_scope = wps_models.Wps.objects.filter(project=document.project, is_current=True)
-    if document.equipment_id:
-        wps_scope = wps_scope.filter(equipment_id=document.equipment_id)
-    wps_count = wps_scope.count()
+    for project_id, equipment_id, total in rows:
+        if equipment_id is not None:
+            counts[(project_id, equipment_id)] = counts.get((project_id, equipment_id), 0) + total
+        counts[(project_id, None)] = counts.get((project_id, None), 0) + total
+    return counts
+
+
+def _book_compositions(documents):
+    """Composition counts for each document, keyed by document id, in four queries."""
+    project_ids = {document.project_id for document in documents}
+    if not project_ids:
+        return {}
+    welding_maps = _grouped_counts(weld_models.WeldMap.objects.all(), project_ids, "drawing__equipment_id")
+    welds = _grouped_counts(weld_models.Weld.objects.all(), project_ids, "drawing__equipment_id")
+    wps = _grouped_counts(wps_models.Wps.objects.filter(is_current=True), project_ids, "equipment_id")
     pqr_count = wps_models.Pqr.objects.filter(standard="ASME_IX", status="approved").count()
-    return {
-        "welding_map_count": welding_map_count,
-        "welding_list_count": welding_list_count,
-        "wps_count": wps_count,
-        "pqr_count": pqr_count,
-    }
+    compositions = {}
+    for document in documents:
+        key = (document.project_id, document.equipment_id)
+        compositions[document.id] = {
+            "welding_map_count": welding_maps.get(key, 0),
+            "welding_list_count": welds.get(key, 0),
+            "wps_count": wps.get(key, 0),
+            "pqr_count": pqr_count,
+        }
+    return compositions
+
+
+def _book_composition(document):
+    return _book_compositions([document])[document.id]
 
 
 def _copy_title(source_title):
@@ -112,8 +127,9 @@ def document_list(request):
     if equipment_id:
         items = items.filter(equipment_id=equipment_id)
     items = list(items)
+    compositions = _book_compositions(items)
     for item in items:
-        composition = _book_composition(item)
+        composition = compositions[item.id]
         item.welding_map_count = composition["welding_map_count"]
         item.welding_list_count = composition["welding_list_count"]
         item.wps_count = composition["wps_count"]
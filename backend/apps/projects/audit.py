@@ -0,0 +1,251 @@
+"""Batched writer for API audit events.
+
+Requests only put a row dict on a bounded in-memory queue. A daemon thread
+drains it and inserts with ``bulk_create``. Events that cannot be buffered (queue
+full) or inserted (database error) are appended as JSON lines to a spill file,
+which is replayed on the next successful flush. A batch the database rejects is
+bisected so one bad row does not sink the rest; rows rejected on their own go to
+a quarantine file that is never replayed. The buffer is flushed when the process
+exits.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import models
+
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("id", "event_code", "entity", "entity_id", "user_id", "at", "payload_json")
+# Errors caused by the rows themselves; anything else (database down) keeps the batch for a retry.
+ROW_ERRORS = (IntegrityError, DataError, ValueError, TypeError)
+
+
+def build_event(event_code, entity, entity_id, user_id, payload):
+    return {
+        "id": uuid.uuid4(),
+        "event_code": event_code,
+        "entity": entity,
+        "entity_id": entity_id,
+        "user_id": user_id,
+        "at": timezone.now(),
+        "payload_json": payload,
+    }
+
+
+def _to_model(event):
+    # Request bodies may hold uploads or other objects JSONField cannot store.
+    return models.AuditEvent(**{
+        **event,
+        "payload_json": json.loads(json.dumps(event["payload_json"], default=str)),
+    })
+
+
+def _dumps(event):
+    return json.dumps({name: event[name] for name in FIELDS}, default=str)
+
+
+def _loads(line):
+    event = json.loads(line)
+    for name in ("id", "entity_id", "user_id"):
+        event[name] = uuid.UUID(event[name])
+    event["at"] = parse_datetime(event["at"])
+    return event
+
+
+class AuditWriter:
+    def __init__(self, buffer_size, batch_size, flush_seconds, spill_dir):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.spill_dir = Path(spill_dir)
+        self._queue = queue.Queue(maxsize=buffer_size)
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def spill_path(self):
+        return self.spill_dir / f"audit-{os.getpid()}.jsonl"
+
+    @property
+    def quarantine_path(self):
+        # Outside the audit-*.jsonl replay glob.
+        return self.spill_dir / f"quarantine-{os.getpid()}.jsonl"
+
+    def submit(self, event):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.spill([event])
+
+    def _ensure_thread(self):
+        # Started lazily and again after a fork: threads do not survive it.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                first = None
+            batch = [] if first is None else [first]
+            self._drain_into(batch)
+            try:
+                self.write(batch)
+            except Exception:
+                logger.exception("Audit writer loop failed")
+            finally:
+                close_old_connections()
+
+    def _drain_into(self, batch, limit=None):
+        limit = limit or self.batch_size
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _insert(self, events, ignore_conflicts=False):
+        """Insert ``events`` and return the ones the database rejects row by row."""
+        if not events:
+            return []
+        try:
+            with transaction.atomic():
+                models.AuditEvent.objects.bulk_create(
+                    [_to_model(event) for event in events],
+                    batch_size=self.batch_size,
+                    ignore_conflicts=ignore_conflicts,
+                )
+            return []
+        except ROW_ERRORS:
+            if len(events) == 1:
+                logger.exception("Audit event %s rejected", events[0]["id"])
+                return list(events)
+        middle = len(events) // 2
+        return self._insert(events[:middle], ignore_conflicts) + self._insert(events[middle:], ignore_conflicts)
+
+    def write(self, events):
+        """Insert ``events`` plus any spilled backlog; spill them again on failure."""
+        with self._write_lock:
+            if events:
+                try:
+                    rejected = self._insert(events)
+                except Exception:
+                    logger.exception("Audit insert failed, spilling %s events", len(events))
+                    self.spill(events)
+                    return
+                self.quarantine(rejected)
+            self.replay_spill()
+
+    def flush(self):
+        """Write everything buffered in this process, in the calling thread."""
+        while True:
+            batch = self._drain_into([])
+            if not batch:
+                break
+            self.write(batch)
+        self.write([])
+
+    def _append(self, path, lines):
+        with self._spill_lock:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as handle:
+                for line in lines:
+                    handle.write(line + "\n")
+
+    def spill(self, events):
+        self._append(self.spill_path, [_dumps(event) for event in events])
+
+    def quarantine(self, events, lines=()):
+        lines = [_dumps(event) for event in events] + list(lines)
+        if lines:
+            self._append(self.quarantine_path, lines)
+
+    def replay_spill(self):
+        if not self.spill_dir.is_dir():
+            return 0
+        replayed = 0
+        for path in sorted(self.spill_dir.glob("audit-*.jsonl")):
+            # Claim the file first so concurrent writers never replay it twice.
+            claimed = path.with_suffix(f".{uuid.uuid4().hex}.replay")
+            with self._spill_lock:
+                try:
+                    path.rename(claimed)
+                except FileNotFoundError:
+                    continue
+            events = []
+            unreadable = []
+            for line in claimed.read_text(encoding="utf-8").splitlines():
+                if not line:
+                    continue
+                try:
+                    events.append(_loads(line))
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    unreadable.append(line)
+            try:
+                rejected = self._insert(events, ignore_conflicts=True)
+            except Exception:
+                logger.exception("Audit spill replay failed for %s", path.name)
+                claimed.rename(path.with_suffix(f".{uuid.uuid4().hex}.jsonl"))
+                continue
+            self.quarantine(rejected, unreadable)
+            claimed.unlink()
+            replayed += len(events) - len(rejected)
+        return replayed
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AuditWriter(
+                    buffer_size=settings.AUDIT_BUFFER_SIZE,
+                    batch_size=settings.AUDIT_BATCH_SIZE,
+                    flush_seconds=settings.AUDIT_FLUSH_SECONDS,
+                    spill_dir=settings.AUDIT_SPILL_DIR,
+                )
+                atexit.register(_flush_at_exit)
+    return _writer
+
+
+def _flush_at_exit():
+    try:
+        _writer.flush()
+    except Exception:
+        logger.exception("Audit flush at exit failed")
+        _writer.spill(_writer._drain_into([], limit=float("inf")))
+
+
+def record_event(event_code, entity, entity_id, user_id, payload):
+    event = build_event(event_code, entity, entity_id, user_id, payload)
+    if not settings.AUDIT_ASYNC:
+        _to_model(event).save(force_insert=True)
+        return
+    get_writer().submit(event)
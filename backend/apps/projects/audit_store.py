@@ -0,0 +1,138 @@
+"""Reading and archiving AuditEvent / AuditLog.
+
+Lists are filtered by entity, user and time range here and paged by the API's
+cursor pagination on ``(at, id)`` newest first (``AuditCursorPagination``).
+Whole months older than the retention window are moved to
+``<archive dir>/<table>/<YYYY-MM>.ndjson.gz`` and deleted, which keeps the live
+tables to a bounded number of monthly ranges.
+"""
+import gzip
+import json
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import models
+
+
+AUDIT_MODELS = (models.AuditEvent, models.AuditLog)
+ARCHIVE_CHUNK_SIZE = 2000
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def _parse_time(value, name):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise InvalidFilter(f"{name} must be an ISO 8601 datetime.")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _parse_uuid(value, name):
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        raise InvalidFilter(f"{name} must be a UUID.") from None
+
+
+def filter_events(queryset, params):
+    """Apply entity/entity_id/user_id/since/until from ``params``."""
+    if params.get("entity"):
+        queryset = queryset.filter(entity=params["entity"])
+    if params.get("entity_id"):
+        queryset = queryset.filter(entity_id=_parse_uuid(params["entity_id"], "entity_id"))
+    if params.get("user_id"):
+        queryset = queryset.filter(user_id=_parse_uuid(params["user_id"], "user_id"))
+    if params.get("since"):
+        queryset = queryset.filter(at__gte=_parse_time(params["since"], "since"))
+    if params.get("until"):
+        queryset = queryset.filter(at__lt=_parse_time(params["until"], "until"))
+    return queryset
+
+
+def month_start(value):
+    value = timezone.localtime(value) if timezone.is_aware(value) else value
+    start = datetime(value.year, value.month, 1)
+    return timezone.make_aware(start) if timezone.is_aware(value) else start
+
+
+def add_months(start, months):
+    index = start.year * 12 + start.month - 1 + months
+    return start.replace(year=index // 12, month=index % 12 + 1)
+
+
+def next_month(start):
+    return add_months(start, 1)
+
+
+def retention_cutoff(now, months):
+    return add_months(month_start(now), -months)
+
+
+def _archive_path(archive_dir, model, start):
+    folder = Path(archive_dir) / model._meta.db_table
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f"{start:%Y-%m}.ndjson.gz"
+    part = 1
+    # Late rows for an already archived month go to a new part.
+    while path.exists():
+        part += 1
+        path = folder / f"{start:%Y-%m}.{part}.ndjson.gz"
+    return path
+
+
+def archive_month(model, start, archive_dir):
+    """Write one month of ``model`` to a gzip NDJSON file, then delete it."""
+    end = next_month(start)
+    rows = model.objects.filter(at__gte=start, at__lt=end).order_by("at", "id")
+    fields = [field.attname for field in model._meta.concrete_fields]
+    if not rows.exists():
+        return None, 0
+    path = _archive_path(archive_dir, model, start)
+    count = 0
+    try:
+        with transaction.atomic():
+            with gzip.open(path, "wt", encoding="utf-8") as handle:
+                while True:
+                    chunk = list(rows.values(*fields)[:ARCHIVE_CHUNK_SIZE])
+                    if not chunk:
+                        break
+                    for row in chunk:
+                        handle.write(json.dumps(row, cls=DjangoJSONEncoder, separators=(",", ":")))
+                        handle.write("\n")
+                    count += len(chunk)
+                    # Written rows are the head of the month up to the chunk's last (at, id),
+                    # so each chunk is deleted by that key range and the next one starts at the head.
+                    last_at, last_id = chunk[-1]["at"], chunk[-1]["id"]
+                    rows.filter(Q(at__lt=last_at) | Q(at=last_at, id__lte=last_id)).delete()
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return path, count
+
+
+def archive_before(cutoff, archive_dir):
+    """Archive every full month of audit data older than ``cutoff``'s month."""
+    limit = month_start(cutoff)
+    archived = []
+    for model in AUDIT_MODELS:
+        oldest = model.objects.filter(at__lt=limit).aggregate(oldest=Min("at"))["oldest"]
+        if oldest is None:
+            continue
+        start = month_start(oldest)
+        while start < limit:
+            path, count = archive_month(model, start, archive_dir)
+            if count:
+                archived.append((model._meta.db_table, start, path, count))
+            start = next_month(start)
+    return archived
@@ -0,0 +1,91 @@
+import hashlib
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import models
+from .versioning import GLOBAL_SCOPE
+
+
+# Bumped at GLOBAL_SCOPE when projects or memberships change, since that changes
+# which rows a list returns without touching the rows themselves.
+MEMBERSHIP_RESOURCE = "project"
+
+
+class ConditionalGetMixin:
+    """ETag / Last-Modified for list and retrieve from DataVersion counters.
+
+    The validators are computed with one query on DataVersion before anything is
+    serialized; a matching If-None-Match / If-Modified-Since returns 304 at once.
+    ``version_resources`` lists the counters that change this payload and
+    ``version_project_lookup`` the path to the project (None for GLOBAL_SCOPE).
+    """
+
+    version_resources = ()
+    version_project_lookup = "project_id"
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(request, None, super().list, args, kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        return self._conditional(request, pk, super().retrieve, args, kwargs)
+
+    def get_version_resources(self):
+        return self.version_resources
+
+    def _version_scope(self, request, pk):
+        if self.version_project_lookup is None:
+            return Q(project_id=GLOBAL_SCOPE)
+        if pk is not None:
+            try:
+                project_id = (
+                    self.get_queryset().filter(pk=pk)
+                    .values_list(self.version_project_lookup, flat=True).first()
+                )
+            except (ValueError, ValidationError):
+                return None
+            return None if project_id is None else Q(project_id=project_id)
+        project_id = request.query_params.get("project_id")
+        if not project_id:
+            return Q()
+        try:
+            return Q(project_id=uuid.UUID(project_id))
+        except ValueError:
+            return None
+
+    def get_validators(self, request, pk=None):
+        scope = self._version_scope(request, pk)
+        if scope is None:
+            return None, None
+        rows = sorted(
+            models.DataVersion.objects.filter(
+                (scope & Q(resource__in=self.get_version_resources()))
+                | Q(project_id=GLOBAL_SCOPE, resource=MEMBERSHIP_RESOURCE)
+            ).values_list("project_id", "resource", "version", "updated_at")
+        )
+        digest = hashlib.sha1(f"{request.user.pk}|{request.get_full_path()}".encode())
+        for project_id, resource, version, _updated_at in rows:
+            digest.update(f"|{project_id}:{resource}:{version}".encode())
+        last_modified = max((row[3] for row in rows), default=None)
+        return f'"{digest.hexdigest()}"', last_modified
+
+    def _conditional(self, request, pk, render, args, kwargs):
+        etag, last_modified = self.get_validators(request, pk)
+        if etag is None:
+            return render(request, *args, **kwargs)
+        timestamp = last_modified.timestamp() if last_modified else None
+        not_modified = get_conditional_response(
+            request._request, etag=etag, last_modified=timestamp
+        )
+        if not_modified is not None:
+            return not_modified
+        response = render(request, *args, **kwargs)
+        if response.status_code == 200:
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+        return response
@@ -0,0 +1,72 @@
+"""``?fields=`` and ``?expand=`` for API serializers.
+
+A serializer declares what may be embedded in ``expandable_fields``; the ViewSet
+mixin adds the matching ``select_related`` / ``prefetch_related`` to the queryset
+so an expanded list costs a fixed number of queries whatever its size.
+"""
+from django.utils.module_loading import import_string
+
+
+def _names(request, param):
+    # Writes always see every field: trimming the input would skip validation.
+    if request is None or request.method not in ("GET", "HEAD", "OPTIONS"):
+        return set()
+    value = request.query_params.get(param, "")
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class Expand:
+    def __init__(self, serializer, source, many=False, select=(), prefetch=(), resources=()):
+        # ``serializer`` may be a dotted path to avoid import cycles between modules.
+        self.serializer = serializer
+        self.source = source
+        self.many = many
+        self.select = tuple(select)
+        self.prefetch = tuple(prefetch)
+        self.resources = tuple(resources)
+
+    def build(self, name):
+        serializer = self.serializer
+        if isinstance(serializer, str):
+            serializer = import_string(serializer)
+        kwargs = {} if self.source == name else {"source": self.source}
+        return serializer(many=self.many, read_only=True, **kwargs)
+
+
+class ExpandableFieldsMixin:
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Only the serializer a view builds has the request; embedded ones stay whole.
+        request = self._context.get("request")
+        expand = _names(request, "expand") & set(self.expandable_fields)
+        for name in expand:
+            self.fields[name] = self.expandable_fields[name].build(name)
+        fields = _names(request, "fields")
+        if fields:
+            for name in set(self.fields) - fields - expand:
+                self.fields.pop(name)
+
+
+class ExpandableQuerysetMixin:
+    """Applies the joins/prefetches of the expansions requested with ``?expand=``."""
+
+    def get_expansions(self):
+        expandable = getattr(self.get_serializer_class(), "expandable_fields", {})
+        return [expandable[name] for name in sorted(_names(self.request, "expand")) if name in expandable]
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        for expansion in self.get_expansions():
+            if expansion.select:
+                qs = qs.select_related(*expansion.select)
+            if expansion.prefetch:
+                qs = qs.prefetch_related(*expansion.prefetch)
+        return qs
+
+    def get_version_resources(self):
+        resources = list(super().get_version_resources())
+        for expansion in self.get_expansions():
+            resources += [name for name in expansion.resources if name not in resources]
+        return tuple(resources)
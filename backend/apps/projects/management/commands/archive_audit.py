@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.projects.audit_store import archive_before, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = "Archiva a gzip NDJSON los meses de AuditEvent/AuditLog fuera de la retencion y los borra."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before",
+            help="Mes YYYY-MM: archiva los meses anteriores (default: AUDIT_RETENTION_MONTHS).",
+        )
+        parser.add_argument("--archive-dir", help="Carpeta destino (default: AUDIT_ARCHIVE_DIR).")
+
+    def handle(self, *args, **options):
+        if options["before"]:
+            try:
+                cutoff = timezone.make_aware(datetime.strptime(options["before"], "%Y-%m"))
+            except ValueError:
+                raise CommandError("--before debe tener formato YYYY-MM.")
+        else:
+            cutoff = retention_cutoff(timezone.now(), settings.AUDIT_RETENTION_MONTHS)
+        archive_dir = options["archive_dir"] or settings.AUDIT_ARCHIVE_DIR
+        archived = archive_before(cutoff, archive_dir)
+        for table, start, path, count in archived:
+            self.stdout.write(f"{table} {start:%Y-%m}: {count} -> {path}")
+        self.stdout.write(f"Meses archivados: {len(archived)}")
@@ -0,0 +1,61 @@
+"""Project membership lookups for API permission checks and list filtering.
+
+A user's project -> roles map is loaded with one query, memoized on the request
+and kept in a process-wide TTL/LRU cache keyed by email. ProjectUser and User
+writes clear the cache (see signals.py).
+"""
+import uuid
+
+from django.conf import settings
+
+from apps.users.caching import MISSING, TTLCache
+from . import models
+
+
+membership_cache = TTLCache(
+    settings.MEMBERSHIP_CACHE_TTL_SECONDS, settings.MEMBERSHIP_CACHE_MAX_ENTRIES
+)
+
+
+def load_memberships(email):
+    rows = models.ProjectUser.objects.filter(user__email=email).values_list(
+        "project_id", "role__name"
+    )
+    memberships = {}
+    for project_id, role_name in rows:
+        memberships.setdefault(project_id, set()).add(role_name)
+    return {project_id: frozenset(roles) for project_id, roles in memberships.items()}
+
+
+def memberships_for(user, request=None):
+    """Return ``{project_id: frozenset(role names)}`` for an authenticated user."""
+    http_request = getattr(request, "_request", request)
+    if http_request is not None:
+        cached = getattr(http_request, "_project_memberships", MISSING)
+        if cached is not MISSING:
+            return cached
+    memberships = membership_cache.get(user.email)
+    if memberships is MISSING:
+        memberships = load_memberships(user.email)
+        membership_cache.set(user.email, memberships)
+    if http_request is not None:
+        http_request._project_memberships = memberships
+    return memberships
+
+
+def projects_for(user, request=None):
+    return frozenset(memberships_for(user, request))
+
+
+def is_member(user, project_id, request=None):
+    try:
+        project_id = uuid.UUID(str(project_id))
+    except ValueError:
+        return False
+    return project_id in memberships_for(user, request)
+
+
+def filter_for_user(queryset, user, lookup="project_id", request=None):
+    if user.is_superuser:
+        return queryset
+    return queryset.filter(**{f"{lookup}__in": projects_for(user, request)})
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:37
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_project_equipment_rename'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('project_id', models.UUIDField()),
+                ('resource', models.CharField(max_length=50)),
+                ('version', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'DataVersion',
+                'constraints': [models.UniqueConstraint(fields=('project_id', 'resource'), name='data_version_project_resource_unique')],
+            },
+        ),
+    ]
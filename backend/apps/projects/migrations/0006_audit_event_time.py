@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_data_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditevent',
+            name='at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+def drop_duplicate_rules(apps, schema_editor):
+    # Keep the rule that is furthest ahead so no number is handed out twice.
+    NumberingRule = apps.get_model("projects", "NumberingRule")
+    seen = set()
+    for rule in NumberingRule.objects.order_by("project_id", "type", "-next_seq"):
+        key = (rule.project_id, rule.type)
+        if key in seen:
+            rule.delete()
+        seen.add(key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0007_audit_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_rules, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='numberingrule',
+            constraint=models.UniqueConstraint(fields=('project', 'type'), name='numbering_rule_project_type_unique'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 import uuid
 from django.db import models
+from django.utils import timezone
 
 
 class SchemaVersion(models.Model):
@@ -84,6 +85,11 @@ class AuditLog(models.Model):
 
     class Meta:
         db_table = "AuditLog"
+        indexes = [
+            models.Index(fields=["entity", "entity_id", "at"], name="audit_log_entity_at_idx"),
+            models.Index(fields=["user", "at"], name="audit_log_user_at_idx"),
+            models.Index(fields=["at", "id"], name="audit_log_at_idx"),
+        ]
 
 
 class AuditEvent(models.Model):
@@ -92,11 +98,17 @@ class AuditEvent(models.Model):
     entity = models.CharField(max_length=50)
     entity_id = models.UUIDField()
     user = models.ForeignKey("users.User", on_delete=models.CASCADE)
-    at = models.DateTimeField(auto_now_add=True)
+    # Set when the request happens; events are written later in batches.
+    at = models.DateTimeField(default=timezone.now)
     payload_json = models.JSONField(blank=True, null=True)
 
     class Meta:
         db_table = "AuditEvent"
+        indexes = [
+            models.Index(fields=["entity", "entity_id", "at"], name="audit_event_entity_at_idx"),
+            models.Index(fields=["user", "at"], name="audit_event_user_at_idx"),
+            models.Index(fields=["at", "id"], name="audit_event_at_idx"),
+        ]
 
 
 class NumberingRule(models.Model):
@@ -108,3 +120,23 @@ class NumberingRule(models.Model):
 
     class Meta:
         db_table = "NumberingRule"
+        constraints = [
+            # One sequence per project and type; apps.projects.numbering relies on it.
+            models.UniqueConstraint(fields=["project", "type"], name="numbering_rule_project_type_unique")
+        ]
+
+
+class DataVersion(models.Model):
+    # Plain UUID instead of a FK: counters are bumped from post_delete signals
+    # while a project cascade is in flight, and must never block it.
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project_id = models.UUIDField()
+    resource = models.CharField(max_length=50)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "DataVersion"
+        constraints = [
+            models.UniqueConstraint(fields=["project_id", "resource"], name="data_version_project_resource_unique")
+        ]
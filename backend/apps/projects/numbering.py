@@ -0,0 +1,152 @@
+"""Sequence allocation from NumberingRule (see NUMBERING.md / NUMBERING_CONFIG.md).
+
+``reserve`` locks the project's rule for a type with ``select_for_update``, moves
+``next_seq`` past a whole block and renders the block's numbers, so N numbers cost
+the same round trips as one and two workers never get the same sequence. A rule
+that does not exist yet is created from a default pattern, seeded once past the
+highest number already in use.
+"""
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import models
+
+
+TOKEN = re.compile(r"\{(\w+)\}")
+SEQ_WIDTHS = {"Seq": 0, "Seq3": 3, "Seq4": 4}
+CONTEXT_TOKENS = {"ProjectCode", "Year", "WelderIdShort"}
+DEFAULT_PATTERNS = {
+    "WPS": "WPS-{ProjectCode}-{Seq3}",
+    "PQR": "PQR-{ProjectCode}-{Seq3}",
+    "WPQ": "WPQ-{WelderIdShort}-{Seq3}",
+    "WELD": "WELD-{ProjectCode}-{Seq4}",
+    "DRAWING": "DRW-{ProjectCode}-{Seq3}",
+}
+MAX_BLOCK = 10000
+
+
+class InvalidPattern(ValueError):
+    pass
+
+
+def validate_pattern(pattern):
+    tokens = TOKEN.findall(pattern or "")
+    unknown = set(tokens) - set(SEQ_WIDTHS) - CONTEXT_TOKENS
+    if unknown:
+        raise InvalidPattern(f"Variables no permitidas: {', '.join(sorted(unknown))}.")
+    if sum(1 for token in tokens if token in SEQ_WIDTHS) != 1:
+        raise InvalidPattern("pattern debe incluir una sola variable {Seq}, {Seq3} o {Seq4}.")
+    return pattern
+
+
+def _context(project, extra):
+    context = {"ProjectCode": project.code, "Year": str(timezone.localdate().year)}
+    context.update(extra or {})
+    return context
+
+
+def render(pattern, seq, project, extra=None):
+    """Render ``pattern`` for sequence ``seq``, e.g. WELD-{ProjectCode}-{Seq4} -> WELD-P1-0007."""
+    context = _context(project, extra)
+
+    def replace(match):
+        token = match.group(1)
+        if token in SEQ_WIDTHS:
+            return str(seq).zfill(SEQ_WIDTHS[token])
+        if token not in context:
+            raise InvalidPattern(f"Falta el valor de {{{token}}}.")
+        return str(context[token])
+
+    return TOKEN.sub(replace, pattern)
+
+
+def pattern_regex(pattern, project, extra=None):
+    """Regex matching numbers rendered from ``pattern``, with the sequence as group 1."""
+    context = _context(project, extra)
+    parts = []
+    position = 0
+    for match in TOKEN.finditer(pattern):
+        parts.append(re.escape(pattern[position:match.start()]))
+        token = match.group(1)
+        if token in SEQ_WIDTHS:
+            parts.append(r"(\d+)")
+        elif token == "Year" and "Year" not in (extra or {}):
+            parts.append(r"\d{4}")
+        else:
+            parts.append(re.escape(str(context.get(token, ""))))
+        position = match.end()
+    parts.append(re.escape(pattern[position:]))
+    return re.compile("^" + "".join(parts) + "$")
+
+
+def next_seq_after(pattern, project, numbers, extra=None):
+    """First sequence after the highest one found in ``numbers`` for ``pattern``."""
+    regex = pattern_regex(pattern, project, extra)
+    highest = 0
+    for number in numbers:
+        match = regex.match(number or "")
+        if match:
+            highest = max(highest, int(match.group(1)))
+    return highest + 1
+
+
+def _locked_rule(project, rule_type, default_pattern, initial_seq):
+    rule = (
+        models.NumberingRule.objects.select_for_update()
+        .filter(project=project, type=rule_type)
+        .first()
+    )
+    if rule is not None:
+        return rule
+    pattern = validate_pattern(default_pattern or DEFAULT_PATTERNS.get(rule_type, ""))
+    next_seq = initial_seq(pattern) if callable(initial_seq) else initial_seq
+    try:
+        with transaction.atomic():
+            return models.NumberingRule.objects.create(
+                project=project, type=rule_type, pattern=pattern, next_seq=next_seq
+            )
+    except IntegrityError:
+        # Another worker created it first; wait for its lock like everyone else.
+        return models.NumberingRule.objects.select_for_update().get(project=project, type=rule_type)
+
+
+def reserve(project, rule_type, count=1, default_pattern=None, initial_seq=1, extra=None):
+    """Allocate ``count`` consecutive numbers of ``rule_type`` and return them rendered.
+
+    ``initial_seq`` (a value, or a callable taking the pattern) only matters when
+    the rule is created here. Reserved numbers are never handed out again, even
+    if the caller ends up not using them.
+    """
+    if not 1 <= count <= MAX_BLOCK:
+        raise ValueError(f"count must be between 1 and {MAX_BLOCK}.")
+    with transaction.atomic():
+        rule = _locked_rule(project, rule_type, default_pattern, initial_seq)
+        start = rule.next_seq
+        models.NumberingRule.objects.filter(pk=rule.pk).update(next_seq=F("next_seq") + count)
+    return [render(rule.pattern, seq, project, extra) for seq in range(start, start + count)]
+
+
+def reserve_unused(project, rule_type, count, queryset, field, default_pattern=None, exclude=()):
+    """Like ``reserve`` but skips numbers already present in ``queryset.<field>`` or ``exclude``.
+
+    Numbers typed by hand can collide with the sequence; only the reserved block
+    is checked, never the whole table (except once, to seed a new rule).
+    """
+    exclude = set(exclude)
+    numbers = []
+    while len(numbers) < count:
+        block = reserve(
+            project,
+            rule_type,
+            count - len(numbers),
+            default_pattern=default_pattern,
+            initial_seq=lambda pattern: next_seq_after(
+                pattern, project, queryset.values_list(field, flat=True).iterator()
+            ),
+        )
+        taken = set(queryset.filter(**{f"{field}__in": block}).values_list(field, flat=True))
+        numbers += [number for number in block if number not in taken and number not in exclude]
+    return numbers
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from . import models
+from . import numbering
 
 class SchemaVersionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -60,3 +61,9 @@ class NumberingRuleSerializer(serializers.ModelSerializer):
         model = models.NumberingRule
         fields = '__all__'
 
+    def validate_pattern(self, value):
+        try:
+            return numbering.validate_pattern(value)
+        except numbering.InvalidPattern as exc:
+            raise serializers.ValidationError(str(exc)) from None
+
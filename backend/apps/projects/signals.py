@@ -0,0 +1,83 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_delete, post_save
+
+from apps.users import models as user_models
+from . import models
+from .conditional import MEMBERSHIP_RESOURCE
+from .membership import membership_cache
+from .versioning import bump_version
+
+
+# label -> (DataVersion resource, path to the project id; None for GLOBAL_SCOPE).
+VERSIONED_MODELS = {
+    "welds.Weld": ("weld", "project_id"),
+    "welds.Drawing": ("drawing", "project_id"),
+    "welds.WeldMap": ("weld_map", "project_id"),
+    # Embedded with ?expand= (apps.projects.expansion).
+    "welds.WeldMark": ("weld_mark", "weld_map__project_id"),
+    "welds.WeldAttribute": ("weld_attribute", "weld__project_id"),
+    "welds.WeldWelderAssignment": ("weld_assignment", "weld__project_id"),
+    "welds.WeldWpsAssignment": ("weld_assignment", "weld__project_id"),
+    "wps.WpsVariable": ("wps_detail", "wps__project_id"),
+    "wps.WpsProcess": ("wps_detail", "wps__project_id"),
+    "wps.Wps": ("wps", "project_id"),
+    "wps.Pqr": ("pqr", "project_id"),
+    "wpq.Wpq": ("wpq", None),
+    "wpq.Welder": ("welder", None),
+    # Bulk created on weld close; WeldViewSet.close bumps it explicitly.
+    "wpq.ContinuityLog": ("continuity_log", None),
+    "quality.NdeRequest": ("nde_request", "project_id"),
+    "quality.NdeResult": ("nde_result", "nde_request__project_id"),
+    "quality.PwhtRecord": ("pwht_record", "weld__project_id"),
+    "quality.PressureTest": ("pressure_test", "project_id"),
+    "quality.NdeSamplingRule": ("nde_sampling_rule", "project_id"),
+}
+
+
+def _project_of(instance, path):
+    value = instance
+    for name in path.split("__"):
+        value = getattr(value, name)
+    return value
+
+
+def _bump_for(resource, path):
+    def handler(sender, instance, **kwargs):
+        if path is None:
+            bump_version(None, resource)
+            return
+        try:
+            project_id = _project_of(instance, path)
+        except ObjectDoesNotExist:
+            # Parent already gone in a cascade; its own counter was bumped.
+            return
+        bump_version(project_id, resource)
+
+    return handler
+
+
+def _drop_versions(sender, instance, **kwargs):
+    models.DataVersion.objects.filter(project_id=instance.id).delete()
+    bump_version(None, MEMBERSHIP_RESOURCE)
+
+
+def _membership_changed(sender, **kwargs):
+    membership_cache.clear()
+    bump_version(None, MEMBERSHIP_RESOURCE)
+
+
+def _clear_memberships(sender, **kwargs):
+    membership_cache.clear()
+
+
+def connect():
+    for label, (resource, path) in VERSIONED_MODELS.items():
+        handler = _bump_for(resource, path)
+        uid = f"data_version_{resource}"
+        post_save.connect(handler, sender=label, weak=False, dispatch_uid=f"{uid}_save")
+        post_delete.connect(handler, sender=label, weak=False, dispatch_uid=f"{uid}_delete")
+    post_delete.connect(_drop_versions, sender=models.Project, dispatch_uid="data_version_project_delete")
+    post_save.connect(_membership_changed, sender=models.ProjectUser, dispatch_uid="membership_projectuser_save")
+    post_delete.connect(_membership_changed, sender=models.ProjectUser, dispatch_uid="membership_projectuser_delete")
+    post_save.connect(_clear_memberships, sender=user_models.User, dispatch_uid="membership_cache_user_save")
+    post_delete.connect(_clear_memberships, sender=user_models.User, dispatch_uid="membership_cache_user_delete")
@@ -1,10 +1,29 @@
+import gzip
+import io
+import json
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+from urllib.parse import urlencode
+
+from django.core.management import call_command
+from django.db import DatabaseError
 from django.test import TestCase
+from django.utils import timezone
 from django.urls import reverse
+from rest_framework.test import APIClient
 
 from apps.documents import models as document_models
+from apps.users import models as user_models
 from apps.welds import models as weld_models
 from apps.wpq import models as wpq_models
 from apps.wps import models as wps_models
+from . import audit
+from . import audit_store
+from . import membership
+from . import numbering
 from . import models
 
 
@@ -122,3 +141,287 @@ class ProjectListUiTests(TestCase):
         response = self.client.post(reverse("project_delete", args=[project.id]))
         self.assertEqual(response.status_code, 302)
         self.assertFalse(models.Project.objects.filter(id=project.id).exists())
+
+
+class ProjectMembershipTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        membership.membership_cache.clear()
+        self.addCleanup(membership.membership_cache.clear)
+        self.app_user = user_models.User.objects.create(
+            name="inspector", email="inspector@example.local", status="active"
+        )
+        self.role, _ = user_models.Role.objects.get_or_create(name="Inspector", defaults={"scope": "global"})
+        user_models.UserRole.objects.create(user=self.app_user, role=self.role)
+        self.project = models.Project.objects.create(
+            name="P1", code="P1", units="metric", status="active", standard_set=["ASME_IX"]
+        )
+        self.other = models.Project.objects.create(
+            name="P2", code="P2", units="metric", status="active", standard_set=["ASME_IX"]
+        )
+        self.member = models.ProjectUser.objects.create(
+            project=self.project, user=self.app_user, role=self.role
+        )
+        self.auth_user, _ = get_user_model().objects.get_or_create(
+            username="inspector", defaults={"email": self.app_user.email}
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.auth_user)
+
+    def test_projects_for_returns_project_role_map(self):
+        self.assertEqual(membership.projects_for(self.auth_user), frozenset([self.project.id]))
+        self.assertEqual(
+            membership.memberships_for(self.auth_user), {self.project.id: frozenset(["Inspector"])}
+        )
+        with self.assertNumQueries(0):
+            self.assertTrue(membership.is_member(self.auth_user, str(self.project.id)))
+            self.assertFalse(membership.is_member(self.auth_user, self.other.id))
+            self.assertFalse(membership.is_member(self.auth_user, "not-a-uuid"))
+
+    def test_project_user_changes_invalidate_membership(self):
+        url = f"/api/welds/?project_id={self.project.id}"
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.member.delete()
+        self.assertEqual(self.client.get(url).status_code, 403)
+        models.ProjectUser.objects.create(project=self.other, user=self.app_user, role=self.role)
+        self.assertEqual(self.client.get(f"/api/welds/?project_id={self.other.id}").status_code, 200)
+
+    def test_weld_list_is_limited_to_member_projects(self):
+        weld_models.Weld.objects.create(project=self.project, number="W-1")
+        weld_models.Weld.objects.create(project=self.other, number="W-2")
+        resp = self.client.get("/api/welds/")
+        self.assertEqual(resp.status_code, 200)
+        results = resp.data["results"] if isinstance(resp.data, dict) else resp.data
+        self.assertEqual([item["number"] for item in results], ["W-1"])
+        hidden = weld_models.Weld.objects.get(number="W-2")
+        self.assertEqual(self.client.get(f"/api/welds/{hidden.id}/").status_code, 404)
+
+    def test_admin_without_membership_sees_every_project(self):
+        from django.contrib.auth import get_user_model
+
+        admin = user_models.User.objects.create(name="admin", email="admin@example.local", status="active")
+        admin_role, _ = user_models.Role.objects.get_or_create(name="Admin", defaults={"scope": "global"})
+        user_models.UserRole.objects.create(user=admin, role=admin_role)
+        auth_admin, _ = get_user_model().objects.get_or_create(username="admin", defaults={"email": admin.email})
+        self.client.force_authenticate(user=auth_admin)
+        weld_models.Weld.objects.create(project=self.project, number="W-1")
+        other_weld = weld_models.Weld.objects.create(project=self.other, number="W-2")
+        resp = self.client.get("/api/welds/")
+        self.assertEqual(sorted(item["number"] for item in resp.data["results"]), ["W-1", "W-2"])
+        self.assertEqual(self.client.get(f"/api/welds/{other_weld.id}/").status_code, 200)
+
+
+class AuditWriterTests(TestCase):
+    def setUp(self):
+        self.app_user = user_models.User.objects.create(
+            name="auditor", email="auditor@example.local", status="active"
+        )
+        spill_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spill_dir.cleanup)
+        self.writer = audit.AuditWriter(
+            buffer_size=1, batch_size=10, flush_seconds=1, spill_dir=spill_dir.name
+        )
+
+    def _event(self):
+        return audit.build_event("api_write", "welds", uuid.uuid4(), self.app_user.id, {"method": "POST"})
+
+    def test_api_write_is_audited_with_request_time(self):
+        from django.contrib.auth import get_user_model
+
+        auth_user, _ = get_user_model().objects.get_or_create(
+            username="auditor", defaults={"email": self.app_user.email}
+        )
+        client = APIClient()
+        client.force_authenticate(user=auth_user)
+        client.post("/api/welds/", {}, format="json")
+        event = models.AuditEvent.objects.get()
+        self.assertEqual(event.user_id, self.app_user.id)
+        self.assertEqual(event.entity, "welds")
+        self.assertEqual(event.payload_json["method"], "POST")
+
+    def test_full_buffer_spills_and_flush_writes_everything(self):
+        with mock.patch.object(self.writer, "_ensure_thread"):
+            first, second = self._event(), self._event()
+            self.writer.submit(first)
+            self.writer.submit(second)
+        self.assertTrue(self.writer.spill_path.exists())
+        self.writer.flush()
+        self.assertEqual(
+            set(models.AuditEvent.objects.values_list("id", flat=True)), {first["id"], second["id"]}
+        )
+        self.assertEqual(
+            models.AuditEvent.objects.get(id=second["id"]).at.replace(microsecond=0),
+            second["at"].replace(microsecond=0),
+        )
+        self.assertFalse(any(self.writer.spill_dir.iterdir()))
+
+    def test_failed_insert_is_replayed_once(self):
+        event = self._event()
+        with mock.patch.object(
+            models.AuditEvent.objects, "bulk_create", side_effect=DatabaseError("down")
+        ), self.assertLogs("apps.projects.audit", "ERROR"):
+            self.writer.write([event])
+        self.assertFalse(models.AuditEvent.objects.exists())
+        self.writer.flush()
+        self.writer.flush()
+        self.assertEqual(models.AuditEvent.objects.filter(id=event["id"]).count(), 1)
+
+    def test_invalid_event_is_quarantined_without_blocking_the_batch(self):
+        valid = [self._event() for _ in range(5)]
+        bad = {**self._event(), "event_code": None}
+        with self.assertLogs("apps.projects.audit", "ERROR"):
+            self.writer.write(valid[:2] + [bad] + valid[2:])
+        self.assertEqual(
+            set(models.AuditEvent.objects.values_list("id", flat=True)), {event["id"] for event in valid}
+        )
+        self.assertFalse(list(self.writer.spill_dir.glob("audit-*.jsonl")))
+        quarantined = self.writer.quarantine_path.read_text(encoding="utf-8").splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in quarantined], [str(bad["id"])])
+
+    def test_replay_continues_past_a_failing_spill_file(self):
+        first, second = self._event(), self._event()
+        self.writer.spill_dir.mkdir(parents=True, exist_ok=True)
+        (self.writer.spill_dir / "audit-1.jsonl").write_text(
+            audit._dumps(first) + "\nnot json\n", encoding="utf-8"
+        )
+        (self.writer.spill_dir / "audit-2.jsonl").write_text(audit._dumps(second) + "\n", encoding="utf-8")
+        real_bulk_create = models.AuditEvent.objects.bulk_create
+        calls = []
+
+        def down_once(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                raise DatabaseError("down")
+            return real_bulk_create(*args, **kwargs)
+
+        with mock.patch.object(models.AuditEvent.objects, "bulk_create", side_effect=down_once), self.assertLogs(
+            "apps.projects.audit", "ERROR"
+        ):
+            self.writer.replay_spill()
+        self.assertEqual(list(models.AuditEvent.objects.values_list("id", flat=True)), [second["id"]])
+        self.assertEqual(len(list(self.writer.spill_dir.glob("audit-*.jsonl"))), 1)
+        self.writer.replay_spill()
+        self.assertEqual(models.AuditEvent.objects.count(), 2)
+        self.assertFalse(list(self.writer.spill_dir.glob("audit-*.jsonl")))
+        self.assertEqual(self.writer.quarantine_path.read_text(encoding="utf-8"), "not json\n")
+
+
+class AuditQueryTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        from apps.users.permissions import role_cache
+
+        role_cache.clear()
+        self.addCleanup(role_cache.clear)
+        self.app_user = user_models.User.objects.create(
+            name="admin", email="admin@example.local", status="active"
+        )
+        role, _ = user_models.Role.objects.get_or_create(name="Admin", defaults={"scope": "global"})
+        user_models.UserRole.objects.create(user=self.app_user, role=role)
+        self.other_user = user_models.User.objects.create(
+            name="other", email="other@example.local", status="active"
+        )
+        auth_user, _ = get_user_model().objects.get_or_create(
+            username="admin", defaults={"email": self.app_user.email}
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=auth_user)
+        self.weld_id = uuid.uuid4()
+        self.start = timezone.make_aware(datetime(2025, 1, 10, 8, 0))
+        for index in range(5):
+            models.AuditEvent.objects.create(
+                event_code="api_write", entity="welds", entity_id=self.weld_id,
+                user=self.app_user, at=self.start + timedelta(days=index * 20),
+            )
+        models.AuditEvent.objects.create(
+            event_code="api_write", entity="wps", entity_id=uuid.uuid4(),
+            user=self.other_user, at=self.start,
+        )
+
+    def test_keyset_pages_filtered_events_newest_first(self):
+        seen = []
+        url = "/api/audit-events/?" + urlencode(
+            {"entity": "welds", "entity_id": str(self.weld_id), "page_size": 2}
+        )
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            seen += [item["at"] for item in resp.data["results"]]
+            url = resp.data["next"]
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_user_and_time_range_filters(self):
+        resp = self.client.get(
+            "/api/audit-events/",
+            {"user_id": str(self.app_user.id), "since": "2025-01-15T00:00:00", "until": "2025-03-01T00:00:00"},
+        )
+        self.assertEqual(len(resp.data["results"]), 2)
+        resp = self.client.get("/api/audit-events/", {"since": "yesterday"})
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data["code"], "invalid_filter")
+
+    def test_archive_moves_old_months_to_gzip_files(self):
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        # Small chunks: January has three rows, two of them at the same instant.
+        with mock.patch.object(audit_store, "ARCHIVE_CHUNK_SIZE", 2):
+            call_command("archive_audit", before="2025-03", archive_dir=archive_dir.name, stdout=io.StringIO())
+        remaining = list(models.AuditEvent.objects.values_list("at", flat=True))
+        self.assertEqual(len(remaining), 2)
+        self.assertTrue(all(at >= audit_store.month_start(self.start.replace(month=3)) for at in remaining))
+        files = sorted(path.name for path in (Path(archive_dir.name) / "AuditEvent").iterdir())
+        self.assertEqual(files, ["2025-01.ndjson.gz", "2025-02.ndjson.gz"])
+        with gzip.open(Path(archive_dir.name) / "AuditEvent" / "2025-01.ndjson.gz", "rt") as handle:
+            rows = [json.loads(line) for line in handle]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row["entity"] for row in rows}, {"welds", "wps"})
+
+
+class NumberingTests(TestCase):
+    def setUp(self):
+        self.project = models.Project.objects.create(
+            name="P1", code="PRJ-2026-001", units="metric", status="active", standard_set=["ASME_IX"]
+        )
+
+    def test_reserve_renders_blocks_from_the_rule(self):
+        models.NumberingRule.objects.create(
+            project=self.project, type="WELD", pattern="WELD-{ProjectCode}-{Seq4}", next_seq=7
+        )
+        # Savepoint, locked read, one UPDATE of next_seq, release: the same for 1 or 500 numbers.
+        with self.assertNumQueries(4):
+            block = numbering.reserve(self.project, "WELD", count=500)
+        self.assertEqual(block[:2], ["WELD-PRJ-2026-001-0007", "WELD-PRJ-2026-001-0008"])
+        self.assertEqual(len(set(block)), 500)
+        self.assertEqual(numbering.reserve(self.project, "WELD"), ["WELD-PRJ-2026-001-0507"])
+        self.assertEqual(models.NumberingRule.objects.get(project=self.project, type="WELD").next_seq, 508)
+
+    def test_new_rule_is_seeded_past_existing_numbers(self):
+        for number in ("S3", "S12", "T40", "S7A"):
+            weld_models.Weld.objects.create(project=self.project, number=number)
+        weld_models.Weld.objects.create(project=self.project, number="S14")
+        numbers = numbering.reserve_unused(
+            self.project,
+            "WELD",
+            2,
+            weld_models.Weld.objects.filter(project=self.project),
+            "number",
+            default_pattern="S{Seq}",
+        )
+        self.assertEqual(numbers, ["S15", "S16"])
+        weld_models.Weld.objects.create(project=self.project, number="S17")
+        numbers = numbering.reserve_unused(
+            self.project, "WELD", 2, weld_models.Weld.objects.filter(project=self.project), "number"
+        )
+        # S17 was typed by hand; the sequence skips it instead of handing it out.
+        self.assertEqual(numbers, ["S18", "S19"])
+
+    def test_patterns_are_validated(self):
+        self.assertEqual(
+            numbering.render("WPQ-{WelderIdShort}-{Seq3}", 4, self.project, {"WelderIdShort": "W12"}), "WPQ-W12-004"
+        )
+        for pattern in ("WELD-{ProjectCode}", "WELD-{Foo}-{Seq4}", "{Seq3}-{Seq4}"):
+            with self.assertRaises(numbering.InvalidPattern):
+                numbering.validate_pattern(pattern)
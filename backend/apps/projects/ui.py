@@ -9,6 +9,7 @@ from .forms import ClientForm, ProjectForm, ProjectEquipmentForm
 from apps.documents import models as document_models
 from apps.quality import models as quality_models
 from apps.welds import models as weld_models
+from apps.welds import stats as weld_stats
 from apps.wps import models as wps_models
 from apps.wpq import models as wpq_models
 
@@ -69,7 +70,7 @@ def project_detail(request, pk):
     )
     drawings = weld_models.Drawing.objects.filter(project=item).count()
     weld_maps = weld_models.WeldMap.objects.filter(project=item).count()
-    welds = weld_models.Weld.objects.filter(project=item).count()
+    project_weld_stats = weld_stats.get_stats(item.id)
     welding_books = document_models.Document.objects.filter(project=item).filter(
         welding_book_filter
     ).count()
@@ -106,7 +107,8 @@ def project_detail(request, pk):
             "item": item,
             "drawings": drawings,
             "weld_maps": weld_maps,
-            "welds": welds,
+            "welds": project_weld_stats.total,
+            "weld_stats": project_weld_stats,
             "welding_books": welding_books,
             "wps_count": wps_count,
             "pqr_count": pqr_count,
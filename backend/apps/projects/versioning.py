@@ -0,0 +1,37 @@
+import uuid
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import models
+
+
+# Scope for resources that are not tied to a project (e.g. WPQ).
+GLOBAL_SCOPE = uuid.UUID(int=0)
+
+
+def bump_version(project_id, resource):
+    project_id = project_id or GLOBAL_SCOPE
+    updated = models.DataVersion.objects.filter(
+        project_id=project_id, resource=resource
+    ).update(version=F("version") + 1, updated_at=timezone.now())
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            models.DataVersion.objects.create(project_id=project_id, resource=resource, version=1)
+    except IntegrityError:
+        models.DataVersion.objects.filter(project_id=project_id, resource=resource).update(
+            version=F("version") + 1, updated_at=timezone.now()
+        )
+
+
+def get_versions(project_id, resources):
+    project_id = project_id or GLOBAL_SCOPE
+    rows = models.DataVersion.objects.filter(
+        project_id=project_id, resource__in=resources
+    ).values_list("resource", "version")
+    versions = {resource: 0 for resource in resources}
+    versions.update(rows)
+    return versions
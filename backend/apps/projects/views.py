@@ -1,7 +1,10 @@
 from rest_framework import permissions, viewsets
+from rest_framework.response import Response
+from . import audit_store
 from . import models
 from . import serializers
 from apps.users.views import IsAdminRole
+from config.pagination import KeysetCursorPagination
 
 class SchemaVersionViewSet(viewsets.ModelViewSet):
     queryset = models.SchemaVersion.objects.all()
@@ -47,13 +50,35 @@ class ProjectEquipmentViewSet(viewsets.ModelViewSet):
         return qs
 
 
-class AuditLogViewSet(viewsets.ModelViewSet):
+class AuditCursorPagination(KeysetCursorPagination):
+    # Newest first on the (at, id) indexes; same page_size/next/previous contract as every list.
+    ordering = ("-at", "-id")
+
+
+class AuditQueryMixin:
+    # ?entity=&entity_id=&user_id=&since=&until= on the list.
+    pagination_class = AuditCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            queryset = audit_store.filter_events(queryset, self.request.query_params)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        try:
+            return super().list(request, *args, **kwargs)
+        except audit_store.InvalidFilter as exc:
+            return Response({"code": "invalid_filter", "message": str(exc)}, status=400)
+
+
+class AuditLogViewSet(AuditQueryMixin, viewsets.ModelViewSet):
     queryset = models.AuditLog.objects.all()
     serializer_class = serializers.AuditLogSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminRole]
 
 
-class AuditEventViewSet(viewsets.ModelViewSet):
+class AuditEventViewSet(AuditQueryMixin, viewsets.ModelViewSet):
     queryset = models.AuditEvent.objects.all()
     serializer_class = serializers.AuditEventSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminRole]
@@ -1,6 +1,7 @@
 from rest_framework import viewsets
 from . import models
 from . import serializers
+from apps.projects.conditional import ConditionalGetMixin
 from apps.users.project_permissions import ProjectScopedPermission
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -29,8 +30,9 @@ class ValidationRuleSetItemViewSet(BaseRoleViewSet):
     write_roles = ["Admin"]
 
 
-class NdeRequestViewSet(BaseRoleViewSet):
+class NdeRequestViewSet(ConditionalGetMixin, BaseRoleViewSet):
     queryset = models.NdeRequest.objects.all()
+    version_resources = ("nde_request",)
     serializer_class = serializers.NdeRequestSerializer
 
     def get_queryset(self):
@@ -49,13 +51,17 @@ class NdeRequestViewSet(BaseRoleViewSet):
         return Response(serializer.data)
 
 
-class NdeResultViewSet(BaseRoleViewSet):
+class NdeResultViewSet(ConditionalGetMixin, BaseRoleViewSet):
     queryset = models.NdeResult.objects.all()
+    version_resources = ("nde_result",)
+    version_project_lookup = "nde_request__project_id"
     serializer_class = serializers.NdeResultSerializer
 
 
-class PwhtRecordViewSet(BaseRoleViewSet):
+class PwhtRecordViewSet(ConditionalGetMixin, BaseRoleViewSet):
     queryset = models.PwhtRecord.objects.all()
+    version_resources = ("pwht_record",)
+    version_project_lookup = "weld__project_id"
     serializer_class = serializers.PwhtRecordSerializer
 
     def get_queryset(self):
@@ -66,8 +72,9 @@ class PwhtRecordViewSet(BaseRoleViewSet):
         return qs
 
 
-class PressureTestViewSet(BaseRoleViewSet):
+class PressureTestViewSet(ConditionalGetMixin, BaseRoleViewSet):
     queryset = models.PressureTest.objects.all()
+    version_resources = ("pressure_test",)
     serializer_class = serializers.PressureTestSerializer
 
     def get_queryset(self):
@@ -78,8 +85,9 @@ class PressureTestViewSet(BaseRoleViewSet):
         return qs
 
 
-class NdeSamplingRuleViewSet(BaseRoleViewSet):
+class NdeSamplingRuleViewSet(ConditionalGetMixin, BaseRoleViewSet):
     queryset = models.NdeSamplingRule.objects.all()
+    version_resources = ("nde_sampling_rule",)
     serializer_class = serializers.NdeSamplingRuleSerializer
     write_roles = ["Admin", "Supervisor"]
 
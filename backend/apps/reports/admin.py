@@ -4,12 +4,12 @@ from . import models
 
 @admin.register(models.Report)
 class ReportAdmin(admin.ModelAdmin):
-    list_display = ("project", "type")
+    list_display = ("project", "type", "status", "progress", "created_at")
 
 
 @admin.register(models.Dossier)
 class DossierAdmin(admin.ModelAdmin):
-    list_display = ("project",)
+    list_display = ("project", "status", "progress", "created_at")
 
 
 @admin.register(models.ImportJob)
@@ -0,0 +1,103 @@
+"""Export benchmarks.
+
+Not collected by the default test run; use ``manage.py test --benchmarks`` or
+``manage.py test apps.reports.benchmarks``.
+"""
+import logging
+import tempfile
+import time
+import tracemalloc
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.projects import models as project_models
+from apps.welds import models as weld_models
+from config import importtime
+from . import exports
+
+
+# Shown by ``manage.py test --benchmarks`` (see config/test_runner.py).
+logger = logging.getLogger(__name__)
+
+
+class WeldingListExportBenchmark(TestCase):
+    weld_count = 200_000
+    query_budget = 40
+    # Traced Python allocations; holding every row in memory takes well over this.
+    memory_budget_mb = 32
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = project_models.Project.objects.create(
+            name="Bench", code="BENCH", units="metric", status="active", standard_set=["ASME_IX"]
+        )
+        drawings = weld_models.Drawing.objects.bulk_create(
+            weld_models.Drawing(
+                project=cls.project, code=f"DRW-{index:03d}", revision="A", file_path=""
+            )
+            for index in range(100)
+        )
+        for start in range(0, cls.weld_count, 5000):
+            weld_models.Weld.objects.bulk_create(
+                weld_models.Weld(
+                    project=cls.project,
+                    drawing=drawings[index % len(drawings)],
+                    number=f"W{index:06d}",
+                    status="planned",
+                )
+                for index in range(start, min(start + 5000, cls.weld_count))
+            )
+
+    def test_welding_list_export_is_constant_queries_and_memory(self):
+        media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(media_dir.cleanup)
+        report, _ = exports.queue_report(self.project.id, "welding_list", {"format": "xlsx"})
+        # tracemalloc only sees allocations made while it runs, so the 200k
+        # fixture rows built in setUpTestData do not mask the export's own peak.
+        tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            with override_settings(MEDIA_ROOT=media_dir.name):
+                with CaptureQueriesContext(connection) as queries:
+                    result = exports.run_export("report", report.id)
+            elapsed = time.perf_counter() - started
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak_mb = peak / (1024 * 1024)
+
+        logger.info(
+            "welding_list %s welds: %.1fs, %s queries, peak traced memory %.1f MB",
+            self.weld_count, elapsed, len(queries), peak_mb,
+        )
+        self.assertEqual(result, "ready")
+        weld_selects = [
+            q["sql"] for q in queries.captured_queries if 'FROM "Weld"' in q["sql"]
+        ]
+        # One COUNT for progress plus the single streamed SELECT joined to Drawing.
+        self.assertEqual(len(weld_selects), 2)
+        self.assertLessEqual(len(queries), self.query_budget)
+        self.assertLess(peak_mb, self.memory_budget_mb)
+
+
+class StartupImportBenchmark(SimpleTestCase):
+    # Cold-start import budgets (ms, summed self time from -X importtime).
+    budgets_ms = {"api": 1500, "command": 1500}
+    runs = 3
+
+    def test_cold_start_import_time_within_budget(self):
+        for scenario, budget in self.budgets_ms.items():
+            with self.subTest(scenario=scenario):
+                # Best of N: the budget guards regressions, not scheduler noise.
+                profiles = [importtime.profile_imports(scenario) for _ in range(self.runs)]
+                modules = min(profiles, key=importtime.total_ms)
+                elapsed = importtime.total_ms(modules)
+                slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:5]
+                logger.info(
+                    "startup %s: %.0f ms (budget %s ms); slowest: %s",
+                    scenario, elapsed, budget,
+                    ", ".join(f"{name} {self_us / 1000:.0f} ms" for name, (self_us, _c) in slowest),
+                )
+                self.assertLess(elapsed, budget)
@@ -0,0 +1,216 @@
+"""Dossier PDF engine.
+
+Sections are independent, so each one is rendered to its own PDF (in a process
+pool when ``processes`` > 0) from a single query. The parts are then merged and
+the page header plus the continuous "Page n of m" footer are stamped on top.
+"""
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from django.db import connections
+from django.utils import timezone
+from pypdf import PdfReader, PdfWriter
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.pdfgen import canvas
+
+from apps.projects import models as project_models
+from apps.welds import models as weld_models
+from apps.wpq import models as wpq_models
+from apps.wps import models as wps_models
+
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+TOP = PAGE_HEIGHT - 3 * cm
+BOTTOM = 2 * cm
+COLUMN_WIDTH = 5 * cm
+ROW_HEIGHT = 0.45 * cm
+FETCH_CHUNK_SIZE = 2000
+
+
+def welding_list_rows(project_id):
+    return (
+        weld_models.Weld.objects.filter(project_id=project_id)
+        .order_by("number")
+        .values_list("number", "status", "drawing__code")
+    )
+
+
+def wps_rows(project_id):
+    return (
+        wps_models.Wps.objects.filter(project_id=project_id)
+        .order_by("code")
+        .values_list("code", "status", "standard")
+    )
+
+
+def wpq_rows(project_id):
+    return wpq_models.Wpq.objects.order_by("code").values_list("code", "status", "welder__name")
+
+
+def inspection_rows(project_id):
+    return (
+        weld_models.VisualInspection.objects.filter(weld__project_id=project_id)
+        .order_by("weld__number")
+        .values_list("weld__number", "stage", "result")
+    )
+
+
+def material_rows(project_id):
+    return (
+        weld_models.WeldMaterial.objects.filter(weld__project_id=project_id)
+        .order_by("weld__number")
+        .values_list("weld__number", "material__spec", "heat_number")
+    )
+
+
+def consumable_rows(project_id):
+    return (
+        weld_models.WeldConsumable.objects.filter(weld__project_id=project_id)
+        .order_by("weld__number")
+        .values_list("weld__number", "consumable__spec", "batch")
+    )
+
+
+# (include key, title, headers, rows) in dossier order.
+SECTIONS = [
+    ("welding_list", "Welding List", ["Number", "Status", "Drawing"], welding_list_rows),
+    ("qualifications", "WPS", ["Code", "Status", "Standard"], wps_rows),
+    ("qualifications", "WPQ", ["Code", "Status", "Welder"], wpq_rows),
+    ("inspections", "Visual Inspections", ["Weld", "Stage", "Result"], inspection_rows),
+    ("materials", "Materials", ["Weld", "Material", "Heat"], material_rows),
+    ("consumables", "Consumables", ["Weld", "Consumable", "Batch"], consumable_rows),
+]
+
+
+def _draw_row(pdf, y, values):
+    x = 2 * cm
+    for value in values:
+        pdf.drawString(x, y, "" if value is None else str(value))
+        x += COLUMN_WIDTH
+
+
+def render_section(index, project_id, path):
+    _key, title, headers, rows = SECTIONS[index]
+    pdf = canvas.Canvas(str(path), pagesize=A4)
+    pages = 1
+    y = TOP
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(2 * cm, y, title)
+    y -= 0.7 * cm
+    pdf.setFont("Helvetica-Bold", 10)
+    _draw_row(pdf, y, headers)
+    y -= 0.5 * cm
+    pdf.setFont("Helvetica", 10)
+    for row in rows(project_id).iterator(chunk_size=FETCH_CHUNK_SIZE):
+        if y < BOTTOM:
+            pdf.showPage()
+            pages += 1
+            pdf.setFont("Helvetica", 10)
+            y = TOP
+        _draw_row(pdf, y, row)
+        y -= ROW_HEIGHT
+    pdf.showPage()
+    pdf.save()
+    return pages
+
+
+def _render_section_job(index, project_id, path):
+    try:
+        return render_section(index, project_id, path)
+    finally:
+        connections.close_all()
+
+
+def render_cover(path, dossier, contents):
+    pdf = canvas.Canvas(str(path), pagesize=A4)
+    pages = 1
+    y = TOP
+    pdf.setFont("Helvetica", 12)
+    pdf.drawString(2 * cm, y, f"Export ID: {dossier.id}")
+    y -= 1.0 * cm
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(2 * cm, y, "Contents")
+    y -= 0.6 * cm
+    pdf.setFont("Helvetica", 11)
+    for entry in contents:
+        if y < 3 * cm:
+            pdf.showPage()
+            pages += 1
+            pdf.setFont("Helvetica", 11)
+            y = TOP
+        pdf.drawString(2.5 * cm, y, f"- {entry}")
+        y -= 0.5 * cm
+    pdf.showPage()
+    pages += 1
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(2 * cm, TOP, "Summary")
+    pdf.setFont("Helvetica", 11)
+    total_welds = weld_models.Weld.objects.filter(project_id=dossier.project_id).count()
+    pdf.drawString(2 * cm, PAGE_HEIGHT - 4 * cm, f"Total welds: {total_welds}")
+    pdf.showPage()
+    pdf.save()
+    return pages
+
+
+def render_stamps(path, dossier, total_pages):
+    project = (
+        project_models.Project.objects.select_related("client").filter(id=dossier.project_id).first()
+    )
+    project_name = project.name if project else "Project"
+    project_number = project.code if project else ""
+    project_client = project.client.name if project and project.client else ""
+    project_po = (project.purchase_order or "") if project else ""
+    today = timezone.now().date().isoformat()
+    pdf = canvas.Canvas(str(path), pagesize=A4)
+    for page_num in range(1, total_pages + 1):
+        pdf.setFont("Helvetica-Bold", 11)
+        pdf.drawString(2 * cm, PAGE_HEIGHT - 1.5 * cm, "Welding Dossier")
+        pdf.setFont("Helvetica", 9)
+        pdf.drawString(2 * cm, PAGE_HEIGHT - 2.1 * cm, f"Project: {project_name} ({project_number})")
+        pdf.drawString(2 * cm, PAGE_HEIGHT - 2.7 * cm, f"Customer: {project_client} | PO: {project_po}")
+        pdf.drawRightString(PAGE_WIDTH - 2 * cm, PAGE_HEIGHT - 1.5 * cm, today)
+        pdf.drawRightString(PAGE_WIDTH - 2 * cm, 1.2 * cm, f"Page {page_num} of {total_pages}")
+        pdf.showPage()
+    pdf.save()
+
+
+def render_dossier(path, dossier, include_keys, contents, progress, processes=0):
+    from .worker import init_process
+
+    indices = [index for index, section in enumerate(SECTIONS) if section[0] in include_keys]
+    # One step per section plus the final merge.
+    steps = len(indices) + 1
+    with tempfile.TemporaryDirectory(prefix="dossier_") as tmp_dir:
+        tmp = Path(tmp_dir)
+        parts = [tmp / "cover.pdf"] + [tmp / f"section_{index}.pdf" for index in indices]
+        total_pages = render_cover(parts[0], dossier, contents)
+        if processes <= 0 or len(indices) < 2:
+            for done, (index, part) in enumerate(zip(indices, parts[1:]), start=1):
+                total_pages += render_section(index, dossier.project_id, part)
+                progress.update(done, steps)
+        else:
+            # Forked children must not inherit the parent's open DB sockets.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=min(processes, len(indices)), initializer=init_process
+            ) as pool:
+                futures = [
+                    pool.submit(_render_section_job, index, dossier.project_id, str(part))
+                    for index, part in zip(indices, parts[1:])
+                ]
+                for done, future in enumerate(as_completed(futures), start=1):
+                    total_pages += future.result()
+                    progress.update(done, steps)
+
+        stamps_path = tmp / "stamps.pdf"
+        render_stamps(stamps_path, dossier, total_pages)
+        writer = PdfWriter()
+        for part in parts:
+            writer.append(str(part))
+        for page, stamp in zip(writer.pages, PdfReader(str(stamps_path)).pages):
+            page.merge_page(stamp)
+        with open(path, "wb") as handle:
+            writer.write(handle)
+    return total_pages
@@ -0,0 +1,160 @@
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+
+CONTENT_TYPES = {
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".pdf": "application/pdf",
+    ".csv": "text/csv; charset=utf-8",
+    ".gz": "application/gzip",
+}
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeFile:
+    """File wrapper limited to ``length`` bytes from the current offset.
+
+    Keeps ``fileno`` so servers that implement ``wsgi.file_wrapper`` with
+    sendfile (gunicorn) still send the slice without copying it through Python.
+    """
+
+    def __init__(self, handle, start, length):
+        handle.seek(start)
+        self.handle = handle
+        self.remaining = length
+        self.name = handle.name
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.handle.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.handle.fileno()
+
+    def close(self):
+        self.handle.close()
+
+
+def resolve_media_path(file_path):
+    root = Path(settings.MEDIA_ROOT).resolve()
+    path = (root / file_path).resolve()
+    if root not in path.parents or not path.is_file():
+        return None
+    return path
+
+
+def file_etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(header, size):
+    # (start, end) inclusive, None to send the whole file, False if unsatisfiable.
+    # Multi-range requests fall back to the full body, as RFC 9110 allows.
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0:
+            return False
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def _if_range_matches(request, etag, mtime):
+    value = request.META.get("HTTP_IF_RANGE")
+    if not value:
+        return True
+    if value.startswith('"') or value.startswith("W/"):
+        return value == etag
+    since = parse_http_date_safe(value)
+    return since is not None and int(mtime) <= since
+
+
+def _accel_response(file_path, path, content_type, filename):
+    mode = settings.EXPORT_DOWNLOAD_ACCEL
+    resp = HttpResponse(content_type=content_type)
+    if mode == "nginx":
+        prefix = settings.EXPORT_DOWNLOAD_ACCEL_PREFIX.rstrip("/")
+        resp["X-Accel-Redirect"] = f"{prefix}/{file_path.replace(os.sep, '/')}"
+    else:
+        resp["X-Sendfile"] = str(path)
+    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return resp
+
+
+def serve_file(request, file_path):
+    path = resolve_media_path(file_path)
+    if path is None:
+        return None
+    content_type = CONTENT_TYPES.get(path.suffix.lower(), "application/octet-stream")
+    filename = path.name
+    if settings.EXPORT_DOWNLOAD_ACCEL:
+        # The front proxy handles Range/conditional requests itself.
+        return _accel_response(file_path, path, content_type, filename)
+
+    stat = path.stat()
+    etag = file_etag(stat)
+    last_modified = http_date(stat.st_mtime)
+    conditional = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if conditional is not None:
+        if not isinstance(conditional, HttpResponseNotModified):
+            return conditional
+        conditional["ETag"] = etag
+        conditional["Last-Modified"] = last_modified
+        return conditional
+
+    size = stat.st_size
+    byte_range = None
+    range_header = request.META.get("HTTP_RANGE")
+    if range_header and _if_range_matches(request, etag, stat.st_mtime):
+        byte_range = parse_range(range_header, size)
+    if byte_range is False:
+        resp = HttpResponse(status=416)
+        resp["Content-Range"] = f"bytes */{size}"
+        return resp
+
+    handle = path.open("rb")
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        resp = FileResponse(
+            RangeFile(handle, start, length),
+            status=206,
+            content_type=content_type,
+            as_attachment=True,
+            filename=filename,
+        )
+        resp["Content-Length"] = str(length)
+        resp["Content-Range"] = f"bytes {start}-{end}/{size}"
+    else:
+        resp = FileResponse(
+            handle,
+            content_type=content_type,
+            as_attachment=True,
+            filename=filename,
+        )
+    resp["Accept-Ranges"] = "bytes"
+    resp["ETag"] = etag
+    resp["Last-Modified"] = last_modified
+    return resp
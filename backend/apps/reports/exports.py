@@ -0,0 +1,475 @@
+import hashlib
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.projects.versioning import get_versions
+from apps.welds import models as weld_models
+from apps.wpq import models as wpq_models
+from apps.wps import models as wps_models
+from . import models
+from .renderers import get_renderer
+
+
+logger = logging.getLogger(__name__)
+
+EXPORT_MODELS = {
+    "report": models.Report,
+    "dossier": models.Dossier,
+}
+EXPORT_CHUNK_SIZE = 2000
+WELDING_LIST_HEADERS = ["number", "status", "drawing", "closed_at"]
+# Tabular export format -> file suffix; each format is also a renderer name.
+EXPORT_FORMATS = {
+    "xlsx": ".xlsx",
+    "csv": ".csv",
+    "ndjson": ".ndjson.gz",
+}
+# Rolling full snapshot plus "changes since" deltas (see incremental.py).
+SNAPSHOT_TYPE = "welding_list_snapshot"
+DELTA_TYPE = "welding_list_delta"
+INCREMENTAL_TYPES = (SNAPSHOT_TYPE, DELTA_TYPE)
+DELTA_HEADERS = ["change", "number", "status", "drawing", "closed_at", "changed_at"]
+# Report types whose inputs are fully covered by the project data versions below.
+CACHEABLE_TYPES = ("welding_list", "qual_WPS")
+CACHE_RESOURCES = ("weld", "drawing", "wps")
+DOSSIER_SECTIONS = [
+    "welding_list",
+    "qualifications",
+    "inspections",
+    "materials",
+    "consumables",
+]
+
+
+class ExportProgress:
+    """Persists job progress, writing only when the percentage moves a full step."""
+
+    def __init__(self, model, export_id, step=5):
+        self.model = model
+        self.export_id = export_id
+        self.step = step
+        self.last = 0
+
+    def update(self, done, total):
+        if total <= 0:
+            return
+        percent = min(99, int(done * 100 / total))
+        if percent - self.last < self.step:
+            return
+        self.last = percent
+        self.model.objects.filter(id=self.export_id).update(progress=percent)
+
+
+def export_state(item):
+    return {
+        "export_id": str(item.id),
+        "status": item.status,
+        "progress": item.progress,
+        "file_path": item.file_path,
+        "error": item.error,
+    }
+
+
+def find_export(export_id):
+    report = models.Report.objects.filter(id=export_id).first()
+    if report:
+        return report
+    return models.Dossier.objects.filter(id=export_id).first()
+
+
+def _queue(model, export_id, **fields):
+    if export_id:
+        existing = model.objects.filter(id=export_id).first()
+        if existing:
+            return existing, False
+    try:
+        with transaction.atomic():
+            item = model.objects.create(id=export_id or uuid.uuid4(), status="queued", **fields)
+    except IntegrityError:
+        # A concurrent request with the same export_id won the insert.
+        return model.objects.get(id=export_id), False
+    return item, True
+
+
+def normalize_params(value):
+    if isinstance(value, dict):
+        items = ((key, normalize_params(item)) for key, item in sorted(value.items()))
+        return {key: item for key, item in items if item not in (None, "", [], {})}
+    if isinstance(value, (list, tuple)):
+        return [normalize_params(item) for item in value]
+    if value is None:
+        return None
+    return str(value)
+
+
+def export_cache_key(project_id, report_type, params):
+    payload = {
+        "type": report_type,
+        "project_id": str(project_id),
+        "params": normalize_params(params),
+        "versions": get_versions(project_id, CACHE_RESOURCES),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def cached_report(cache_key):
+    report = (
+        models.Report.objects.filter(cache_key=cache_key, status__in=("queued", "running", "ready"))
+        .order_by("-created_at")
+        .first()
+    )
+    if not report:
+        return None
+    if report.status == "ready":
+        if not report.file_path or not (Path(settings.MEDIA_ROOT) / report.file_path).exists():
+            models.Report.objects.filter(id=report.id).update(status="expired", file_path=None)
+            return None
+        touch_export(report)
+    return report
+
+
+def touch_export(item):
+    item.accessed_at = timezone.now()
+    type(item).objects.filter(id=item.id).update(accessed_at=item.accessed_at)
+
+
+def queue_report(project_id, report_type, params, export_id=None):
+    cache_key = None
+    if report_type in CACHEABLE_TYPES:
+        if export_id:
+            existing = models.Report.objects.filter(id=export_id).first()
+            if existing:
+                return existing, False
+        cache_key = export_cache_key(project_id, report_type, params)
+        cached = cached_report(cache_key)
+        if cached:
+            return cached, False
+    return _queue(
+        models.Report,
+        export_id,
+        project_id=project_id,
+        type=report_type,
+        params_json=params,
+        cache_key=cache_key,
+    )
+
+
+def queue_dossier(project_id, include, export_id=None):
+    return _queue(
+        models.Dossier,
+        export_id,
+        project_id=project_id,
+        config_json={"include": include},
+    )
+
+
+def next_queued(limit, exclude=()):
+    jobs = []
+    for kind, model in EXPORT_MODELS.items():
+        ids = (
+            model.objects.filter(status="queued")
+            .exclude(id__in=list(exclude))
+            .order_by("created_at")
+            .values_list("id", "created_at")[:limit]
+        )
+        jobs.extend((created_at, kind, export_id) for export_id, created_at in ids)
+    jobs.sort()
+    return [(kind, export_id) for _created_at, kind, export_id in jobs[:limit]]
+
+
+def requeue_stale(max_age_seconds):
+    cutoff = timezone.now() - timezone.timedelta(seconds=max_age_seconds)
+    requeued = 0
+    for model in EXPORT_MODELS.values():
+        requeued += model.objects.filter(status="running", started_at__lt=cutoff).update(
+            status="queued", progress=0, started_at=None
+        )
+    return requeued
+
+
+def claim_export(model, export_id):
+    # The conditional UPDATE makes each export id run at most once, whatever the
+    # number of workers polling the queue.
+    return (
+        model.objects.filter(id=export_id, status="queued").update(
+            status="running",
+            progress=0,
+            error=None,
+            started_at=timezone.now(),
+        )
+        == 1
+    )
+
+
+def run_export(kind, export_id):
+    model = EXPORT_MODELS[kind]
+    if not claim_export(model, export_id):
+        return None
+    item = model.objects.get(id=export_id)
+    progress = ExportProgress(model, export_id)
+    try:
+        if kind == "dossier":
+            file_path = build_dossier(item, progress)
+        else:
+            file_path = build_report(item, progress)
+    except Exception as exc:
+        logger.exception("Export %s failed", export_id)
+        model.objects.filter(id=export_id).update(
+            status="failed",
+            error=str(exc),
+            finished_at=timezone.now(),
+        )
+        return "failed"
+    now = timezone.now()
+    model.objects.filter(id=export_id).update(
+        status="ready",
+        progress=100,
+        file_path=file_path,
+        file_size=(Path(settings.MEDIA_ROOT) / file_path).stat().st_size,
+        finished_at=now,
+        accessed_at=now,
+    )
+    if kind == "report" and item.type in INCREMENTAL_TYPES:
+        advance_watermark(item)
+    return "ready"
+
+
+def evict_cache(max_bytes=None):
+    # Least recently used files go first until the ready exports fit the budget.
+    if max_bytes is None:
+        max_bytes = settings.EXPORT_CACHE_MAX_BYTES
+    entries = []
+    for model in EXPORT_MODELS.values():
+        ready = model.objects.filter(status="ready")
+        if model is models.Report:
+            # Snapshot chains are pruned by advance_watermark, not by LRU.
+            ready = ready.exclude(type__in=INCREMENTAL_TYPES)
+        rows = ready.values_list(
+            "id", "file_path", "file_size", "accessed_at", "finished_at"
+        )
+        for export_id, file_path, file_size, accessed_at, finished_at in rows:
+            last_used = accessed_at or finished_at
+            entries.append((last_used is not None, last_used, model, export_id, file_path, file_size or 0))
+    total = sum(entry[5] for entry in entries)
+    if total <= max_bytes:
+        return 0
+    entries.sort(key=lambda entry: entry[:2])
+    evicted = 0
+    root = Path(settings.MEDIA_ROOT)
+    for _has_date, _last_used, model, export_id, file_path, file_size in entries:
+        if total <= max_bytes:
+            break
+        marked = model.objects.filter(id=export_id, status="ready").update(
+            status="expired", file_path=None
+        )
+        if marked and file_path:
+            (root / file_path).unlink(missing_ok=True)
+        total -= file_size
+        evicted += 1
+    return evicted
+
+
+def _output_path(file_name):
+    path = Path(settings.MEDIA_ROOT) / file_name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def build_report(report, progress):
+    if report.type in ("welding_list", SNAPSHOT_TYPE):
+        return build_welding_list(report, progress)
+    if report.type == DELTA_TYPE:
+        return build_welding_list_delta(report, progress)
+    if report.type.startswith("qual_"):
+        return build_qualifications(report, progress)
+    raise ValueError(f"Tipo de export desconocido: {report.type}")
+
+
+def welding_list_queryset(project_id, params):
+    welds = weld_models.Weld.objects.filter(project_id=project_id)
+    status_filter = params.get("status")
+    drawing_id = params.get("drawing_id")
+    date_from = params.get("date_from")
+    date_to = params.get("date_to")
+    if status_filter:
+        welds = welds.filter(status=status_filter)
+    if drawing_id:
+        welds = welds.filter(drawing_id=drawing_id)
+    if date_from:
+        welds = welds.filter(
+            Q(closed_at__date__gte=date_from)
+            | Q(closed_at__isnull=True, status="planned")
+        )
+    if date_to:
+        welds = welds.filter(
+            Q(closed_at__date__lte=date_to)
+            | Q(closed_at__isnull=True, status="planned")
+        )
+    return welds
+
+
+def welding_list_rows(welds, chunk_size=EXPORT_CHUNK_SIZE):
+    rows = welds.order_by("number").values_list(
+        "number", "status", "drawing__code", "closed_at"
+    )
+    for number, status, drawing_code, closed_at in rows.iterator(chunk_size=chunk_size):
+        yield [
+            number,
+            status,
+            drawing_code or "",
+            closed_at.isoformat() if closed_at else ("planned" if status == "planned" else ""),
+        ]
+
+
+def export_format(params):
+    value = (params or {}).get("format") or "xlsx"
+    if value not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {value}")
+    return value
+
+
+def _publish(path, render):
+    """Render into ``<path>.part`` and move it into place; a failed render leaves no file behind."""
+    tmp_path = path.with_name(f"{path.name}.part")
+    try:
+        render(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def write_table(file_stem, file_format, title, headers, rows, progress=None, total=0):
+    file_name = f"{file_stem}{EXPORT_FORMATS[file_format]}"
+    _publish(
+        _output_path(file_name),
+        lambda tmp_path: get_renderer(file_format)(
+            tmp_path, title, headers, rows, progress=progress, total=total
+        ),
+    )
+    return file_name
+
+
+def build_welding_list(report, progress):
+    params = report.params_json or {}
+    welds = welding_list_queryset(report.project_id, params)
+    return write_table(
+        f"{report.type}_{report.id}",
+        export_format(params),
+        "Welding List",
+        WELDING_LIST_HEADERS,
+        welding_list_rows(welds),
+        progress=progress,
+        total=welds.count(),
+    )
+
+
+def _isoformat(value):
+    return value.isoformat() if value else ""
+
+
+def welding_list_changes(project_id, since, until, chunk_size=EXPORT_CHUNK_SIZE):
+    welds = (
+        weld_models.Weld.objects.filter(
+            project_id=project_id, updated_at__gt=since, updated_at__lte=until
+        )
+        .order_by("updated_at")
+        .values_list("number", "status", "drawing__code", "closed_at", "updated_at")
+    )
+    for number, status, drawing_code, closed_at, updated_at in welds.iterator(chunk_size=chunk_size):
+        change = "closed" if closed_at and since < closed_at <= until else "updated"
+        yield [change, number, status, drawing_code or "", _isoformat(closed_at), updated_at.isoformat()]
+    marks = (
+        weld_models.WeldMark.objects.filter(
+            weld__project_id=project_id, created_at__gt=since, created_at__lte=until
+        )
+        .order_by("created_at")
+        .values_list(
+            "weld__number", "weld__status", "weld_map__drawing__code", "weld__closed_at", "created_at"
+        )
+    )
+    for number, status, drawing_code, closed_at, created_at in marks.iterator(chunk_size=chunk_size):
+        yield ["mark", number, status, drawing_code or "", _isoformat(closed_at), created_at.isoformat()]
+
+
+def build_welding_list_delta(report, progress):
+    params = report.params_json or {}
+    return write_table(
+        f"{report.type}_{report.id}",
+        export_format(params),
+        "Welding List Changes",
+        DELTA_HEADERS,
+        welding_list_changes(
+            report.project_id, parse_datetime(params["since"]), parse_datetime(params["until"])
+        ),
+    )
+
+
+def advance_watermark(report):
+    until = parse_datetime(report.params_json["until"])
+    watermark, _ = models.ExportWatermark.objects.get_or_create(
+        project_id=report.project_id, report_type="welding_list"
+    )
+    # Deltas can finish out of order; the watermark only moves forward.
+    models.ExportWatermark.objects.filter(id=watermark.id).filter(
+        Q(exported_until__isnull=True) | Q(exported_until__lt=until)
+    ).update(exported_until=until, updated_at=timezone.now())
+    if report.type != SNAPSHOT_TYPE:
+        return
+    models.ExportWatermark.objects.filter(id=watermark.id).update(snapshot_until=until)
+    # A new snapshot supersedes the previous snapshot and its deltas.
+    superseded = models.Report.objects.filter(
+        project_id=report.project_id,
+        type__in=INCREMENTAL_TYPES,
+        status="ready",
+        created_at__lt=report.created_at,
+    ).values_list("id", "file_path")
+    root = Path(settings.MEDIA_ROOT)
+    for export_id, file_path in superseded:
+        models.Report.objects.filter(id=export_id).update(status="expired", file_path=None)
+        if file_path:
+            (root / file_path).unlink(missing_ok=True)
+
+
+def build_qualifications(report, progress):
+    export_type = report.type[len("qual_"):]
+    if export_type == "WPS":
+        rows = wps_models.Wps.objects.filter(project_id=report.project_id).values_list("code", "status")
+    elif export_type == "WPQ":
+        rows = wpq_models.Wpq.objects.values_list("code", "status")
+    else:
+        rows = wps_models.Wps.objects.none().values_list("code", "status")
+    return write_table(
+        f"qual_{export_type}_{report.id}",
+        export_format(report.params_json),
+        f"Qualifications {export_type}",
+        ["code", "status"],
+        rows.iterator(chunk_size=EXPORT_CHUNK_SIZE),
+    )
+
+
+def build_dossier(dossier, progress):
+    include = (dossier.config_json or {}).get("include") or []
+    include_keys = [entry for entry in DOSSIER_SECTIONS if not include or entry in include]
+    file_name = f"dossier_{dossier.id}.pdf"
+    _publish(
+        _output_path(file_name),
+        lambda tmp_path: get_renderer("dossier_pdf")(
+            tmp_path,
+            dossier,
+            include_keys,
+            include or DOSSIER_SECTIONS,
+            progress,
+            processes=settings.DOSSIER_RENDER_PROCESSES,
+        ),
+    )
+    return file_name
@@ -0,0 +1,53 @@
+"""Scheduling for incremental welding list exports.
+
+Each project keeps a rolling full snapshot plus "changes since" deltas. The
+watermark (ExportWatermark) only advances when an export is ready, so a failed
+delta is simply covered again by the next run.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from apps.welds import models as weld_models
+from . import exports
+from . import models
+
+
+def has_changes(project_id, since, until):
+    return (
+        weld_models.Weld.objects.filter(
+            project_id=project_id, updated_at__gt=since, updated_at__lte=until
+        ).exists()
+        or weld_models.WeldMark.objects.filter(
+            weld__project_id=project_id, created_at__gt=since, created_at__lte=until
+        ).exists()
+    )
+
+
+def schedule_welding_list(project_id, snapshot_days, export_format, now=None):
+    now = now or timezone.now()
+    pending = models.Report.objects.filter(
+        project_id=project_id,
+        type__in=exports.INCREMENTAL_TYPES,
+        status__in=("queued", "running"),
+    ).exists()
+    if pending:
+        return None
+    watermark = models.ExportWatermark.objects.filter(
+        project_id=project_id, report_type="welding_list"
+    ).first()
+    params = {"format": export_format, "until": now.isoformat()}
+    snapshot_due = (
+        not watermark
+        or not watermark.snapshot_until
+        or watermark.snapshot_until <= now - timedelta(days=snapshot_days)
+    )
+    if snapshot_due:
+        report_type = exports.SNAPSHOT_TYPE
+    else:
+        if not has_changes(project_id, watermark.exported_until, now):
+            return None
+        report_type = exports.DELTA_TYPE
+        params["since"] = watermark.exported_until.isoformat()
+    report, _created = exports.queue_report(project_id, report_type, params)
+    return report
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.reports.worker import run_worker
+
+
+class Command(BaseCommand):
+    help = "Procesa la cola de exportaciones (Report/Dossier)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=settings.EXPORT_WORKER_PROCESSES,
+            help="Tamano del pool de procesos. 0 ejecuta en el proceso actual.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.EXPORT_WORKER_POLL_SECONDS,
+            help="Segundos entre consultas a la cola.",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=settings.EXPORT_WORKER_STALE_SECONDS,
+            help="Reencola exports en running con mas de N segundos.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Vacia la cola y termina.",
+        )
+
+    def handle(self, *args, **options):
+        processed = run_worker(
+            processes=options["processes"],
+            poll_interval=options["poll_interval"],
+            once=options["once"],
+            stale_after=options["stale_after"],
+        )
+        self.stdout.write(f"Exports procesados: {processed}")
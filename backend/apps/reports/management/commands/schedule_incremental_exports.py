@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.projects import models as project_models
+from apps.reports import exports
+from apps.reports.incremental import schedule_welding_list
+
+
+class Command(BaseCommand):
+    help = "Encola snapshot completo o delta del welding list por proyecto (cron nocturno)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--project", help="Solo este project_id.")
+        parser.add_argument(
+            "--snapshot-days",
+            type=int,
+            default=settings.EXPORT_SNAPSHOT_DAYS,
+            help="Dias entre snapshots completos; entre medias solo deltas.",
+        )
+        parser.add_argument(
+            "--format",
+            default="csv",
+            help="Formato de archivo: xlsx, csv o ndjson.",
+        )
+
+    def handle(self, *args, **options):
+        if options["format"] not in exports.EXPORT_FORMATS:
+            raise CommandError(f"Formato invalido: {options['format']}")
+        projects = project_models.Project.objects.filter(status="active")
+        if options["project"]:
+            projects = project_models.Project.objects.filter(id=options["project"])
+        queued = 0
+        for project_id in projects.values_list("id", flat=True):
+            report = schedule_welding_list(project_id, options["snapshot_days"], options["format"])
+            if report:
+                queued += 1
+                self.stdout.write(f"{project_id}: {report.type} {report.id}")
+        self.stdout.write(f"Exports encolados: {queued}")
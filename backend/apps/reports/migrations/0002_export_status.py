@@ -0,0 +1,91 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def mark_existing_ready(apps, schema_editor):
+    for name in ("Report", "Dossier"):
+        model = apps.get_model("reports", name)
+        model.objects.filter(file_path__isnull=False).exclude(file_path="").update(
+            status="ready", progress=100
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="status",
+            field=models.CharField(default="queued", max_length=30),
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="progress",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="error",
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="finished_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="dossier",
+            name="status",
+            field=models.CharField(default="queued", max_length=30),
+        ),
+        migrations.AddField(
+            model_name="dossier",
+            name="progress",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="dossier",
+            name="error",
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="dossier",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="dossier",
+            name="started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="dossier",
+            name="finished_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="report",
+            index=models.Index(fields=["status", "created_at"], name="report_status_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="dossier",
+            index=models.Index(fields=["status", "created_at"], name="dossier_status_created_idx"),
+        ),
+        migrations.RunPython(mark_existing_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:00
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_data_version'),
+        ('reports', '0003_export_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportWatermark',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('report_type', models.CharField(max_length=30)),
+                ('snapshot_until', models.DateTimeField(blank=True, null=True)),
+                ('exported_until', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='projects.project')),
+            ],
+            options={
+                'db_table': 'ExportWatermark',
+                'constraints': [models.UniqueConstraint(fields=('project', 'report_type'), name='export_watermark_project_type_unique')],
+            },
+        ),
+    ]
@@ -7,10 +7,22 @@ class Report(models.Model):
     project = models.ForeignKey("projects.Project", on_delete=models.CASCADE)
     type = models.CharField(max_length=30)
     params_json = models.JSONField(default=dict)
+    cache_key = models.CharField(max_length=64, blank=True, null=True, db_index=True)
     file_path = models.CharField(max_length=512, blank=True, null=True)
+    file_size = models.BigIntegerField(blank=True, null=True)
+    status = models.CharField(max_length=30, default="queued")
+    progress = models.IntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    accessed_at = models.DateTimeField(blank=True, null=True)
 
     class Meta:
         db_table = "Report"
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="report_status_created_idx")
+        ]
 
 
 class Dossier(models.Model):
@@ -18,9 +30,20 @@ class Dossier(models.Model):
     project = models.ForeignKey("projects.Project", on_delete=models.CASCADE)
     config_json = models.JSONField(default=dict)
     file_path = models.CharField(max_length=512, blank=True, null=True)
+    file_size = models.BigIntegerField(blank=True, null=True)
+    status = models.CharField(max_length=30, default="queued")
+    progress = models.IntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    accessed_at = models.DateTimeField(blank=True, null=True)
 
     class Meta:
         db_table = "Dossier"
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="dossier_status_created_idx")
+        ]
 
 
 class ImportJob(models.Model):
@@ -43,3 +66,20 @@ class ImportError(models.Model):
 
     class Meta:
         db_table = "ImportError"
+
+
+class ExportWatermark(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey("projects.Project", on_delete=models.CASCADE)
+    report_type = models.CharField(max_length=30)
+    snapshot_until = models.DateTimeField(blank=True, null=True)
+    exported_until = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "ExportWatermark"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["project", "report_type"], name="export_watermark_project_type_unique"
+            )
+        ]
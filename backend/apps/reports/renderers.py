@@ -0,0 +1,32 @@
+"""Export renderer registry.
+
+Renderers are registered by dotted path and imported on first use, so loading
+the URLconf or running unrelated management commands never pulls in openpyxl,
+reportlab or pypdf. ``EXPORT_RENDERERS`` in settings adds or replaces entries.
+"""
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+DEFAULT_RENDERERS = {
+    "xlsx": "apps.reports.xlsx.write_xlsx",
+    "csv": "apps.reports.text_formats.write_csv",
+    "ndjson": "apps.reports.text_formats.write_ndjson_gz",
+    "dossier_pdf": "apps.reports.dossier_pdf.render_dossier",
+}
+
+_cache = {}
+
+
+def renderer_paths():
+    return {**DEFAULT_RENDERERS, **getattr(settings, "EXPORT_RENDERERS", {})}
+
+
+def get_renderer(name):
+    path = renderer_paths().get(name)
+    if path is None:
+        raise ValueError(f"No export renderer registered for {name}")
+    renderer = _cache.get(path)
+    if renderer is None:
+        renderer = _cache[path] = import_string(path)
+    return renderer
@@ -25,10 +25,17 @@ class ImportErrorSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class ClosedPerDaySerializer(serializers.Serializer):
+    day = serializers.DateField()
+    closed = serializers.IntegerField()
+
+
 class ProgressReportSerializer(serializers.Serializer):
     project_id = serializers.UUIDField()
     total_welds = serializers.IntegerField()
     by_status = serializers.DictField(child=serializers.IntegerField())
+    closed_per_day = ClosedPerDaySerializer(many=True)
+    repair_ratio = serializers.FloatField()
 
 
 class ExpiringWelderSerializer(serializers.Serializer):
@@ -51,21 +58,28 @@ class ExpiryReportSerializer(serializers.Serializer):
 
 class ExportWeldingListRequestSerializer(serializers.Serializer):
     project_id = serializers.UUIDField()
+    export_id = serializers.UUIDField(required=False)
+    format = serializers.ChoiceField(choices=["xlsx", "csv", "ndjson"], required=False)
     filters = serializers.DictField(required=False)
 
 
 class ExportQualificationsRequestSerializer(serializers.Serializer):
     project_id = serializers.UUIDField()
     type = serializers.ChoiceField(choices=["WPS", "WPQ"])
+    export_id = serializers.UUIDField(required=False)
+    format = serializers.ChoiceField(choices=["xlsx", "csv", "ndjson"], required=False)
 
 
 class ExportDossierRequestSerializer(serializers.Serializer):
     project_id = serializers.UUIDField()
     include = serializers.ListField(child=serializers.CharField(), required=False)
+    export_id = serializers.UUIDField(required=False)
 
 
 class ExportStatusSerializer(serializers.Serializer):
     export_id = serializers.UUIDField()
     status = serializers.CharField()
+    progress = serializers.IntegerField(required=False)
     file_path = serializers.CharField(allow_null=True, required=False)
+    error = serializers.CharField(allow_null=True, required=False)
 
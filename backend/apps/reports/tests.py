@@ -0,0 +1,512 @@
+import csv
+import gzip
+import io
+import json
+import tempfile
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+from pypdf import PdfReader
+from rest_framework.test import APIClient
+
+from apps.users import models as user_models
+from apps.projects import models as project_models
+from apps.welds import models as weld_models
+from apps.wpq import models as wpq_models
+from apps.wpq.activity import record_activity
+from apps.wps import models as wps_models
+from config import importtime
+from . import exports
+from . import incremental
+from . import models
+from . import renderers
+
+
+class ExportTestMixin:
+    def setUp(self):
+        self.media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_dir.cleanup)
+        # The in-memory test database is not visible to pool processes.
+        media_override = override_settings(
+            MEDIA_ROOT=self.media_dir.name, DOSSIER_RENDER_PROCESSES=0
+        )
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.client = APIClient()
+        self.app_user = user_models.User.objects.create(
+            name="admin", email="admin@example.local", status="active"
+        )
+        role, _ = user_models.Role.objects.get_or_create(name="Admin", defaults={"scope": "global"})
+        user_models.UserRole.objects.get_or_create(user=self.app_user, role=role)
+        self.project = project_models.Project.objects.create(
+            name="P1", code="P1", units="metric", status="active", standard_set=["ASME_IX"]
+        )
+        project_models.ProjectUser.objects.create(
+            project=self.project, user=self.app_user, role=role
+        )
+        self.client.force_authenticate(user=self._auth_user())
+
+    def _auth_user(self):
+        from django.contrib.auth import get_user_model
+
+        AuthUser = get_user_model()
+        auth_user, _ = AuthUser.objects.get_or_create(
+            username="admin", defaults={"email": self.app_user.email}
+        )
+        return auth_user
+
+
+class ExportQueueTests(ExportTestMixin, TestCase):
+    def test_welding_list_post_is_queued_until_worker_runs(self):
+        drawing = weld_models.Drawing.objects.create(
+            project=self.project, code="DRW-1", revision="A", file_path=""
+        )
+        weld_models.Weld.objects.create(project=self.project, drawing=drawing, number="W1")
+        resp = self.client.post(
+            "/api/exports/welding-list",
+            {"project_id": str(self.project.id)},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 202)
+        self.assertEqual(resp.data["status"], "queued")
+        self.assertIsNone(resp.data["file_path"])
+        export_id = resp.data["export_id"]
+
+        call_command("run_export_worker", "--once", "--processes", "0", stdout=io.StringIO())
+
+        resp = self.client.get(f"/api/exports/{export_id}")
+        self.assertEqual(resp.data["status"], "ready")
+        self.assertEqual(resp.data["progress"], 100)
+        self.assertTrue((Path(self.media_dir.name) / resp.data["file_path"]).exists())
+
+    def test_post_with_same_export_id_is_idempotent(self):
+        export_id = str(uuid.uuid4())
+        payload = {"project_id": str(self.project.id), "type": "WPS", "export_id": export_id}
+        first = self.client.post("/api/exports/qualifications", payload, format="json")
+        second = self.client.post("/api/exports/qualifications", payload, format="json")
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data["export_id"], export_id)
+        self.assertEqual(models.Report.objects.filter(id=export_id).count(), 1)
+
+    def test_export_runs_once_per_id(self):
+        dossier, _ = exports.queue_dossier(self.project.id, ["welding_list"])
+        self.assertEqual(exports.run_export("dossier", dossier.id), "ready")
+        self.assertIsNone(exports.run_export("dossier", dossier.id))
+        dossier.refresh_from_db()
+        self.assertEqual(dossier.status, "ready")
+        self.assertEqual(dossier.file_path, f"dossier_{dossier.id}.pdf")
+
+    def test_dossier_merges_sections_with_continuous_page_numbers(self):
+        drawing = weld_models.Drawing.objects.create(
+            project=self.project, code="DRW-1", revision="A", file_path=""
+        )
+        weld_models.Weld.objects.bulk_create(
+            weld_models.Weld(project=self.project, drawing=drawing, number=f"W{index:03d}")
+            for index in range(120)
+        )
+        dossier, _ = exports.queue_dossier(self.project.id, ["welding_list", "qualifications"])
+        with self.assertNumQueries(11):
+            self.assertEqual(exports.run_export("dossier", dossier.id), "ready")
+        dossier.refresh_from_db()
+
+        reader = PdfReader(str(Path(self.media_dir.name) / dossier.file_path))
+        total = len(reader.pages)
+        # Cover and summary, three welding list pages, WPS and WPQ.
+        self.assertEqual(total, 7)
+        for number, page in enumerate(reader.pages, start=1):
+            text = page.extract_text()
+            self.assertIn(f"Page {number} of {total}", text)
+            self.assertIn("Project: P1 (P1)", text)
+        self.assertIn("W119", reader.pages[4].extract_text())
+
+    def test_failed_export_records_error(self):
+        report, _ = exports.queue_report(self.project.id, "unknown", {})
+        with self.assertLogs("apps.reports.exports", level="ERROR"):
+            self.assertEqual(exports.run_export("report", report.id), "failed")
+        report.refresh_from_db()
+        self.assertEqual(report.status, "failed")
+        self.assertIn("unknown", report.error)
+
+    @override_settings(EXPORT_RENDERERS={"csv": "apps.reports.tests.broken_renderer"})
+    def test_failed_render_removes_partial_file_and_is_not_counted(self):
+        report, _ = exports.queue_report(self.project.id, "welding_list", {"format": "csv"})
+        out = io.StringIO()
+        with self.assertLogs("apps.reports.exports", level="ERROR"):
+            call_command("run_export_worker", "--once", "--processes", "0", stdout=out)
+        report.refresh_from_db()
+        self.assertEqual(report.status, "failed")
+        self.assertIn("Exports procesados: 0", out.getvalue())
+        self.assertEqual(list(Path(self.media_dir.name).rglob("*")), [])
+
+
+class ExportFormatTests(ExportTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        drawing = weld_models.Drawing.objects.create(
+            project=self.project, code="DRW-1", revision="A", file_path=""
+        )
+        for number in ("W2", "W1"):
+            weld_models.Weld.objects.create(project=self.project, drawing=drawing, number=number)
+
+    def _export(self, url, payload):
+        resp = self.client.post(url, {"project_id": str(self.project.id), **payload}, format="json")
+        self.assertEqual(resp.status_code, 202)
+        self.assertEqual(exports.run_export("report", resp.data["export_id"]), "ready")
+        report = models.Report.objects.get(id=resp.data["export_id"])
+        return Path(self.media_dir.name) / report.file_path
+
+    def test_welding_list_csv(self):
+        path = self._export("/api/exports/welding-list", {"format": "csv"})
+        self.assertEqual(path.suffix, ".csv")
+        rows = list(csv.reader(path.read_text(encoding="utf-8").splitlines()))
+        self.assertEqual(rows[0], exports.WELDING_LIST_HEADERS)
+        self.assertEqual([row[0] for row in rows[1:]], ["W1", "W2"])
+
+    def test_qualifications_ndjson_gzip(self):
+        wps_models.Wps.objects.create(project=self.project, code="WPS-1", standard="ASME_IX")
+        path = self._export("/api/exports/qualifications", {"type": "WPS", "format": "ndjson"})
+        self.assertTrue(path.name.endswith(".ndjson.gz"))
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            lines = [json.loads(line) for line in handle]
+        self.assertEqual(lines, [{"code": "WPS-1", "status": "draft"}])
+
+    def test_unknown_format_is_rejected(self):
+        resp = self.client.post(
+            "/api/exports/welding-list",
+            {"project_id": str(self.project.id), "format": "parquet"},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data["code"], "invalid_format")
+
+    def test_ui_queues_selected_format(self):
+        client = Client()
+        client.force_login(self._auth_user())
+        resp = client.post(
+            "/ui/reports/exports/",
+            {"action": "welding_list", "project_id": str(self.project.id), "format": "csv"},
+        )
+        self.assertEqual(resp.status_code, 200)
+        report = models.Report.objects.get()
+        self.assertEqual(report.params_json["format"], "csv")
+
+
+class IncrementalExportTests(ExportTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.drawing = weld_models.Drawing.objects.create(
+            project=self.project, code="DRW-1", revision="A", file_path=""
+        )
+        self.weld_map = weld_models.WeldMap.objects.create(project=self.project, drawing=self.drawing)
+        self.welds = [
+            weld_models.Weld.objects.create(project=self.project, drawing=self.drawing, number=f"W{index}")
+            for index in range(3)
+        ]
+
+    def _schedule(self, now=None):
+        report = incremental.schedule_welding_list(self.project.id, 7, "csv", now=now)
+        if report:
+            self.assertEqual(exports.run_export("report", report.id), "ready")
+            report.refresh_from_db()
+        return report
+
+    def _rows(self, report):
+        text = (Path(self.media_dir.name) / report.file_path).read_text(encoding="utf-8")
+        return list(csv.reader(text.splitlines()))[1:]
+
+    def test_snapshot_then_deltas_follow_watermark(self):
+        snapshot = self._schedule()
+        self.assertEqual(snapshot.type, exports.SNAPSHOT_TYPE)
+        self.assertEqual(len(self._rows(snapshot)), 3)
+        self.assertIsNone(self._schedule())
+
+        closed = self.welds[0]
+        closed.status = "completed"
+        closed.closed_at = timezone.now()
+        closed.save()
+        weld_models.WeldMark.objects.create(
+            weld_map=self.weld_map, weld=self.welds[1], geometry={"type": "point"}
+        )
+        delta = self._schedule()
+        self.assertEqual(delta.type, exports.DELTA_TYPE)
+        self.assertEqual(
+            [(row[0], row[1]) for row in self._rows(delta)], [("closed", "W0"), ("mark", "W1")]
+        )
+        watermark = models.ExportWatermark.objects.get(project=self.project)
+        self.assertEqual(watermark.exported_until.isoformat(), delta.params_json["until"])
+        self.assertIsNone(self._schedule())
+
+    def test_new_snapshot_expires_previous_chain(self):
+        first = self._schedule()
+        self.welds[2].status = "repair"
+        self.welds[2].save()
+        delta = self._schedule()
+        second = self._schedule(now=timezone.now() + timedelta(days=8))
+        self.assertEqual(second.type, exports.SNAPSHOT_TYPE)
+        for report in (first, delta):
+            report.refresh_from_db()
+            self.assertEqual(report.status, "expired")
+        self.assertEqual(
+            models.ExportWatermark.objects.get(project=self.project).snapshot_until.isoformat(),
+            second.params_json["until"],
+        )
+
+    def test_command_skips_projects_with_pending_exports(self):
+        out = io.StringIO()
+        call_command("schedule_incremental_exports", stdout=out)
+        call_command("schedule_incremental_exports", stdout=out)
+        self.assertEqual(
+            models.Report.objects.filter(type__in=exports.INCREMENTAL_TYPES).count(), 1
+        )
+
+
+class ProgressReportTests(ExportTestMixin, TestCase):
+    def test_progress_reads_counters_in_constant_queries(self):
+        for index, status in enumerate(["planned", "planned", "completed", "repair"]):
+            weld_models.Weld.objects.create(
+                project=self.project,
+                number=f"W{index}",
+                status=status,
+                closed_at=timezone.now() if status == "completed" else None,
+            )
+        url = f"/api/reports/progress?project_id={self.project.id}"
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["total_welds"], 4)
+        self.assertEqual(
+            resp.data["by_status"],
+            {"planned": 2, "in_progress": 0, "completed": 1, "repair": 1},
+        )
+        self.assertEqual(resp.data["closed_per_day"], [{"day": timezone.localdate(), "closed": 1}])
+        self.assertEqual(resp.data["repair_ratio"], 0.25)
+
+
+class ExpiryReportTests(ExportTestMixin, TestCase):
+    def test_expiry_report_uses_activity_index_in_one_query(self):
+        other = project_models.Project.objects.create(
+            name="P2", code="P2", units="metric", status="active", standard_set=["ASME_IX"]
+        )
+        today = timezone.localdate()
+        rows = [
+            ("Expiring", self.project, "in_continuity", today + timedelta(days=10)),
+            ("Lapsed", self.project, "out_of_continuity", today - timedelta(days=5)),
+            ("Current", self.project, "in_continuity", today + timedelta(days=120)),
+            ("Elsewhere", other, "in_continuity", today + timedelta(days=3)),
+        ]
+        for name, project, state, due in rows:
+            welder = wpq_models.Welder.objects.create(name=name)
+            wpq_models.WelderContinuity.objects.create(
+                welder=welder,
+                status=state,
+                continuity_due_date=due,
+                last_activity_date=due - timedelta(days=180),
+            )
+            # Two closes on the same project must not duplicate the welder.
+            record_activity(project.id, [welder.id], today - timedelta(days=1))
+            record_activity(project.id, [welder.id], today)
+
+        with self.assertNumQueries(1):
+            resp = self.client.get(f"/api/reports/expiry?project_id={self.project.id}")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([item["name"] for item in resp.data["expiring_30_days"]], ["Expiring"])
+        self.assertEqual([item["name"] for item in resp.data["out_of_continuity"]], ["Lapsed"])
+
+    def test_expiry_report_follows_moved_and_deleted_continuity_logs(self):
+        other = project_models.Project.objects.create(
+            name="P2", code="P2", units="metric", status="active", standard_set=["ASME_IX"]
+        )
+        today = timezone.localdate()
+        welds = {}
+        for project in (self.project, other):
+            drawing = weld_models.Drawing.objects.create(
+                project=project, code="DRW-1", revision="A", file_path=""
+            )
+            welds[project.code] = weld_models.Weld.objects.create(project=project, drawing=drawing, number="W1")
+        log_ids = {}
+        for name in ("Kept", "Moved", "Deleted"):
+            welder = wpq_models.Welder.objects.create(name=name)
+            wpq_models.WelderContinuity.objects.create(
+                welder=welder,
+                status="in_continuity",
+                continuity_due_date=today + timedelta(days=10),
+                last_activity_date=today - timedelta(days=170),
+            )
+            resp = self.client.post(
+                "/api/continuity-logs/",
+                {"welder": str(welder.id), "weld": str(welds["P1"].id), "date": str(today), "process": "SMAW"},
+                format="json",
+            )
+            self.assertEqual(resp.status_code, 201)
+            log_ids[name] = resp.data["id"]
+
+        def expiring(project):
+            resp = self.client.get(f"/api/reports/expiry?project_id={project.id}")
+            return sorted(item["name"] for item in resp.data["expiring_30_days"])
+
+        self.assertEqual(expiring(self.project), ["Deleted", "Kept", "Moved"])
+        resp = self.client.patch(
+            f"/api/continuity-logs/{log_ids['Moved']}/", {"weld": str(welds["P2"].id)}, format="json"
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.client.delete(f"/api/continuity-logs/{log_ids['Deleted']}/").status_code, 204)
+
+        self.assertEqual(expiring(self.project), ["Kept"])
+        self.assertEqual(expiring(other), ["Moved"])
+
+
+class ExportCacheTests(ExportTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.drawing = weld_models.Drawing.objects.create(
+            project=self.project, code="DRW-1", revision="A", file_path=""
+        )
+        weld_models.Weld.objects.create(project=self.project, drawing=self.drawing, number="W1")
+
+    def _post(self, params):
+        return self.client.post(
+            "/api/exports/welding-list",
+            {"project_id": str(self.project.id), **params},
+            format="json",
+        )
+
+    def test_identical_request_reuses_ready_export(self):
+        first = self._post({"status": "planned"})
+        self.assertEqual(first.status_code, 202)
+        exports.run_export("report", first.data["export_id"])
+
+        second = self._post({"status": "planned", "drawing_id": ""})
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data["export_id"], first.data["export_id"])
+        self.assertEqual(second.data["status"], "ready")
+        self.assertEqual(models.Report.objects.count(), 1)
+
+    def test_data_change_invalidates_cached_export(self):
+        first = self._post({})
+        exports.run_export("report", first.data["export_id"])
+        weld_models.Weld.objects.create(project=self.project, drawing=self.drawing, number="W2")
+
+        second = self._post({})
+        self.assertEqual(second.status_code, 202)
+        self.assertNotEqual(second.data["export_id"], first.data["export_id"])
+
+    def test_missing_file_is_not_reused(self):
+        first = self._post({})
+        exports.run_export("report", first.data["export_id"])
+        report = models.Report.objects.get(id=first.data["export_id"])
+        (Path(self.media_dir.name) / report.file_path).unlink()
+
+        second = self._post({})
+        self.assertEqual(second.status_code, 202)
+        report.refresh_from_db()
+        self.assertEqual(report.status, "expired")
+
+    def test_evict_cache_expires_least_recently_used(self):
+        reports = []
+        for params in [{"status": "planned"}, {"status": "closed"}]:
+            report, _ = exports.queue_report(self.project.id, "welding_list", params)
+            exports.run_export("report", report.id)
+            report.refresh_from_db()
+            reports.append(report)
+        old, recent = reports
+        exports.touch_export(recent)
+
+        self.assertEqual(exports.evict_cache(max_bytes=recent.file_size), 1)
+        old.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual(old.status, "expired")
+        self.assertIsNone(old.file_path)
+        self.assertEqual(recent.status, "ready")
+        self.assertTrue((Path(self.media_dir.name) / recent.file_path).exists())
+
+
+class ExportRendererTests(TestCase):
+    def test_startup_does_not_import_export_backends(self):
+        for scenario in importtime.SCENARIOS:
+            with self.subTest(scenario=scenario):
+                modules = importtime.profile_imports(scenario)
+                self.assertIn("apps.reports.api", modules)
+                self.assertEqual(importtime.heavy_imports(modules), [])
+
+    @override_settings(EXPORT_RENDERERS={"xlsx": "apps.reports.tests.fake_renderer"})
+    def test_renderer_can_be_replaced_from_settings(self):
+        self.assertIs(renderers.get_renderer("xlsx"), fake_renderer)
+        with self.assertRaises(ValueError):
+            renderers.get_renderer("missing")
+
+
+def fake_renderer(*args, **kwargs):
+    return None
+
+
+def broken_renderer(path, *args, **kwargs):
+    Path(path).write_text("number,status\n")
+    raise RuntimeError("renderer crashed")
+
+
+class ExportDownloadTests(ExportTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.report = models.Report.objects.create(
+            project=self.project,
+            type="welding_list",
+            status="ready",
+            progress=100,
+            file_path="welding_list_test.csv",
+        )
+        self.content = b"".join(f"W{index},planned\n".encode() for index in range(1000))
+        (Path(self.media_dir.name) / self.report.file_path).write_bytes(self.content)
+        self.url = f"/api/exports/{self.report.id}/download"
+
+    def test_full_download_streams_with_validators(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        self.assertEqual(b"".join(resp.streaming_content), self.content)
+        self.assertEqual(resp["Accept-Ranges"], "bytes")
+        self.assertIn("ETag", resp)
+        self.assertIn("Last-Modified", resp)
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get(self.url)["ETag"]
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+    def test_range_request_returns_partial_content(self):
+        resp = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp["Content-Range"], f"bytes 10-19/{len(self.content)}")
+        self.assertEqual(resp["Content-Length"], "10")
+        self.assertEqual(b"".join(resp.streaming_content), self.content[10:20])
+
+        resp = self.client.get(self.url, HTTP_RANGE="bytes=-5")
+        self.assertEqual(b"".join(resp.streaming_content), self.content[-5:])
+
+    def test_stale_if_range_sends_full_file(self):
+        resp = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(b"".join(resp.streaming_content), self.content)
+
+    def test_unsatisfiable_range_returns_416(self):
+        resp = self.client.get(self.url, HTTP_RANGE=f"bytes={len(self.content)}-")
+        self.assertEqual(resp.status_code, 416)
+        self.assertEqual(resp["Content-Range"], f"bytes */{len(self.content)}")
+
+    @override_settings(EXPORT_DOWNLOAD_ACCEL="nginx", EXPORT_DOWNLOAD_ACCEL_PREFIX="/protected-media/")
+    def test_accel_redirect_mode_delegates_to_proxy(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["X-Accel-Redirect"], "/protected-media/welding_list_test.csv")
+        self.assertEqual(resp.content, b"")
+
+    def test_queued_export_is_not_downloadable(self):
+        self.report.status = "running"
+        self.report.save(update_fields=["status"])
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 404)
@@ -0,0 +1,23 @@
+import csv
+import gzip
+import json
+
+
+def write_csv(path, title, headers, rows, progress=None, total=0):
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(headers)
+        for index, row in enumerate(rows, start=1):
+            writer.writerow(row)
+            if progress:
+                progress.update(index, total)
+
+
+def write_ndjson_gz(path, title, headers, rows, progress=None, total=0):
+    # One JSON object per line keyed by header; gzip keeps nightly pulls small.
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as handle:
+        for index, row in enumerate(rows, start=1):
+            handle.write(json.dumps(dict(zip(headers, row)), default=str, separators=(",", ":")))
+            handle.write("\n")
+            if progress:
+                progress.update(index, total)
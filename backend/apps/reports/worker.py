@@ -0,0 +1,91 @@
+"""Export queue worker.
+
+Kept free of model imports at module level so the process pool can import it
+under the ``spawn`` start method before Django is configured.
+"""
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+def init_process():
+    django.setup()
+    connections.close_all()
+
+
+def process_export(kind, export_id):
+    from . import exports
+
+    try:
+        return exports.run_export(kind, export_id)
+    finally:
+        connections.close_all()
+
+
+def run_worker(processes=2, poll_interval=2.0, once=False, stale_after=3600):
+    """Run queued exports; returns how many finished ready (failed ones are not counted)."""
+    from . import exports
+
+    requeued = exports.requeue_stale(stale_after)
+    if requeued:
+        logger.warning("Requeued %s stale export(s)", requeued)
+    if processes <= 0:
+        return _run_inline(exports, poll_interval, once)
+
+    processed = 0
+    # Forked children must not inherit the parent's open DB sockets.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=processes, initializer=init_process) as pool:
+        pending = {}
+        while True:
+            free = processes - len(pending)
+            if free > 0:
+                in_flight = [export_id for _kind, export_id in pending.values()]
+                for kind, export_id in exports.next_queued(free, exclude=in_flight):
+                    future = pool.submit(process_export, kind, export_id)
+                    pending[future] = (kind, export_id)
+            if not pending:
+                if once:
+                    break
+                time.sleep(poll_interval)
+                continue
+            done, _ = wait(list(pending), timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, export_id = pending.pop(future)
+                try:
+                    if future.result() == "ready":
+                        processed += 1
+                except Exception:
+                    logger.exception("Export worker crashed on %s %s", kind, export_id)
+            if done:
+                _evict(exports)
+    return processed
+
+
+def _run_inline(exports, poll_interval, once):
+    processed = 0
+    while True:
+        jobs = exports.next_queued(1)
+        if not jobs:
+            if once:
+                return processed
+            time.sleep(poll_interval)
+            continue
+        kind, export_id = jobs[0]
+        result = exports.run_export(kind, export_id)
+        if result == "ready":
+            processed += 1
+        if result:
+            _evict(exports)
+
+
+def _evict(exports):
+    evicted = exports.evict_cache()
+    if evicted:
+        logger.info("Expired %s cached export file(s)", evicted)
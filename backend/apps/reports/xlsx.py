@@ -0,0 +1,21 @@
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+
+def write_xlsx(path, title, headers, rows, progress=None, total=0):
+    # write_only streams rows to disk as they are appended, so memory stays flat
+    # regardless of the number of rows.
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = Font(bold=True)
+        header_cells.append(cell)
+    ws.append(header_cells)
+    for index, row in enumerate(rows, start=1):
+        ws.append(row)
+        if progress:
+            progress.update(index, total)
+    wb.save(path)
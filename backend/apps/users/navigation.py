@@ -0,0 +1,45 @@
+from django.conf import settings
+
+from .caching import MISSING, TTLCache
+
+
+NAV = (
+    {"label": "Proyectos", "url": "/ui/projects/", "roles": ("Admin", "Project Manager", "PM")},
+    {"label": "Welding Book", "url": "/ui/documents/", "roles": ("Admin", "QA", "Document Control")},
+    {"label": "WPS", "url": "/ui/wps/", "roles": ("Admin", "Welding", "QA")},
+    {"label": "PQR", "url": "/ui/pqr/", "roles": ("Admin", "Welding", "QA")},
+    {"label": "WPQ / Soldadores", "url": "/ui/wpq/", "roles": ("Admin", "Welding", "QA")},
+    {"label": "Welds / Maps", "url": "/ui/welds/maps/", "roles": ("Admin", "Welding", "Production")},
+    {"label": "Calidad (END)", "url": "/ui/quality/nde-requests/", "roles": ("Admin", "QA", "QC")},
+    {"label": "PWHT", "url": "/ui/quality/pwht/", "roles": ("Admin", "QA", "QC")},
+    {"label": "Presion", "url": "/ui/quality/pressure-tests/", "roles": ("Admin", "QA", "QC")},
+    {"label": "Reportes", "url": "/ui/reports/exports/", "roles": ("Admin", "QA", "PM")},
+)
+
+# (auth user id, is_staff, is_superuser, is_active) -> visible NAV items. The flags
+# are part of the key because they are read from the already loaded user.
+nav_cache = TTLCache(settings.NAV_CACHE_TTL_SECONDS, settings.NAV_CACHE_MAX_ENTRIES)
+
+
+def load_nav(user):
+    if user.is_superuser:
+        return NAV
+    is_admin = user.is_staff
+    if user.get_all_permissions():
+        return NAV
+    groups = set(user.groups.values_list("name", flat=True))
+    return tuple(
+        item for item in NAV
+        if not item["roles"] or groups.intersection(item["roles"]) or is_admin
+    )
+
+
+def visible_nav(user):
+    if not user or not user.is_authenticated:
+        return ()
+    key = (user.pk, user.is_staff, user.is_superuser, user.is_active)
+    visible = nav_cache.get(key)
+    if visible is MISSING:
+        visible = load_nav(user)
+        nav_cache.set(key, visible)
+    return visible
@@ -1,6 +1,38 @@
+from django.conf import settings
 from rest_framework import permissions
 
 from . import models
+from .caching import MISSING, TTLCache
+
+
+# email -> (app user id, frozenset of role names), or None for unknown emails.
+role_cache = TTLCache(settings.ROLE_CACHE_TTL_SECONDS, settings.ROLE_CACHE_MAX_ENTRIES)
+
+
+def load_roles(email):
+    app_user_id = models.User.objects.filter(email=email).values_list("id", flat=True).first()
+    if app_user_id is None:
+        return None
+    roles = models.UserRole.objects.filter(user_id=app_user_id).values_list("role__name", flat=True)
+    return app_user_id, frozenset(roles)
+
+
+def cached_roles(email):
+    resolved = role_cache.get(email)
+    if resolved is MISSING:
+        resolved = load_roles(email)
+        role_cache.set(email, resolved)
+    return resolved
+
+
+def resolve_roles(request):
+    # Memoized on the underlying HttpRequest so repeated checks in one request are free.
+    http_request = getattr(request, "_request", request)
+    resolved = getattr(http_request, "_resolved_roles", MISSING)
+    if resolved is MISSING:
+        resolved = cached_roles(request.user.email)
+        http_request._resolved_roles = resolved
+    return resolved
 
 
 class RolePermission(permissions.BasePermission):
@@ -12,13 +44,10 @@ class RolePermission(permissions.BasePermission):
             return False
         if request.user.is_superuser:
             return True
-        try:
-            app_user = models.User.objects.get(email=request.user.email)
-        except models.User.DoesNotExist:
+        resolved = resolve_roles(request)
+        if resolved is None:
             return False
-        roles = models.UserRole.objects.filter(user=app_user).values_list(
-            "role__name", flat=True
-        )
+        _app_user_id, roles = resolved
         if request.method in permissions.SAFE_METHODS:
             allowed = getattr(view, "read_roles", self.read_roles)
         else:
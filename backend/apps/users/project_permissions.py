@@ -1,7 +1,7 @@
 from rest_framework import permissions
 
-from apps.projects import models as project_models
-from .permissions import RolePermission
+from apps.projects import membership
+from .permissions import RolePermission, resolve_roles
 
 
 class ProjectScopedPermission(RolePermission):
@@ -17,6 +17,29 @@ class ProjectScopedPermission(RolePermission):
             project_id = request.data.get("project_id") or project_id
         if not project_id:
             return True
-        return project_models.ProjectUser.objects.filter(
-            project_id=project_id, user__email=request.user.email
-        ).exists()
+        return membership.is_member(request.user, project_id, request)
+
+
+class ProjectScopedQuerysetMixin:
+    """Limits the viewset's rows to the caller's projects via ``project_lookup``.
+
+    Superusers and ``unscoped_roles`` (Admin) keep seeing every project. For
+    everyone else the filter applies to lists and to object lookups alike, so a
+    row hidden from the list is also a 404 by id.
+    """
+
+    project_lookup = None
+    unscoped_roles = ("Admin",)
+
+    def sees_all_projects(self):
+        user = self.request.user
+        if user.is_superuser:
+            return True
+        resolved = resolve_roles(self.request)
+        return resolved is not None and any(role in self.unscoped_roles for role in resolved[1])
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.project_lookup and not self.sees_all_projects():
+            qs = membership.filter_for_user(qs, self.request.user, self.project_lookup, self.request)
+        return qs
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from . import models
+from .navigation import nav_cache
+from .permissions import role_cache
+
+
+def _clear_role_cache(sender, **kwargs):
+    role_cache.clear()
+
+
+def _clear_nav_cache(sender, **kwargs):
+    nav_cache.clear()
+
+
+def connect():
+    for model in (models.User, models.Role, models.UserRole):
+        uid = f"role_cache_{model._meta.model_name}"
+        post_save.connect(_clear_role_cache, sender=model, dispatch_uid=f"{uid}_save")
+        post_delete.connect(_clear_role_cache, sender=model, dispatch_uid=f"{uid}_delete")
+
+    AuthUser = get_user_model()
+    for through in (AuthUser.groups.through, AuthUser.user_permissions.through, Group.permissions.through):
+        m2m_changed.connect(_clear_nav_cache, sender=through, dispatch_uid=f"nav_cache_{through.__name__}")
+    post_save.connect(_clear_nav_cache, sender=Group, dispatch_uid="nav_cache_group_save")
+    post_delete.connect(_clear_nav_cache, sender=Group, dispatch_uid="nav_cache_group_delete")
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import RequestFactory, TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from config.context_processors import nav_sections
+from . import models
+from .navigation import nav_cache
+from .permissions import RolePermission, role_cache
+
+
+class RoleCacheTests(TestCase):
+    def setUp(self):
+        role_cache.clear()
+        self.addCleanup(role_cache.clear)
+        self.app_user = models.User.objects.create(
+            name="inspector", email="inspector@example.local", status="active"
+        )
+        self.role, _ = models.Role.objects.get_or_create(name="Inspector", defaults={"scope": "global"})
+        self.user_role = models.UserRole.objects.create(user=self.app_user, role=self.role)
+        self.auth_user, _ = get_user_model().objects.get_or_create(
+            username="inspector", defaults={"email": self.app_user.email}
+        )
+        self.permission = RolePermission()
+
+    def _request(self, method="get"):
+        wsgi_request = getattr(APIRequestFactory(), method)("/api/welds/")
+        force_authenticate(wsgi_request, user=self.auth_user)
+        return Request(wsgi_request)
+
+    def test_roles_are_resolved_once_per_request_and_cached_across_requests(self):
+        request = self._request()
+        with self.assertNumQueries(2):
+            self.assertTrue(self.permission.has_permission(request, None))
+            self.assertTrue(self.permission.has_permission(request, None))
+        with self.assertNumQueries(0):
+            self.assertTrue(self.permission.has_permission(self._request(), None))
+            self.assertFalse(self.permission.has_permission(self._request("post"), None))
+
+    def test_user_role_writes_invalidate_cache(self):
+        self.assertTrue(self.permission.has_permission(self._request(), None))
+        self.user_role.delete()
+        self.assertFalse(self.permission.has_permission(self._request(), None))
+
+        supervisor, _ = models.Role.objects.get_or_create(name="Supervisor")
+        models.UserRole.objects.create(user=self.app_user, role=supervisor)
+        self.assertTrue(self.permission.has_permission(self._request("post"), None))
+
+    def test_unknown_email_is_denied_and_cached(self):
+        self.auth_user.email = "nobody@example.local"
+        self.assertFalse(self.permission.has_permission(self._request(), None))
+        with self.assertNumQueries(0):
+            self.assertFalse(self.permission.has_permission(self._request(), None))
+        models.User.objects.create(name="nobody", email="nobody@example.local")
+        self.assertEqual(len(role_cache), 0)
+
+
+class NavSectionsTests(TestCase):
+    def setUp(self):
+        nav_cache.clear()
+        self.addCleanup(nav_cache.clear)
+        self.auth_user = get_user_model().objects.create_user(username="qa-user", password="12345")
+        self.auth_user.groups.add(Group.objects.create(name="QA"))
+
+    def _request(self):
+        # A freshly loaded user, as on each page view, so nothing is cached on the instance.
+        request = RequestFactory().get("/ui/projects/")
+        request.user = get_user_model().objects.get(pk=self.auth_user.pk)
+        return request
+
+    def _labels(self, request=None):
+        context = nav_sections(request or self._request())
+        return [item["label"] for item in context["nav_sections"]]
+
+    def test_warm_pages_add_no_queries(self):
+        labels = self._labels()
+        self.assertIn("WPS", labels)
+        self.assertNotIn("Proyectos", labels)
+        request = self._request()
+        with self.assertNumQueries(0):
+            self.assertEqual(self._labels(request), labels)
+
+    def test_group_change_invalidates_nav(self):
+        self._labels()
+        self.auth_user.groups.add(Group.objects.create(name="PM"))
+        self.assertIn("Proyectos", self._labels())
@@ -1,15 +1,16 @@
 from rest_framework import permissions, viewsets
 from . import models
 from . import serializers
+from .permissions import resolve_roles
 
 
 class IsAdminRole(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        return models.UserRole.objects.filter(
-            user_id=request.user.id, role__name="Admin"
-        ).exists()
+        # Auth users map to app users by email, like RolePermission.
+        resolved = resolve_roles(request)
+        return bool(resolved) and "Admin" in resolved[1]
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = models.User.objects.all()
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class WeldsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.welds'
+
+    def ready(self):
+        from . import signals
+
+        signals.connect()
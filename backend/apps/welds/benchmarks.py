@@ -0,0 +1,112 @@
+"""WeldMark geometry storage benchmarks.
+
+Not collected by the default test run; use ``manage.py test --benchmarks`` or
+``manage.py test apps.welds.benchmarks``.
+"""
+import json
+import logging
+import random
+import time
+
+from django.db.models import Sum, TextField
+from django.db.models.functions import Cast, Coalesce, Length
+from django.test import TestCase, override_settings
+
+from apps.projects import models as project_models
+from . import models
+from .geometry import decode_many, encode
+
+
+# Shown by ``manage.py test --benchmarks`` (see config/test_runner.py).
+logger = logging.getLogger(__name__)
+
+
+def _sample_geometries(count, seed=7):
+    rng = random.Random(seed)
+    geometries = []
+    for index in range(count):
+        kind = index % 3
+        if kind == 0:
+            # Editor marks: rounded pixels.
+            geometries.append({"type": "circle", "cx": rng.randint(0, 4000), "cy": rng.randint(0, 3000), "r": rng.randint(6, 40)})
+        elif kind == 1:
+            geometries.append({
+                "type": "bbox",
+                "x": rng.randint(0, 4000) + 0.5,
+                "y": rng.randint(0, 3000) + 0.25,
+                "w": rng.randint(5, 60),
+                "h": rng.randint(5, 60),
+                "page": rng.randint(1, 12),
+            })
+        else:
+            geometries.append({
+                "type": "poly",
+                "points": [{"x": round(rng.uniform(0, 4000), 2), "y": round(rng.uniform(0, 3000), 2)} for _ in range(6)],
+            })
+    return geometries
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+class GeometryEncodingBenchmark(TestCase):
+    mark_count = 100_000
+    # Packed rows must at least halve the geometry payload.
+    max_size_ratio = 0.5
+
+    def test_packed_geometry_size_and_speed(self):
+        geometries = _sample_geometries(self.mark_count)
+        json_rows, json_encode_s = _timed(lambda: [json.dumps(g) for g in geometries])
+        _json_decoded, json_decode_s = _timed(lambda: [json.loads(row) for row in json_rows])
+        packed_rows, packed_encode_s = _timed(lambda: [encode(g) for g in geometries])
+        decoded, packed_decode_s = _timed(decode_many, packed_rows)
+
+        self.assertEqual(decoded, geometries)
+        json_bytes = sum(len(row.encode()) for row in json_rows)
+        packed_bytes = sum(len(row) for row in packed_rows)
+        logger.info(
+            "geometry %s marks: json %.1f B/row (encode %.2fs, decode %.2fs), "
+            "packed %.1f B/row (encode %.2fs, decode %.2fs)",
+            self.mark_count, json_bytes / self.mark_count, json_encode_s, json_decode_s,
+            packed_bytes / self.mark_count, packed_encode_s, packed_decode_s,
+        )
+        self.assertLess(packed_bytes, json_bytes * self.max_size_ratio)
+
+    def test_packed_rows_load_through_the_model(self):
+        project = project_models.Project.objects.create(
+            name="Bench", code="BENCH", units="metric", status="active", standard_set=["ASME_IX"]
+        )
+        drawing = models.Drawing.objects.create(project=project, code="DRW", revision="A", file_path="")
+        weld_map = models.WeldMap.objects.create(project=project, drawing=drawing)
+        welds = models.Weld.objects.bulk_create(
+            models.Weld(project=project, drawing=drawing, number=f"W{index:06d}") for index in range(1000)
+        )
+        geometries = _sample_geometries(self.mark_count)
+        timings = {}
+        for compact in (False, True):
+            models.WeldMark.objects.all().delete()
+            with override_settings(WELD_MARK_COMPACT_GEOMETRY=compact):
+                for start in range(0, self.mark_count, 5000):
+                    batch = []
+                    for index in range(start, min(start + 5000, self.mark_count)):
+                        mark = models.WeldMark(weld_map=weld_map, weld=welds[index % len(welds)], geometry=geometries[index])
+                        mark.update_derived()
+                        batch.append(mark)
+                    models.WeldMark.objects.bulk_create(batch)
+            stored_bytes = models.WeldMark.objects.aggregate(
+                size=Sum(
+                    Coalesce(Length(Cast("geometry", TextField())), 0) + Coalesce(Length("geometry_packed"), 0)
+                )
+            )["size"]
+            loaded, elapsed = _timed(lambda: [mark.geometry for mark in models.WeldMark.objects.iterator(chunk_size=5000)])
+            self.assertEqual(len(loaded), self.mark_count)
+            timings[compact] = (stored_bytes, elapsed)
+        logger.info(
+            "WeldMark geometry columns: json %.1f B/row loaded in %.2fs, packed %.1f B/row loaded in %.2fs",
+            timings[False][0] / self.mark_count, timings[False][1],
+            timings[True][0] / self.mark_count, timings[True][1],
+        )
+        self.assertLess(timings[True][0], timings[False][0] * self.max_size_ratio)
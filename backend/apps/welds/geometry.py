@@ -0,0 +1,188 @@
+"""Geometry helpers for WeldMark (formats in GEOMETRY_FORMAT.md).
+
+``bounds`` gives the axis-aligned box that WeldMark keeps in its min/max columns
+so viewport queries run on an index instead of reading every geometry, and
+``contains`` refines a box hit to the exact shape.
+
+``encode`` / ``decode`` are the compact form of a geometry stored in
+``WeldMark.geometry_packed``: a 5-byte header (version, kind, flags, page) and the
+coordinates as int16 when they are all small integers, float32 when that is
+exact and float64 otherwise. Only geometries that survive the round trip
+exactly are packed (``encode`` returns None for anything else, e.g. extra keys),
+so ``decode(encode(g)) == g``; integral values come back as ints.
+"""
+import struct
+import sys
+from array import array
+
+
+def _coord(value):
+    if isinstance(value, bool):
+        raise TypeError("bool is not a coordinate")
+    return float(value)
+
+
+def page_of(geometry):
+    """Drawing sheet of the mark, 1 when the geometry does not say."""
+    page = geometry.get("page") if isinstance(geometry, dict) else None
+    if isinstance(page, int) and not isinstance(page, bool) and page >= 1:
+        return page
+    return 1
+
+
+def bounds(geometry):
+    """Return ``(min_x, min_y, max_x, max_y)`` or None for an unknown or broken geometry."""
+    if not isinstance(geometry, dict):
+        return None
+    kind = geometry.get("type")
+    try:
+        if kind == "bbox":
+            x, y = _coord(geometry["x"]), _coord(geometry["y"])
+            return x, y, x + _coord(geometry["w"]), y + _coord(geometry["h"])
+        if kind == "poly":
+            xs = [_coord(point["x"]) for point in geometry["points"]]
+            ys = [_coord(point["y"]) for point in geometry["points"]]
+            return (min(xs), min(ys), max(xs), max(ys)) if xs else None
+        if kind == "circle":
+            # Drawn by the weld map editor.
+            cx, cy, r = _coord(geometry["cx"]), _coord(geometry["cy"]), abs(_coord(geometry.get("r", 0)))
+            return cx - r, cy - r, cx + r, cy + r
+    except (KeyError, TypeError, ValueError):
+        return None
+    return None
+
+
+def _in_polygon(points, x, y):
+    inside = False
+    count = len(points)
+    for index in range(count):
+        x1, y1 = points[index]
+        x2, y2 = points[index - 1]
+        if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+            inside = not inside
+    return inside
+
+
+def contains(geometry, x, y):
+    """Whether the point ``(x, y)`` falls inside the mark's shape."""
+    box = bounds(geometry)
+    if box is None or not (box[0] <= x <= box[2] and box[1] <= y <= box[3]):
+        return False
+    kind = geometry["type"]
+    if kind == "circle":
+        r = abs(float(geometry.get("r", 0)))
+        return (x - float(geometry["cx"])) ** 2 + (y - float(geometry["cy"])) ** 2 <= r * r
+    if kind == "poly":
+        points = [(float(point["x"]), float(point["y"])) for point in geometry["points"]]
+        return _in_polygon(points, x, y)
+    return True
+
+
+def area(geometry):
+    box = bounds(geometry)
+    return (box[2] - box[0]) * (box[3] - box[1]) if box else 0.0
+
+
+PACK_VERSION = 1
+HEADER = struct.Struct("<BBBH")
+COUNT = struct.Struct("<H")
+INT16 = 1
+FLOAT32 = 2
+FLOAT64 = 3
+TYPECODES = {INT16: "h", FLOAT32: "f", FLOAT64: "d"}
+# kind code -> (type, coordinate keys); poly stores a point count and x, y pairs.
+KINDS = {1: ("bbox", ("x", "y", "w", "h")), 2: ("poly", None), 3: ("circle", ("cx", "cy", "r"))}
+KIND_CODES = {name: code for code, (name, _keys) in KINDS.items()}
+MAX_PAGE = 0xFFFF
+# Coordinates are stored little-endian like the header.
+BIG_ENDIAN = sys.byteorder == "big"
+
+
+def _packable_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _values(geometry):
+    kind = geometry.get("type")
+    code = KIND_CODES.get(kind)
+    if code is None:
+        return None, None
+    extra = {"type", "page"}
+    keys = KINDS[code][1]
+    if keys is None:
+        points = geometry.get("points")
+        if not isinstance(points, list) or len(points) > 0xFFFF:
+            return None, None
+        values = []
+        for point in points:
+            if not isinstance(point, dict) or set(point) != {"x", "y"}:
+                return None, None
+            values += [point["x"], point["y"]]
+        extra.add("points")
+    else:
+        if not all(key in geometry for key in keys):
+            return None, None
+        values = [geometry[key] for key in keys]
+        extra.update(keys)
+    if set(geometry) - extra or not all(_packable_number(value) for value in values):
+        return None, None
+    return code, values
+
+
+def encode(geometry):
+    """Return the packed form of ``geometry`` or None when it cannot be packed losslessly."""
+    if not isinstance(geometry, dict):
+        return None
+    code, values = _values(geometry)
+    if code is None:
+        return None
+    page = geometry.get("page", 0)
+    if "page" in geometry and (not isinstance(page, int) or isinstance(page, bool) or not 1 <= page <= MAX_PAGE):
+        return None
+    if all(isinstance(value, int) and -0x8000 <= value <= 0x7FFF for value in values):
+        flags, packed = INT16, array("h", values)
+    else:
+        flags, packed = FLOAT32, array("f", values)
+        if any(stored != value for stored, value in zip(packed, values)):
+            flags, packed = FLOAT64, array("d", values)
+            if any(stored != value for stored, value in zip(packed, values)):
+                # NaN, or an int too large for a double.
+                return None
+    if BIG_ENDIAN:
+        packed.byteswap()
+    body = packed.tobytes()
+    count = COUNT.pack(len(values) // 2) if KINDS[code][1] is None else b""
+    return HEADER.pack(PACK_VERSION, code, flags, page) + count + body
+
+
+def decode(blob):
+    """Rebuild the JSON geometry from ``encode``'s output."""
+    blob = bytes(blob)
+    version, code, flags, page = HEADER.unpack_from(blob)
+    if version != PACK_VERSION or code not in KINDS:
+        raise ValueError(f"Unknown packed geometry (version {version}, kind {code}).")
+    offset = HEADER.size
+    kind, keys = KINDS[code]
+    if keys is None:
+        offset += COUNT.size
+    if flags not in TYPECODES:
+        raise ValueError(f"Unknown packed geometry flags {flags}.")
+    values = array(TYPECODES[flags])
+    values.frombytes(blob[offset:])
+    if BIG_ENDIAN:
+        values.byteswap()
+    if flags != INT16:
+        values = [int(value) if value.is_integer() else value for value in values]
+    geometry = {"type": kind}
+    if keys is None:
+        geometry["points"] = [{"x": values[index], "y": values[index + 1]} for index in range(0, len(values), 2)]
+    else:
+        geometry.update(zip(keys, values))
+    if page:
+        geometry["page"] = page
+    return geometry
+
+
+def decode_many(blobs):
+    """Decode a sequence of packed geometries (None entries stay None)."""
+    return [None if blob is None else decode(blob) for blob in blobs]
@@ -0,0 +1,222 @@
+"""Bulk ingestion of weld marks for ``POST /api/weld-maps/{id}/marks/``.
+
+Every mark is validated up front (geometry per GEOMETRY_FORMAT.md), the weld
+numbers of the batch are resolved with one query and the missing Welds, the
+WeldMarks and the WeldAttributes are written with one ``bulk_create`` each, so
+a batch costs the same number of queries whether it has 2 marks or 2000.
+``bulk_create`` skips post_save, so the DataVersion counters and the weld stats
+that the signals would maintain are updated here.
+"""
+import math
+from numbers import Real
+
+from django.db import IntegrityError, transaction
+
+from apps.projects import models as project_models
+from apps.projects import numbering
+from apps.projects.versioning import bump_version
+from . import models
+from .stats import apply_changes
+
+
+MAX_MARKS = 5000
+NUMBER_MAX_LENGTH = models.Weld._meta.get_field("number").max_length
+NEW_WELD_STATUS = "planned"
+WELD_NUMBERING_TYPE = "WELD"
+# NumberingRule.type is "WELD:<prefix>" for editor prefixes.
+MAX_PREFIX_LENGTH = (
+    project_models.NumberingRule._meta.get_field("type").max_length - len(WELD_NUMBERING_TYPE) - 1
+)
+
+
+class MarkError(ValueError):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _number(value, name, strict=False):
+    if isinstance(value, bool) or not isinstance(value, Real) or not math.isfinite(value):
+        raise MarkError("invalid_geometry", f"{name} debe ser numerico.")
+    if value < 0 or (strict and value == 0):
+        raise MarkError("invalid_geometry", f"{name} fuera de rango.")
+    return value
+
+
+def validate_geometry(geometry):
+    """Raise MarkError unless ``geometry`` is a bbox or poly as in GEOMETRY_FORMAT.md."""
+    if not isinstance(geometry, dict):
+        raise MarkError("invalid_geometry", "geometry debe ser un objeto.")
+    page = geometry.get("page", 1)
+    if isinstance(page, bool) or not isinstance(page, int) or page < 1:
+        raise MarkError("invalid_geometry", "page debe ser un entero mayor que 0.")
+    kind = geometry.get("type")
+    if kind == "bbox":
+        _number(geometry.get("x"), "x")
+        _number(geometry.get("y"), "y")
+        _number(geometry.get("w"), "w", strict=True)
+        _number(geometry.get("h"), "h", strict=True)
+        return
+    if kind == "poly":
+        points = geometry.get("points")
+        if not isinstance(points, list) or len(points) < 3:
+            raise MarkError("invalid_geometry", "poly requiere al menos 3 puntos.")
+        for point in points:
+            if not isinstance(point, dict):
+                raise MarkError("invalid_geometry", "Cada punto debe tener x e y.")
+            _number(point.get("x"), "x")
+            _number(point.get("y"), "y")
+        return
+    raise MarkError("invalid_geometry", "type debe ser bbox o poly.")
+
+
+def _attributes(value):
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise MarkError("invalid_attributes", "attributes debe ser una lista.")
+    attributes = []
+    for attr in value:
+        if not isinstance(attr, dict):
+            raise MarkError("invalid_attributes", "Cada atributo debe tener name y value.")
+        name = attr.get("name")
+        value = attr.get("value")
+        # Same rule as before bulk ingestion: incomplete attributes are ignored.
+        if name and value is not None:
+            attributes.append((str(name), str(value)))
+    return attributes
+
+
+def parse_mark(mark):
+    """Return ``(number, geometry, attributes)`` or raise MarkError; number may be None."""
+    if not isinstance(mark, dict):
+        raise MarkError("invalid_mark", "Cada marca debe ser un objeto.")
+    number = mark.get("number")
+    geometry = mark.get("geometry")
+    if not geometry:
+        raise MarkError("invalid_mark", "geometry requerido.")
+    if number in (None, ""):
+        # Numbered from the project's WELD rule in ``ingest_marks``.
+        number = None
+    else:
+        number = str(number).strip()
+        if not number or len(number) > NUMBER_MAX_LENGTH:
+            raise MarkError("invalid_number", "number vacio o demasiado largo.")
+    validate_geometry(geometry)
+    return number, geometry, _attributes(mark.get("attributes"))
+
+
+def weld_numbering_rule(prefix=None):
+    """``(rule type, default pattern)`` of the sequence that numbers welds.
+
+    Without a prefix this is the project's WELD rule (``numbering.DEFAULT_PATTERNS``).
+    A prefix typed in the weld map editor gets its own rule, ``WELD:<prefix>``
+    with pattern ``<prefix>{Seq}``, so it is honoured whichever path created the
+    WELD rule first.
+    """
+    if not prefix:
+        return WELD_NUMBERING_TYPE, numbering.DEFAULT_PATTERNS[WELD_NUMBERING_TYPE]
+    if len(prefix) > MAX_PREFIX_LENGTH or "{" in prefix or "}" in prefix:
+        raise MarkError("invalid_prefix", f"El prefijo admite hasta {MAX_PREFIX_LENGTH} caracteres sin llaves.")
+    return f"{WELD_NUMBERING_TYPE}:{prefix}", f"{prefix}{{Seq}}"
+
+
+def reserve_weld_numbers(project, count, prefix=None, exclude=()):
+    """``count`` unused weld numbers from the project's WELD (or ``prefix``) NumberingRule."""
+    rule_type, default_pattern = weld_numbering_rule(prefix)
+    return numbering.reserve_unused(
+        project,
+        rule_type,
+        count,
+        models.Weld.objects.filter(project=project),
+        "number",
+        default_pattern=default_pattern,
+        exclude=exclude,
+    )
+
+
+def _write(weld_map, parsed):
+    project_id = weld_map.project_id
+    numbers = {number for number, _geometry, _attributes in parsed.values()}
+    welds = {
+        weld.number: weld
+        for weld in models.Weld.objects.filter(project_id=project_id, number__in=numbers).only("id", "number")
+    }
+    new_welds = []
+    for number in sorted(numbers - set(welds)):
+        weld = models.Weld(
+            project_id=project_id,
+            drawing_id=weld_map.drawing_id,
+            number=number,
+            status=NEW_WELD_STATUS,
+        )
+        welds[number] = weld
+        new_welds.append(weld)
+    created_numbers = {weld.number for weld in new_welds}
+    marks = {}
+    weld_attributes = []
+    for index, (number, geometry, attributes) in parsed.items():
+        weld = welds[number]
+        marks[index] = models.WeldMark(weld_map=weld_map, weld=weld, geometry=geometry)
+        marks[index].update_derived()
+        weld_attributes += [
+            models.WeldAttribute(weld=weld, name=name, value=value) for name, value in attributes
+        ]
+    with transaction.atomic():
+        if new_welds:
+            models.Weld.objects.bulk_create(new_welds)
+        models.WeldMark.objects.bulk_create(marks.values())
+        if weld_attributes:
+            models.WeldAttribute.objects.bulk_create(weld_attributes)
+        if new_welds:
+            bump_version(project_id, "weld")
+            apply_changes(project_id, [(None, (NEW_WELD_STATUS, None))] * len(new_welds))
+        bump_version(project_id, "weld_mark")
+        if weld_attributes:
+            bump_version(project_id, "weld_attribute")
+    return welds, created_numbers, marks
+
+
+def ingest_marks(weld_map, marks):
+    """Create ``marks`` on ``weld_map`` and return one result dict per input mark.
+
+    Invalid marks are reported with their code and skipped; the valid ones are
+    written in a single transaction.
+    """
+    results = [None] * len(marks)
+    parsed = {}
+    for index, mark in enumerate(marks):
+        try:
+            parsed[index] = parse_mark(mark)
+        except MarkError as exc:
+            number = mark.get("number") if isinstance(mark, dict) else None
+            results[index] = {
+                "index": index,
+                "number": number,
+                "status": "error",
+                "code": exc.code,
+                "message": exc.message,
+            }
+    unnumbered = [index for index, (number, _geometry, _attributes) in parsed.items() if number is None]
+    if unnumbered:
+        explicit = {number for number, _geometry, _attributes in parsed.values() if number}
+        auto_numbers = reserve_weld_numbers(weld_map.project, len(unnumbered), exclude=explicit)
+        for index, number in zip(unnumbered, auto_numbers):
+            parsed[index] = (number, *parsed[index][1:])
+    if parsed:
+        try:
+            welds, created_numbers, weld_marks = _write(weld_map, parsed)
+        except IntegrityError:
+            # A concurrent request created one of the numbers; resolve them again.
+            welds, created_numbers, weld_marks = _write(weld_map, parsed)
+        for index, (number, _geometry, _attributes) in parsed.items():
+            results[index] = {
+                "index": index,
+                "number": number,
+                "status": "created",
+                "mark_id": str(weld_marks[index].id),
+                "weld_id": str(welds[number].id),
+                "weld_created": number in created_numbers,
+            }
+    return results
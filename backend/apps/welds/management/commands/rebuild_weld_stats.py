@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.projects import models as project_models
+from apps.welds.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Recalcula ProjectWeldStats tras cargas masivas (bulk_create / update)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--project", help="Solo este project_id.")
+
+    def handle(self, *args, **options):
+        project_ids = project_models.Project.objects.values_list("id", flat=True)
+        if options["project"]:
+            project_ids = project_ids.filter(id=options["project"])
+        count = 0
+        for project_id in project_ids:
+            rebuild_stats(project_id)
+            count += 1
+        self.stdout.write(f"Proyectos recalculados: {count}")
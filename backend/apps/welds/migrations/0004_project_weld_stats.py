@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:00
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_data_version'),
+        ('welds', '0003_drawing_team'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectWeldStats',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('total', models.IntegerField(default=0)),
+                ('planned', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('repair', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='projects.project')),
+            ],
+            options={
+                'db_table': 'ProjectWeldStats',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectWeldDailyStats',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('closed', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='projects.project')),
+            ],
+            options={
+                'db_table': 'ProjectWeldDailyStats',
+                'constraints': [models.UniqueConstraint(fields=('project', 'day'), name='weld_daily_stats_project_day_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_data_version'),
+        ('welds', '0004_project_weld_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weld',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='weld',
+            index=models.Index(fields=['project', 'updated_at'], name='weld_project_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weldmark',
+            index=models.Index(fields=['created_at'], name='weld_mark_created_idx'),
+        ),
+    ]
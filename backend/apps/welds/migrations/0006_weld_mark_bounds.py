@@ -0,0 +1,59 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+from apps.welds.geometry import bounds, page_of
+
+
+def fill_bounds(apps, schema_editor):
+    WeldMark = apps.get_model("welds", "WeldMark")
+    batch = []
+    for mark in WeldMark.objects.only("id", "geometry").iterator(chunk_size=2000):
+        mark.page = page_of(mark.geometry)
+        mark.min_x, mark.min_y, mark.max_x, mark.max_y = bounds(mark.geometry) or (None,) * 4
+        batch.append(mark)
+        if len(batch) >= 2000:
+            WeldMark.objects.bulk_update(batch, ["page", "min_x", "min_y", "max_x", "max_y"])
+            batch = []
+    if batch:
+        WeldMark.objects.bulk_update(batch, ["page", "min_x", "min_y", "max_x", "max_y"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('welds', '0005_weld_change_tracking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weldmark',
+            name='max_x',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='weldmark',
+            name='max_y',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='weldmark',
+            name='min_x',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='weldmark',
+            name='min_y',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='weldmark',
+            name='page',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddIndex(
+            model_name='weldmark',
+            index=models.Index(fields=['weld_map', 'page', 'min_x', 'max_x', 'min_y', 'max_y'], name='weld_mark_viewport_idx'),
+        ),
+        migrations.RunPython(fill_bounds, migrations.RunPython.noop),
+    ]
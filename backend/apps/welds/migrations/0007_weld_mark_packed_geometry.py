@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:00
+
+import apps.welds.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('welds', '0006_weld_mark_bounds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weldmark',
+            name='geometry_packed',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='weldmark',
+            name='geometry',
+            field=apps.welds.models.GeometryField(blank=True, null=True),
+        ),
+    ]
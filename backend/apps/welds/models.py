@@ -1,6 +1,9 @@
 import uuid
+from django.conf import settings
 from django.db import models
 
+from .geometry import bounds, decode, encode, page_of
+
 
 class Drawing(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -49,26 +52,78 @@ class Weld(models.Model):
     number = models.CharField(max_length=100)
     status = models.CharField(max_length=30, default="planned")
     closed_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "Weld"
         constraints = [
             models.UniqueConstraint(fields=["project", "number"], name="weld_project_number_unique")
         ]
+        indexes = [
+            models.Index(fields=["project", "updated_at"], name="weld_project_updated_idx"),
+        ]
 
     def __str__(self):
         return self.number
 
 
+class GeometryField(models.JSONField):
+    """JSON geometry column, written as NULL when the row carries the packed copy."""
+
+    def pre_save(self, model_instance, add):
+        if getattr(model_instance, "geometry_packed", None) is not None:
+            return None
+        return super().pre_save(model_instance, add)
+
+
 class WeldMark(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     weld_map = models.ForeignKey("welds.WeldMap", on_delete=models.CASCADE)
     weld = models.ForeignKey("welds.Weld", on_delete=models.CASCADE)
-    geometry = models.JSONField()
+    geometry = GeometryField(blank=True, null=True)
+    # apps.welds.geometry.encode(geometry) when WELD_MARK_COMPACT_GEOMETRY is on.
+    geometry_packed = models.BinaryField(blank=True, null=True)
+    # Bounding box of ``geometry``, kept by ``save`` for viewport queries and hit-testing.
+    page = models.PositiveIntegerField(default=1)
+    min_x = models.FloatField(blank=True, null=True)
+    min_y = models.FloatField(blank=True, null=True)
+    max_x = models.FloatField(blank=True, null=True)
+    max_y = models.FloatField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    BOUNDS_FIELDS = ("page", "min_x", "min_y", "max_x", "max_y")
+    DERIVED_FIELDS = BOUNDS_FIELDS + ("geometry_packed",)
+
     class Meta:
         db_table = "WeldMark"
+        indexes = [
+            models.Index(fields=["created_at"], name="weld_mark_created_idx"),
+            models.Index(
+                fields=["weld_map", "page", "min_x", "max_x", "min_y", "max_y"],
+                name="weld_mark_viewport_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        packed = instance.__dict__.get("geometry_packed")
+        if packed is not None and instance.__dict__.get("geometry") is None:
+            instance.geometry = decode(packed)
+        return instance
+
+    def update_derived(self):
+        """Derive page, bounding box and packed copy from ``geometry``; call before a bulk_create."""
+        self.page = page_of(self.geometry)
+        self.min_x, self.min_y, self.max_x, self.max_y = bounds(self.geometry) or (None,) * 4
+        self.geometry_packed = encode(self.geometry) if settings.WELD_MARK_COMPACT_GEOMETRY else None
+
+    def save(self, *args, **kwargs):
+        self.update_derived()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "geometry" in update_fields:
+            kwargs["update_fields"] = {*update_fields, *self.DERIVED_FIELDS}
+        super().save(*args, **kwargs)
 
 
 class WeldWpsAssignment(models.Model):
@@ -169,3 +224,30 @@ class Traveler(models.Model):
 
     class Meta:
         db_table = "Traveler"
+
+
+class ProjectWeldStats(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.OneToOneField("projects.Project", on_delete=models.CASCADE)
+    total = models.IntegerField(default=0)
+    planned = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    repair = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "ProjectWeldStats"
+
+
+class ProjectWeldDailyStats(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey("projects.Project", on_delete=models.CASCADE)
+    day = models.DateField()
+    closed = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "ProjectWeldDailyStats"
+        constraints = [
+            models.UniqueConstraint(fields=["project", "day"], name="weld_daily_stats_project_day_unique")
+        ]
@@ -1,4 +1,7 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
+
+from apps.projects.expansion import Expand, ExpandableFieldsMixin
 from . import models
 
 class DrawingSerializer(serializers.ModelSerializer):
@@ -7,13 +10,46 @@ class DrawingSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class WeldMapSerializer(serializers.ModelSerializer):
+class WeldMapSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "drawing": Expand(DrawingSerializer, "drawing", select=["drawing"], resources=["drawing"]),
+        "marks": Expand(
+            "apps.welds.serializers.WeldMarkDetailSerializer",
+            "weldmark_set",
+            many=True,
+            prefetch=[
+                Prefetch(
+                    "weldmark_set",
+                    queryset=models.WeldMark.objects.select_related("weld").order_by("created_at", "id"),
+                )
+            ],
+            resources=["weld_mark", "weld"],
+        ),
+    }
+
     class Meta:
         model = models.WeldMap
         fields = '__all__'
 
 
-class WeldSerializer(serializers.ModelSerializer):
+class WeldSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "drawing": Expand(DrawingSerializer, "drawing", select=["drawing"], resources=["drawing"]),
+        "attributes": Expand(
+            "apps.welds.serializers.WeldAttributeSerializer",
+            "weldattribute_set",
+            many=True,
+            prefetch=["weldattribute_set"],
+            resources=["weld_attribute"],
+        ),
+        "assignments": Expand(
+            "apps.welds.serializers.WeldAssignmentsSerializer",
+            "*",
+            prefetch=["weldwelderassignment_set", "weldwpsassignment_set"],
+            resources=["weld_assignment"],
+        ),
+    }
+
     class Meta:
         model = models.Weld
         fields = '__all__'
@@ -22,7 +58,14 @@ class WeldSerializer(serializers.ModelSerializer):
 class WeldMarkSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.WeldMark
-        fields = '__all__'
+        # geometry is always the JSON form; the packed copy stays internal.
+        exclude = ("geometry_packed",)
+        read_only_fields = models.WeldMark.BOUNDS_FIELDS
+        extra_kwargs = {"geometry": {"required": True, "allow_null": False}}
+
+
+class WeldMarkDetailSerializer(WeldMarkSerializer):
+    weld = WeldSerializer(read_only=True)
 
 
 class WeldAttributeSerializer(serializers.ModelSerializer):
@@ -67,6 +110,11 @@ class WeldWelderAssignmentSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class WeldAssignmentsSerializer(serializers.Serializer):
+    welders = WeldWelderAssignmentSerializer(source="weldwelderassignment_set", many=True)
+    wps = WeldWpsAssignmentSerializer(source="weldwpsassignment_set", many=True)
+
+
 class WorkPackSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.WorkPack
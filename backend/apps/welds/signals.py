@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_init, post_save
+
+from . import models
+from .stats import apply_change, closed_day, rebuild_stats
+
+
+def _state(instance):
+    return (instance.status, closed_day(instance.closed_at))
+
+
+def _remember_state(sender, instance, **kwargs):
+    # Deferred fields would cost a query each; fall back to a rebuild on save.
+    if all(name in instance.__dict__ for name in ("project_id", "status", "closed_at")):
+        instance._stats_state = (instance.project_id, _state(instance))
+    else:
+        instance._stats_state = None
+
+
+def _update_stats(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else instance._stats_state
+    if not created and previous is None:
+        rebuild_stats(instance.project_id)
+    elif previous and previous[0] != instance.project_id:
+        apply_change(previous[0], previous[1], None, create=False)
+        apply_change(instance.project_id, None, _state(instance))
+    else:
+        apply_change(instance.project_id, previous[1] if previous else None, _state(instance))
+    instance._stats_state = (instance.project_id, _state(instance))
+
+
+def _remove_from_stats(sender, instance, **kwargs):
+    # During a project cascade the counters may already be gone; never recreate them here.
+    apply_change(instance.project_id, _state(instance), None, create=False)
+
+
+def connect():
+    post_init.connect(_remember_state, sender=models.Weld, dispatch_uid="weld_stats_init")
+    post_save.connect(_update_stats, sender=models.Weld, dispatch_uid="weld_stats_save")
+    post_delete.connect(_remove_from_stats, sender=models.Weld, dispatch_uid="weld_stats_delete")
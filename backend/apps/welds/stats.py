@@ -0,0 +1,101 @@
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.projects import models as project_models
+from . import models
+
+
+TRACKED_STATUSES = ("planned", "in_progress", "completed", "repair")
+
+
+def closed_day(value):
+    if not isinstance(value, datetime):
+        return None
+    if timezone.is_aware(value):
+        return timezone.localdate(value)
+    return value.date()
+
+
+def rebuild_stats(project_id):
+    counts = models.Weld.objects.filter(project_id=project_id).aggregate(
+        total=Count("id"),
+        **{status: Count("id", filter=Q(status=status)) for status in TRACKED_STATUSES},
+    )
+    daily = (
+        models.Weld.objects.filter(project_id=project_id, closed_at__isnull=False)
+        .annotate(day=TruncDate("closed_at"))
+        .values("day")
+        .annotate(closed=Count("id"))
+        .values_list("day", "closed")
+    )
+    with transaction.atomic():
+        stats, _ = models.ProjectWeldStats.objects.update_or_create(
+            project_id=project_id, defaults=counts
+        )
+        models.ProjectWeldDailyStats.objects.filter(project_id=project_id).delete()
+        models.ProjectWeldDailyStats.objects.bulk_create(
+            models.ProjectWeldDailyStats(project_id=project_id, day=day, closed=closed)
+            for day, closed in daily
+        )
+    return stats
+
+
+def get_stats(project_id):
+    stats = models.ProjectWeldStats.objects.filter(project_id=project_id).first()
+    if stats:
+        return stats
+    if not project_models.Project.objects.filter(id=project_id).exists():
+        return models.ProjectWeldStats(project_id=project_id)
+    return rebuild_stats(project_id)
+
+
+def _bump_day(project_id, day, delta):
+    rows = models.ProjectWeldDailyStats.objects.filter(project_id=project_id, day=day)
+    if rows.update(closed=F("closed") + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            models.ProjectWeldDailyStats.objects.create(project_id=project_id, day=day, closed=delta)
+    except IntegrityError:
+        rows.update(closed=F("closed") + delta)
+
+
+def apply_change(project_id, before, after, create=True):
+    # before/after are (status, closed day), None when the weld did not exist.
+    apply_changes(project_id, [(before, after)], create=create)
+
+
+def apply_changes(project_id, changes, create=True):
+    """Apply several (before, after) pairs with one counter update, e.g. after a bulk_create."""
+    counters = {}
+    days = {}
+    for before, after in changes:
+        if before == after:
+            continue
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+            status, day = state
+            counters["total"] = counters.get("total", 0) + sign
+            if status in TRACKED_STATUSES:
+                counters[status] = counters.get(status, 0) + sign
+            if day is not None:
+                days[day] = days.get(day, 0) + sign
+    counters = {name: delta for name, delta in counters.items() if delta}
+    if counters:
+        updated = models.ProjectWeldStats.objects.filter(project_id=project_id).update(
+            updated_at=timezone.now(),
+            **{name: F(name) + delta for name, delta in counters.items()},
+        )
+        if not updated:
+            # No counters yet: the aggregate already includes this change.
+            if create:
+                rebuild_stats(project_id)
+            return
+    for day, delta in days.items():
+        if delta:
+            _bump_day(project_id, day, delta)
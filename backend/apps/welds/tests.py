@@ -1,11 +1,22 @@
-from django.test import Client, TestCase
+from unittest import mock
+
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APIClient
 
 from apps.users import models as user_models
 from apps.projects import models as project_models
+from apps.wpq import models as wpq_models
+from apps.wps import models as wps_models
+from config.pagination import KeysetCursorPagination
+from config.query_budgets import QueryBudgetMixin
+from . import geometry as geometry_format
 from . import models
+from . import stats
 
 
 class WeldCloseTests(TestCase):
@@ -33,6 +44,222 @@ class WeldCloseTests(TestCase):
         )
         return auth_user
 
+    def test_weld_list_is_cursor_paginated(self):
+        for index in range(5):
+            models.Weld.objects.create(project=self.project, number=f"W{index}")
+        seen = []
+        url = "/api/welds/?page_size=2"
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertLessEqual(len(resp.data["results"]), 2)
+            seen += [item["id"] for item in resp.data["results"]]
+            url = resp.data["next"]
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(seen, sorted(seen))
+        with mock.patch.object(KeysetCursorPagination, "max_page_size", 3):
+            self.assertEqual(len(self.client.get("/api/welds/?page_size=50").data["results"]), 3)
+
+    def test_weld_list_and_detail_answer_conditional_gets(self):
+        weld = models.Weld.objects.create(project=self.project, number="W1")
+        list_url = f"/api/welds/?project_id={self.project.id}"
+        resp = self.client.get(list_url)
+        etag = resp["ETag"]
+        self.assertIn("Last-Modified", resp)
+        # Roles and memberships are cached: only the DataVersion lookup runs.
+        with self.assertNumQueries(1):
+            resp = self.client.get(list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.content, b"")
+
+        detail_url = f"/api/welds/{weld.id}/"
+        detail_etag = self.client.get(detail_url)["ETag"]
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag).status_code, 304)
+
+        weld.status = "in_progress"
+        weld.save()
+        resp = self.client.get(list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag).status_code, 200)
+
+    def _expandable_welds(self, count, start=0):
+        drawing, _ = models.Drawing.objects.get_or_create(
+            project=self.project, code="DRW-1", revision="A", defaults={"file_path": "", "status": "active"}
+        )
+        weld_map, _ = models.WeldMap.objects.get_or_create(
+            project=self.project, drawing=drawing, defaults={"status": "active"}
+        )
+        welder = wpq_models.Welder.objects.create(name="Welder 1")
+        for index in range(start, start + count):
+            weld = models.Weld.objects.create(project=self.project, drawing=drawing, number=f"W{index}")
+            models.WeldAttribute.objects.create(weld=weld, name="diameter", value="2in")
+            models.WeldWelderAssignment.objects.create(weld=weld, welder=welder)
+            models.WeldMark.objects.create(
+                weld_map=weld_map, weld=weld, geometry={"type": "bbox", "x": 1, "y": 1, "w": 5, "h": 5}
+            )
+        return weld_map
+
+    def test_expand_embeds_relations_in_constant_queries(self):
+        self._expandable_welds(2)
+        url = f"/api/welds/?project_id={self.project.id}&expand=drawing,attributes,assignments"
+        self.client.get(url)
+        with self.assertNumQueries(5) as small:
+            resp = self.client.get(url)
+        item = resp.data["results"][0]
+        self.assertEqual(item["drawing"]["code"], "DRW-1")
+        self.assertEqual(item["attributes"][0]["value"], "2in")
+        self.assertEqual(len(item["assignments"]["welders"]), 1)
+        self._expandable_welds(6, start=2)
+        with self.assertNumQueries(len(small.captured_queries)):
+            self.client.get(url)
+
+    def test_weld_map_loads_drawing_and_marks_in_one_request(self):
+        weld_map = self._expandable_welds(3)
+        resp = self.client.get(f"/api/weld-maps/{weld_map.id}/?expand=drawing,marks")
+        self.assertEqual(resp.data["drawing"]["code"], "DRW-1")
+        self.assertEqual([mark["weld"]["number"] for mark in resp.data["marks"]], ["W0", "W1", "W2"])
+
+    def _post_marks(self, weld_map, start, count):
+        marks = [
+            {
+                "number": f"M{index}",
+                "geometry": {"type": "bbox", "x": 10, "y": 10, "w": 5, "h": 5},
+                "attributes": [{"name": "diameter", "value": 2}],
+            }
+            for index in range(start, start + count)
+        ]
+        return self.client.post(f"/api/weld-maps/{weld_map.id}/marks/", {"marks": marks}, format="json")
+
+    def test_mark_ingestion_runs_constant_queries(self):
+        weld_map = self._expandable_welds(0)
+        stats.rebuild_stats(self.project.id)
+        self._post_marks(weld_map, 100, 1)
+        with CaptureQueriesContext(connection) as small:
+            resp = self._post_marks(weld_map, 0, 2)
+        self.assertEqual(resp.data["created"], 2)
+        with self.assertNumQueries(len(small.captured_queries)):
+            resp = self._post_marks(weld_map, 2, 40)
+        self.assertEqual(resp.data["created"], 40)
+        self.assertEqual(models.Weld.objects.filter(project=self.project).count(), 43)
+        self.assertEqual(models.WeldAttribute.objects.filter(name="diameter", value="2").count(), 43)
+        self.assertEqual(stats.get_stats(self.project.id).planned, 43)
+
+    def test_mark_ingestion_reports_each_mark(self):
+        weld_map = self._expandable_welds(1)
+        resp = self.client.post(
+            f"/api/weld-maps/{weld_map.id}/marks/",
+            {"marks": [
+                {"number": "W0", "geometry": {"type": "poly", "points": [{"x": 1, "y": 1}, {"x": 4, "y": 1}, {"x": 4, "y": 3}]}},
+                {"number": "W9", "geometry": {"type": "bbox", "x": 1, "y": 1, "w": 0, "h": 5}},
+                {"number": "W10", "geometry": {"type": "poly", "points": [{"x": 1, "y": 1}]}},
+                {"number": "W13"},
+                {"number": "W11", "geometry": {"type": "bbox", "x": 1, "y": 1, "w": 2, "h": 2}},
+                {"geometry": {"type": "bbox", "x": 1, "y": 1, "w": 2, "h": 2}},
+            ]},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual((resp.data["created"], resp.data["errors"]), (3, 3))
+        results = resp.data["results"]
+        self.assertEqual(
+            [result["status"] for result in results], ["created", "error", "error", "error", "created", "created"]
+        )
+        self.assertFalse(results[0]["weld_created"])
+        self.assertEqual(results[1]["code"], "invalid_geometry")
+        self.assertEqual(results[3]["code"], "invalid_mark")
+        self.assertTrue(results[4]["weld_created"])
+        # Unnumbered marks take the next number of the project's WELD rule.
+        self.assertEqual(results[5]["number"], "WELD-P1-0001")
+        self.assertFalse(models.Weld.objects.filter(number__in=["W9", "W10"]).exists())
+
+        resp = self.client.post(
+            f"/api/weld-maps/{weld_map.id}/marks/",
+            {"marks": [{"number": "W12", "geometry": {"type": "circle", "cx": 1, "cy": 1, "r": 2}}]},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data["code"], "invalid_mark")
+
+    def test_viewport_and_hit_test_use_the_bounds_columns(self):
+        weld_map = self._expandable_welds(0)
+        resp = self.client.post(
+            f"/api/weld-maps/{weld_map.id}/marks/",
+            {"marks": [
+                {"number": "A", "geometry": {"type": "bbox", "x": 0, "y": 0, "w": 100, "h": 100}},
+                {"number": "B", "geometry": {"type": "bbox", "x": 40, "y": 40, "w": 10, "h": 10}},
+                {"number": "C", "geometry": {"type": "poly", "points": [
+                    {"x": 200, "y": 200}, {"x": 300, "y": 200}, {"x": 200, "y": 300}]}},
+                {"number": "D", "geometry": {"type": "bbox", "x": 40, "y": 40, "w": 10, "h": 10, "page": 2}},
+            ]},
+            format="json",
+        )
+        self.assertEqual(resp.data["created"], 4)
+        mark = models.WeldMark.objects.get(weld__number="C")
+        self.assertEqual((mark.page, mark.min_x, mark.min_y, mark.max_x, mark.max_y), (1, 200, 200, 300, 300))
+
+        url = f"/api/weld-maps/{weld_map.id}/marks/"
+
+        def numbers(resp):
+            return sorted(item["weld"]["number"] for item in resp.data["results"])
+
+        self.assertEqual(numbers(self.client.get(url)), ["A", "B", "C"])
+        self.assertEqual(numbers(self.client.get(url + "?bbox=150,150,400,400")), ["C"])
+        self.assertEqual(numbers(self.client.get(url + "?bbox=45,45,46,46&page=2")), ["D"])
+        self.assertEqual(self.client.get(url + "?bbox=1,2,3").data["code"], "invalid_viewport")
+
+        def hit(x, y):
+            return [item["weld"]["number"] for item in self.client.get(f"{url}hit/?x={x}&y={y}").data["results"]]
+
+        self.assertEqual(hit(45, 45), ["B", "A"])
+        self.assertEqual(hit(210, 210), ["C"])
+        # Inside C's box but outside the triangle.
+        self.assertEqual(hit(290, 290), [])
+
+        mark.geometry = {"type": "circle", "cx": 500, "cy": 500, "r": 10, "page": 3}
+        mark.save(update_fields=["geometry"])
+        mark.refresh_from_db()
+        self.assertEqual((mark.page, mark.min_x, mark.max_y), (3, 490, 510))
+
+    @override_settings(WELD_MARK_COMPACT_GEOMETRY=True)
+    def test_compact_geometry_round_trips(self):
+        weld_map = self._expandable_welds(0)
+        geometries = [
+            {"type": "bbox", "x": 10, "y": 20.5, "w": 5, "h": 5, "page": 2},
+            {"type": "poly", "points": [{"x": 0.1, "y": 1}, {"x": 70000, "y": 1}, {"x": 5, "y": 3}]},
+            {"type": "circle", "cx": 100, "cy": 140, "r": 12},
+        ]
+        for geometry in geometries:
+            self.assertEqual(geometry_format.decode(geometry_format.encode(geometry)), geometry)
+        self.assertIsNone(geometry_format.encode({"type": "bbox", "x": 1, "y": 1, "w": 1, "h": 1, "label": "A"}))
+
+        resp = self.client.post(
+            f"/api/weld-maps/{weld_map.id}/marks/",
+            {"marks": [{"number": f"C{index}", "geometry": geometry} for index, geometry in enumerate(geometries[:2])]},
+            format="json",
+        )
+        self.assertEqual(resp.data["created"], 2)
+        # Circles come from the weld map editor, not the API.
+        weld = models.Weld.objects.create(project=self.project, number="C2")
+        models.WeldMark.objects.create(weld_map=weld_map, weld=weld, geometry=geometries[2])
+        self.assertEqual(models.WeldMark.objects.filter(geometry__isnull=True).count(), 3)
+        self.assertEqual(models.WeldMark.objects.get(weld__number="C0").geometry, geometries[0])
+        listed = self.client.get(f"/api/weld-maps/{weld_map.id}/marks/?page=2").data["results"]
+        self.assertEqual([mark["geometry"] for mark in listed], [geometries[0]])
+
+        with override_settings(WELD_MARK_COMPACT_GEOMETRY=False):
+            mark = models.WeldMark.objects.get(weld__number="C2")
+            mark.save()
+        self.assertEqual(
+            models.WeldMark.objects.filter(id=mark.id).values_list("geometry", "geometry_packed").get(),
+            (geometries[2], None),
+        )
+
+    def test_fields_trims_the_output(self):
+        models.Weld.objects.create(project=self.project, number="W1")
+        resp = self.client.get(f"/api/welds/?project_id={self.project.id}&fields=id,number")
+        self.assertEqual(set(resp.data["results"][0]), {"id", "number"})
+
     def test_close_weld_changes_status(self):
         weld = models.Weld.objects.create(
             project=self.project, number="W1", status="in_progress"
@@ -42,8 +269,62 @@ class WeldCloseTests(TestCase):
         weld.refresh_from_db()
         self.assertEqual(weld.status, "completed")
 
+    def test_close_weld_logs_continuity_and_project_activity(self):
+        weld = models.Weld.objects.create(project=self.project, number="W1", status="in_progress")
+        welder = wpq_models.Welder.objects.create(name="Welder 1")
+        models.WeldWelderAssignment.objects.create(weld=weld, welder=welder)
+        wps = wps_models.Wps.objects.create(
+            project=self.project, code="WPS-1", standard="ASME_IX", impact_test=False
+        )
+        wps_models.WpsVariable.objects.create(wps=wps, name="processes", value="GTAW, SMAW")
+        models.WeldWpsAssignment.objects.create(weld=weld, wps=wps)
+
+        resp = self.client.post(
+            f"/api/welds/{weld.id}/close/", {"closed_at": "2026-01-10T08:00:00Z"}, format="json"
+        )
+        self.assertEqual(resp.status_code, 200)
+        log = wpq_models.ContinuityLog.objects.get(welder=welder)
+        self.assertEqual(log.process, "GTAW")
+        activity = wpq_models.WelderProjectActivity.objects.get(welder=welder, project=self.project)
+        self.assertEqual(str(activity.last_activity_date), "2026-01-10")
+
+
+class ProjectWeldStatsTests(TestCase):
+    def setUp(self):
+        self.project = project_models.Project.objects.create(
+            name="P1", code="P1", units="metric", status="active", standard_set=["ASME_IX"]
+        )
+
+    def _counters(self):
+        row = models.ProjectWeldStats.objects.get(project=self.project)
+        daily = dict(
+            models.ProjectWeldDailyStats.objects.filter(project=self.project, closed__gt=0)
+            .values_list("day", "closed")
+        )
+        return (row.total, row.planned, row.in_progress, row.completed, row.repair), daily
+
+    def test_counters_follow_weld_changes(self):
+        first = models.Weld.objects.create(project=self.project, number="W1")
+        second = models.Weld.objects.create(project=self.project, number="W2", status="in_progress")
+        models.Weld.objects.create(project=self.project, number="W3", status="repair")
+        second.status = "completed"
+        second.closed_at = timezone.now()
+        second.save(update_fields=["status", "closed_at"])
+        first.delete()
+
+        incremental = self._counters()
+        self.assertEqual(incremental[0], (2, 0, 0, 1, 1))
+        self.assertEqual(list(incremental[1].values()), [1])
+        stats.rebuild_stats(self.project.id)
+        self.assertEqual(self._counters(), incremental)
 
-class WeldMapUiTests(TestCase):
+    def test_project_delete_cascades_stats(self):
+        models.Weld.objects.create(project=self.project, number="W1")
+        self.project.delete()
+        self.assertFalse(models.ProjectWeldStats.objects.exists())
+
+
+class WeldMapUiTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         self.client = Client()
         self.app_user = user_models.User.objects.create(
@@ -87,6 +368,70 @@ class WeldMapUiTests(TestCase):
         )
         return auth_user
 
+    def _map_with_welds(self, count, start=0):
+        for index in range(start, start + count):
+            weld = models.Weld.objects.create(project=self.project, drawing=self.drawing, number=f"W-{index}")
+            models.WeldMark.objects.create(
+                weld_map=self.weld_map, weld=weld, geometry={"type": "bbox", "x": index + 1, "y": 1, "w": 10, "h": 10}
+            )
+
+    def test_weld_list_and_map_detail_stay_within_query_budget(self):
+        self._map_with_welds(3)
+        self.assertWithinQueryBudget(self.client.get(reverse("weld_list")))
+        self.assertWithinQueryBudget(
+            self.client.get(reverse("weld_map_detail", kwargs={"pk": self.weld_map.id}))
+        )
+
+    def test_other_sheets_load_for_a_user_without_api_roles(self):
+        from django.contrib.auth import get_user_model
+
+        weld = models.Weld.objects.create(project=self.project, drawing=self.drawing, number="W-P2")
+        models.WeldMark.objects.create(
+            weld_map=self.weld_map, weld=weld, geometry={"type": "bbox", "x": 1, "y": 1, "w": 5, "h": 5, "page": 2}
+        )
+        self._map_with_welds(1)
+        # A login with no app User or role: the marks API would answer 403.
+        viewer = get_user_model().objects.create_user(username="viewer", password="12345")
+        self.client.force_login(viewer)
+        detail = self.client.get(reverse("weld_map_detail", kwargs={"pk": self.weld_map.id}))
+        self.assertEqual([mark["number"] for mark in detail.context["saved_marks_payload"]], ["W-0"])
+
+        url = reverse("weld_map_marks", kwargs={"pk": self.weld_map.id})
+        resp = self.client.get(url, {"page": 2})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            resp.json()["results"],
+            [{"id": str(weld.weldmark_set.get().id), "number": "W-P2", "geometry": {"type": "bbox", "x": 1, "y": 1, "w": 5, "h": 5, "page": 2}}],
+        )
+        self.assertEqual(self.client.get(url, {"page": "0"}).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.client.get(url, {"page": 2}).status_code, 302)
+
+    def test_weld_list_grid_saves_in_constant_queries(self):
+        url = reverse("weld_map_detail", kwargs={"pk": self.weld_map.id})
+
+        def post_grid(start, count):
+            self._map_with_welds(count, start=start)
+            data = {"action": "save_weld_list"}
+            for weld in models.Weld.objects.filter(weldmark__weld_map=self.weld_map):
+                data[f"weld_type_{weld.id}"] = "BW"
+                data[f"position_{weld.id}"] = weld.number
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.post(url, data).status_code, 302)
+            return len(queries.captured_queries)
+
+        # Every save below creates the new rows' values and updates the old rows' position.
+        post_grid(0, 2)
+        models.WeldAttribute.objects.filter(name="position").update(value="old")
+        small = post_grid(2, 2)
+        models.WeldAttribute.objects.filter(name="position").update(value="old")
+        self.assertEqual(post_grid(4, 20), small)
+        values = dict(
+            models.WeldAttribute.objects.filter(weld__number="W-7", name__in=["weld_type", "position"])
+            .values_list("name", "value")
+        )
+        self.assertEqual(values, {"weld_type": "BW", "position": "W-7"})
+
     def test_save_marks_creates_auto_numbered_weld(self):
         url = reverse("weld_map_detail", kwargs={"pk": self.weld_map.id})
         resp = self.client.post(
@@ -108,6 +453,38 @@ class WeldMapUiTests(TestCase):
             models.WeldMark.objects.filter(weld_map=self.weld_map, weld=weld).exists()
         )
 
+    def test_editor_prefix_is_honoured_after_the_api_created_the_weld_rule(self):
+        resp = self.client.post(
+            f"/api/weld-maps/{self.weld_map.id}/marks/",
+            {"marks": [{"geometry": {"type": "bbox", "x": 1, "y": 1, "w": 2, "h": 2}}]},
+            content_type="application/json",
+        )
+        self.assertEqual(resp.json()["results"][0]["number"], "WELD-P-UI-0001")
+        url = reverse("weld_map_detail", kwargs={"pk": self.weld_map.id})
+
+        def save_mark(prefix, cx):
+            return self.client.post(url, {
+                "action": "save_marks",
+                "number_prefix": prefix,
+                "marks_json": f'[{{"geometry":{{"type":"circle","cx":{cx},"cy":140,"r":12}}}}]',
+                "attributes_json": "[]",
+                "geometry_json": "",
+                "weld_number": "",
+            })
+
+        self.assertEqual(save_mark("s", 100).status_code, 302)
+        self.assertEqual(save_mark("S", 200).status_code, 302)
+        self.assertEqual(save_mark("", 300).status_code, 302)
+        numbers = set(models.Weld.objects.filter(project=self.project).values_list("number", flat=True))
+        self.assertEqual(numbers, {"WELD-P-UI-0001", "S1", "S2", "WELD-P-UI-0002"})
+        self.assertEqual(
+            dict(project_models.NumberingRule.objects.filter(project=self.project).values_list("type", "pattern")),
+            {"WELD": "WELD-{ProjectCode}-{Seq4}", "WELD:S": "S{Seq}"},
+        )
+        resp = save_mark("{SEQ}", 400)
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "sin llaves")
+
     def test_save_welding_list_updates_attributes(self):
         weld = models.Weld.objects.create(
             project=self.project,
@@ -1,5 +1,4 @@
 import os
-import re
 import uuid
 from urllib.parse import quote
 
@@ -7,12 +6,18 @@ from django import forms
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Count, Q
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
 from apps.projects import models as project_models
+from apps.projects.versioning import bump_version
 
 from . import models
+from . import viewport
+from .geometry import decode_many
+from .ingest import MarkError, reserve_weld_numbers
 from .forms import (
     DrawingForm,
     VisualInspectionForm,
@@ -26,8 +31,6 @@ from .forms import (
 )
 
 
-DEFAULT_WELD_PREFIX = "S"
-DEFAULT_WELD_PAD = 0
 WELD_LIST_FIELDS = [
     ("joint_description", "Joint description"),
     ("weld_type", "Weld type"),
@@ -38,6 +41,7 @@ WELD_LIST_FIELDS = [
     ("processes", "Process(es)"),
     ("base_material", "Base material"),
 ]
+WELD_LIST_NAMES = [field for field, _label in WELD_LIST_FIELDS]
 
 
 def _drawing_rel_path(filename):
@@ -49,53 +53,48 @@ def _drawing_file_url(file_path):
     return quote(normalized, safe="/")
 
 
-def _next_weld_number(project, used_numbers, prefix=DEFAULT_WELD_PREFIX, pad=DEFAULT_WELD_PAD):
-    existing = models.Weld.objects.filter(
-        project=project, number__startswith=prefix
-    ).values_list("number", flat=True)
-    max_num = 0
-    for number in existing:
-        match = re.match(rf"^{re.escape(prefix)}(\d+)$", number)
-        if match:
-            max_num = max(max_num, int(match.group(1)))
-    used = set(used_numbers)
-    counter = max_num + 1
-
-    def generate():
-        nonlocal counter
-        while True:
-            if pad:
-                candidate = f"{prefix}{counter:0{pad}d}"
-            else:
-                candidate = f"{prefix}{counter}"
-            counter += 1
-            if candidate not in used:
-                used.add(candidate)
-                return candidate
-
-    return generate
-
-
-def _weld_attribute_map(weld):
-    rows = models.WeldAttribute.objects.filter(weld=weld).values_list("name", "value")
-    return {name: value for name, value in rows}
-
-
-def _save_weld_list_row(weld, payload):
-    current = models.WeldAttribute.objects.filter(weld=weld)
-    by_name = {attr.name: attr for attr in current}
-    for field, _label in WELD_LIST_FIELDS:
-        value = (payload.get(field) or "").strip()
-        existing = by_name.get(field)
-        if value:
-            if existing:
-                if existing.value != value:
+def _weld_list_attributes(weld_map):
+    """Return ``{weld_id: {field: WeldAttribute}}`` for the weld-list grid of a map in one query."""
+    attributes = models.WeldAttribute.objects.filter(
+        weld_id__in=models.WeldMark.objects.filter(weld_map=weld_map).values("weld_id"),
+        name__in=WELD_LIST_NAMES,
+    )
+    grid = {}
+    for attr in attributes:
+        grid.setdefault(attr.weld_id, {})[attr.name] = attr
+    return grid
+
+
+def _save_weld_list(weld_map, welds, grid, payloads):
+    """Diff the posted grid against ``grid`` and write it with one statement per kind of change."""
+    to_create = []
+    to_update = []
+    to_delete = []
+    for weld in welds:
+        current = grid.get(weld.id, {})
+        payload = payloads.get(weld.id, {})
+        for field in WELD_LIST_NAMES:
+            value = (payload.get(field) or "").strip()
+            existing = current.get(field)
+            if value:
+                if existing is None:
+                    to_create.append(models.WeldAttribute(weld=weld, name=field, value=value))
+                elif existing.value != value:
                     existing.value = value
-                    existing.save(update_fields=["value"])
-            else:
-                models.WeldAttribute.objects.create(weld=weld, name=field, value=value)
-        elif existing:
-            existing.delete()
+                    to_update.append(existing)
+            elif existing is not None:
+                to_delete.append(existing.id)
+    if not (to_create or to_update or to_delete):
+        return
+    with transaction.atomic():
+        if to_create:
+            models.WeldAttribute.objects.bulk_create(to_create)
+        if to_update:
+            models.WeldAttribute.objects.bulk_update(to_update, ["value"])
+        if to_delete:
+            models.WeldAttribute.objects.filter(id__in=to_delete).delete()
+        # bulk_create/bulk_update skip the post_save that bumps this counter.
+        bump_version(weld_map.project_id, "weld_attribute")
 
 
 def _inspection_status(item):
@@ -415,7 +414,7 @@ def drawing_copy_marks(request, pk):
         )
         if not created and weld.drawing_id != target.id:
             weld.drawing = target
-            weld.save(update_fields=["drawing"])
+            weld.save(update_fields=["drawing", "updated_at"])
         exists = models.WeldMark.objects.filter(
             weld_map=target_map,
             weld=weld,
@@ -550,40 +549,75 @@ def weld_map_list(request):
     )
 
 
+def _saved_marks_payload(rows):
+    """Editor payload from ``(id, number, geometry, geometry_packed)`` rows."""
+    rows = list(rows)
+    unpacked = decode_many([packed if geometry is None else None for *_mark, geometry, packed in rows])
+    return [
+        {"id": str(mark_id), "number": number, "geometry": geometry if geometry is not None else decoded}
+        for (mark_id, number, geometry, _packed), decoded in zip(rows, unpacked)
+    ]
+
+
+@login_required
+def weld_map_marks(request, pk):
+    # Same access as weld_map_detail, which embeds only the first sheet.
+    item = get_object_or_404(models.WeldMap, pk=pk)
+    try:
+        page = viewport.parse_page(request.GET.get("page"))
+    except ValueError as exc:
+        return JsonResponse({"code": "invalid_viewport", "message": str(exc)}, status=400)
+    rows = (
+        viewport.marks_in_viewport(item, page)
+        .order_by("-created_at")
+        .values_list("id", "weld__number", "geometry", "geometry_packed")
+    )
+    return JsonResponse({"page": page, "results": _saved_marks_payload(rows)})
+
+
 @login_required
 def weld_map_detail(request, pk):
-    item = get_object_or_404(models.WeldMap, pk=pk)
+    item = get_object_or_404(
+        models.WeldMap.objects.select_related("project", "drawing__equipment"), pk=pk
+    )
     drawing_file_url = _drawing_file_url(item.drawing.file_path)
-    marks = models.WeldMark.objects.filter(weld_map=item).select_related("weld").order_by("-created_at")
-    saved_marks_payload = [
-        {"id": str(mark.id), "number": mark.weld.number, "geometry": mark.geometry}
-        for mark in marks
-    ]
-    mark_by_weld = {mark.weld_id: mark for mark in marks}
-    map_welds = (
+    marks = list(
+        models.WeldMark.objects.filter(weld_map=item)
+        .order_by("-created_at")
+        .values_list("id", "weld_id", "weld__number", "page", "geometry", "geometry_packed")
+    )
+    # Only the first sheet is embedded; the page script loads the others from weld_map_marks.
+    saved_marks_payload = _saved_marks_payload(
+        (mark_id, number, geometry, packed)
+        for mark_id, _weld_id, number, page, geometry, packed in marks
+        if page == 1
+    )
+    mark_by_weld = {weld_id: mark_id for mark_id, weld_id, *_rest in marks}
+    map_welds = list(
         models.Weld.objects.filter(weldmark__weld_map=item)
         .select_related("drawing")
         .distinct()
         .order_by("number")
     )
+    grid = _weld_list_attributes(item)
     rows = []
     for weld in map_welds:
-        attrs = _weld_attribute_map(weld)
+        attrs = grid.get(weld.id, {})
         values = []
-        for field, _label in WELD_LIST_FIELDS:
-            values.append((field, attrs.get(field, "")))
-        saved_mark = mark_by_weld.get(weld.id)
-        row = {"weld": weld, "values": values, "mark_id": str(saved_mark.id) if saved_mark else ""}
+        for field in WELD_LIST_NAMES:
+            values.append((field, attrs[field].value if field in attrs else ""))
+        saved_mark_id = mark_by_weld.get(weld.id)
+        row = {"weld": weld, "values": values, "mark_id": str(saved_mark_id) if saved_mark_id else ""}
         rows.append(row)
     form = WeldMarkForm()
     if request.method == "POST":
         action = request.POST.get("action")
         if action == "save_weld_list":
-            for weld in map_welds:
-                payload = {}
-                for field, _label in WELD_LIST_FIELDS:
-                    payload[field] = request.POST.get(f"{field}_{weld.id}", "")
-                _save_weld_list_row(weld, payload)
+            payloads = {
+                weld.id: {field: request.POST.get(f"{field}_{weld.id}", "") for field in WELD_LIST_NAMES}
+                for weld in map_welds
+            }
+            _save_weld_list(item, map_welds, grid, payloads)
             return redirect("weld_map_detail", pk=item.pk)
         if action == "delete_saved_mark":
             mark_id = request.POST.get("mark_id")
@@ -682,23 +716,8 @@ def weld_map_detail(request, pk):
                 geometry = form.cleaned_data.get("geometry_json")
                 if geometry:
                     marks_payload = [{"number": weld_number, "geometry": geometry}]
-            existing_numbers = set(
-                models.Weld.objects.filter(project=item.project).values_list("number", flat=True)
-            )
-            used_numbers = {
-                mark.get("number")
-                for mark in marks_payload
-                if isinstance(mark, dict) and mark.get("number")
-            }
-            number_prefix = (request.POST.get("number_prefix") or DEFAULT_WELD_PREFIX).strip().upper()
-            if not number_prefix:
-                number_prefix = DEFAULT_WELD_PREFIX
-            next_number = _next_weld_number(
-                item.project,
-                existing_numbers | used_numbers,
-                prefix=number_prefix,
-                pad=DEFAULT_WELD_PAD,
-            )
+            # Blank uses the project's WELD rule, like the marks API; a prefix has its own sequence.
+            number_prefix = (request.POST.get("number_prefix") or "").strip().upper()
             existing_map_numbers = set(
                 models.WeldMark.objects.filter(weld_map=item).values_list("weld__number", flat=True)
             )
@@ -712,11 +731,10 @@ def weld_map_detail(request, pk):
                 if not geometry:
                     continue
                 weld_number = mark.get("number")
-                if not weld_number:
-                    weld_number = next_number()
-                if weld_number in existing_map_numbers or weld_number in planned_numbers:
-                    duplicates.append(weld_number)
-                planned_numbers.add(weld_number)
+                if weld_number:
+                    if weld_number in existing_map_numbers or weld_number in planned_numbers:
+                        duplicates.append(weld_number)
+                    planned_numbers.add(weld_number)
                 normalized_marks.append({"number": weld_number, "geometry": geometry})
             if duplicates:
                 dup_text = ", ".join(sorted(set(duplicates)))
@@ -735,9 +753,32 @@ def weld_map_detail(request, pk):
                         "saved_marks_payload": saved_marks_payload,
                     },
                 )
+            missing = sum(1 for mark in normalized_marks if not mark["number"])
+            # One block for every unnumbered mark; the sequence never reuses a number.
+            try:
+                auto_numbers = iter(
+                    reserve_weld_numbers(item.project, missing, number_prefix, exclude=planned_numbers)
+                    if missing
+                    else []
+                )
+            except MarkError as exc:
+                form.add_error(None, exc.message)
+                return render(
+                    request,
+                    "weld_maps/detail.html",
+                    {
+                        "item": item,
+                        "marks": marks,
+                        "form": form,
+                        "rows": rows,
+                        "weld_list_fields": WELD_LIST_FIELDS,
+                        "drawing_file_url": drawing_file_url,
+                        "saved_marks_payload": saved_marks_payload,
+                    },
+                )
             created = 0
             for mark in normalized_marks:
-                weld_number = mark["number"]
+                weld_number = mark["number"] or next(auto_numbers)
                 geometry = mark["geometry"]
                 weld, _ = models.Weld.objects.get_or_create(
                     project=item.project,
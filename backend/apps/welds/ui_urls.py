@@ -19,6 +19,7 @@ urlpatterns = [
     path("weld-maps/new/", ui.weld_map_create, name="weld_map_create"),
     path("weld-maps/<uuid:pk>/", ui.weld_map_detail, name="weld_map_detail"),
     path("weld-maps/<uuid:pk>/edit/", ui.weld_map_edit, name="weld_map_edit"),
+    path("weld-maps/<uuid:pk>/marks/", ui.weld_map_marks, name="weld_map_marks"),
     path("weld-attributes/", ui.weld_attribute_list, name="weld_attribute_list"),
     path("weld-attributes/new/", ui.weld_attribute_create, name="weld_attribute_create"),
     path("weld-attributes/<uuid:pk>/", ui.weld_attribute_detail, name="weld_attribute_detail"),
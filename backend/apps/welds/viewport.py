@@ -0,0 +1,68 @@
+"""Viewport queries and hit-testing over the WeldMark bounding-box columns.
+
+Both filter on ``weld_mark_viewport_idx`` (weld_map, page, min_x, max_x, min_y,
+max_y), so a sheet of a large drawing is read a window at a time instead of
+loading every mark of the map.
+"""
+from . import models
+from .geometry import area, contains
+
+
+MAX_HITS = 20
+
+
+def _floats(value, count, name):
+    try:
+        numbers = [float(part) for part in value.split(",")]
+    except ValueError:
+        raise ValueError(f"{name} debe tener {count} numeros separados por coma.") from None
+    if len(numbers) != count:
+        raise ValueError(f"{name} debe tener {count} numeros separados por coma.")
+    return numbers
+
+
+def parse_bbox(value):
+    """``"min_x,min_y,max_x,max_y"`` -> tuple, None when absent."""
+    if not value:
+        return None
+    min_x, min_y, max_x, max_y = _floats(value, 4, "bbox")
+    if min_x > max_x or min_y > max_y:
+        raise ValueError("bbox debe ser min_x,min_y,max_x,max_y.")
+    return min_x, min_y, max_x, max_y
+
+
+def parse_point(x, y):
+    if x in (None, "") or y in (None, ""):
+        raise ValueError("x e y requeridos.")
+    return tuple(_floats(f"{x},{y}", 2, "x,y"))
+
+
+def parse_page(value):
+    if not value:
+        return 1
+    try:
+        page = int(value)
+    except ValueError:
+        raise ValueError("page debe ser un entero.") from None
+    if page < 1:
+        raise ValueError("page debe ser mayor que 0.")
+    return page
+
+
+def marks_in_viewport(weld_map, page, box=None):
+    """Marks of ``page`` whose bounding box intersects ``box`` (every mark of the page without it)."""
+    qs = models.WeldMark.objects.filter(weld_map=weld_map, page=page)
+    if box is not None:
+        min_x, min_y, max_x, max_y = box
+        qs = qs.filter(min_x__lte=max_x, max_x__gte=min_x, min_y__lte=max_y, max_y__gte=min_y)
+    return qs
+
+
+def marks_at(weld_map, page, x, y):
+    """Marks whose shape contains ``(x, y)``, smallest (topmost) first."""
+    candidates = models.WeldMark.objects.filter(
+        weld_map=weld_map, page=page, min_x__lte=x, max_x__gte=x, min_y__lte=y, max_y__gte=y
+    ).select_related("weld")
+    hits = [mark for mark in candidates if contains(mark.geometry, x, y)]
+    hits.sort(key=lambda mark: (area(mark.geometry), str(mark.id)))
+    return hits[:MAX_HITS]
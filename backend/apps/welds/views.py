@@ -3,9 +3,17 @@ from django.utils import timezone
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from . import ingest
 from . import models
 from . import serializers
-from apps.users.project_permissions import ProjectScopedPermission
+from . import viewport
+from apps.projects.conditional import ConditionalGetMixin
+from apps.projects.expansion import ExpandableQuerysetMixin
+from apps.projects.versioning import bump_version
+from apps.users.project_permissions import ProjectScopedPermission, ProjectScopedQuerysetMixin
+from apps.wpq import models as wpq_models
+from apps.wpq.activity import record_activity
+from apps.wps import models as wps_models
 
 class BaseRoleViewSet(viewsets.ModelViewSet):
     permission_classes = [ProjectScopedPermission]
@@ -13,7 +21,9 @@ class BaseRoleViewSet(viewsets.ModelViewSet):
     write_roles = ["Admin", "Supervisor"]
 
 
-class DrawingViewSet(BaseRoleViewSet):
+class DrawingViewSet(ConditionalGetMixin, ProjectScopedQuerysetMixin, BaseRoleViewSet):
+    project_lookup = "project_id"
+    version_resources = ("drawing",)
     queryset = models.Drawing.objects.all()
     serializer_class = serializers.DrawingSerializer
 
@@ -28,7 +38,9 @@ class DrawingViewSet(BaseRoleViewSet):
         return qs
 
 
-class WeldMapViewSet(BaseRoleViewSet):
+class WeldMapViewSet(ExpandableQuerysetMixin, ConditionalGetMixin, ProjectScopedQuerysetMixin, BaseRoleViewSet):
+    project_lookup = "project_id"
+    version_resources = ("weld_map",)
     queryset = models.WeldMap.objects.all()
     serializer_class = serializers.WeldMapSerializer
 
@@ -39,47 +51,61 @@ class WeldMapViewSet(BaseRoleViewSet):
             qs = qs.filter(project_id=project_id)
         return qs
 
-    @action(detail=True, methods=["post"], url_path="marks")
+    @action(detail=True, methods=["get", "post"], url_path="marks")
     def marks(self, request, pk=None):
         weld_map = self.get_object()
+        if request.method == "GET":
+            return self._viewport_marks(request, weld_map)
         marks = request.data.get("marks", [])
         if not isinstance(marks, list) or not marks:
             return Response(
                 {"code": "missing_marks", "message": "Debe incluir marks."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        created = 0
-        with transaction.atomic():
-            for mark in marks:
-                number = mark.get("number")
-                geometry = mark.get("geometry")
-                if not number or not geometry:
-                    return Response(
-                        {"code": "invalid_mark", "message": "number y geometry requeridos."},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-                weld, _ = models.Weld.objects.get_or_create(
-                    project=weld_map.project,
-                    number=number,
-                    defaults={"drawing": weld_map.drawing, "status": "planned"},
-                )
-                models.WeldMark.objects.create(
-                    weld_map=weld_map,
-                    weld=weld,
-                    geometry=geometry,
-                )
-                for attr in mark.get("attributes", []):
-                    name = attr.get("name")
-                    value = attr.get("value")
-                    if name and value is not None:
-                        models.WeldAttribute.objects.create(
-                            weld=weld, name=name, value=str(value)
-                        )
-                created += 1
-        return Response({"created": created})
-
-
-class WeldViewSet(BaseRoleViewSet):
+        if len(marks) > ingest.MAX_MARKS:
+            return Response(
+                {"code": "too_many_marks", "message": f"Maximo {ingest.MAX_MARKS} marcas por envio."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        results = ingest.ingest_marks(weld_map, marks)
+        created = sum(1 for result in results if result["status"] == "created")
+        if not created:
+            return Response(
+                {"code": "invalid_mark", "message": "Ninguna marca es valida.", "results": results},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({"created": created, "errors": len(results) - created, "results": results})
+
+    def _viewport_marks(self, request, weld_map):
+        try:
+            page = viewport.parse_page(request.query_params.get("page"))
+            box = viewport.parse_bbox(request.query_params.get("bbox"))
+        except ValueError as exc:
+            return Response(
+                {"code": "invalid_viewport", "message": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        rows = self.paginate_queryset(viewport.marks_in_viewport(weld_map, page, box).select_related("weld"))
+        return self.get_paginated_response(serializers.WeldMarkDetailSerializer(rows, many=True).data)
+
+    @action(detail=True, methods=["get"], url_path="marks/hit")
+    def hit(self, request, pk=None):
+        weld_map = self.get_object()
+        try:
+            page = viewport.parse_page(request.query_params.get("page"))
+            x, y = viewport.parse_point(request.query_params.get("x"), request.query_params.get("y"))
+        except ValueError as exc:
+            return Response(
+                {"code": "invalid_viewport", "message": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        hits = viewport.marks_at(weld_map, page, x, y)
+        return Response({"results": serializers.WeldMarkDetailSerializer(hits, many=True).data})
+
+
+class WeldViewSet(ExpandableQuerysetMixin, ConditionalGetMixin, ProjectScopedQuerysetMixin, BaseRoleViewSet):
+    project_lookup = "project_id"
+    version_resources = ("weld",)
     queryset = models.Weld.objects.all()
     serializer_class = serializers.WeldSerializer
 
@@ -120,10 +146,12 @@ class WeldViewSet(BaseRoleViewSet):
         with transaction.atomic():
             weld.status = "completed"
             weld.closed_at = closed_at
-            weld.save(update_fields=["status", "closed_at"])
+            weld.save(update_fields=["status", "closed_at", "updated_at"])
 
-            assignments = models.WeldWelderAssignment.objects.filter(
-                weld=weld, status="active"
+            welder_ids = list(
+                models.WeldWelderAssignment.objects.filter(weld=weld, status="active").values_list(
+                    "welder_id", flat=True
+                )
             )
             wps_assignment = (
                 models.WeldWpsAssignment.objects.filter(weld=weld, status="active")
@@ -133,8 +161,8 @@ class WeldViewSet(BaseRoleViewSet):
             process = "unknown"
             if wps_assignment:
                 var = (
-                    models.wps.WpsVariable.objects.filter(
-                        wps=wps_assignment.wps, name="processes"
+                    wps_models.WpsVariable.objects.filter(
+                        wps_id=wps_assignment.wps_id, name="processes"
                     )
                     .order_by("id")
                     .first()
@@ -142,20 +170,24 @@ class WeldViewSet(BaseRoleViewSet):
                 if var and var.value:
                     process = var.value.split(",")[0].strip()
 
-            for assign in assignments:
-                models.wpq.ContinuityLog.objects.create(
-                    welder=assign.welder,
+            closed_day = closed_at.date()
+            wpq_models.ContinuityLog.objects.bulk_create(
+                wpq_models.ContinuityLog(
+                    welder_id=welder_id,
                     weld=weld,
-                    date=closed_at.date(),
+                    date=closed_day,
                     process=process or "unknown",
                 )
-                continuity, _ = models.wpq.WelderContinuity.objects.get_or_create(
-                    welder=assign.welder
-                )
-                continuity.last_activity_date = closed_at.date()
-                continuity.continuity_due_date = closed_at.date() + timezone.timedelta(
-                    days=180
+                for welder_id in welder_ids
+            )
+            bump_version(None, "continuity_log")
+            record_activity(weld.project_id, welder_ids, closed_day)
+            for welder_id in welder_ids:
+                continuity, _ = wpq_models.WelderContinuity.objects.get_or_create(
+                    welder_id=welder_id
                 )
+                continuity.last_activity_date = closed_day
+                continuity.continuity_due_date = closed_day + timezone.timedelta(days=180)
                 continuity.status = "in_continuity"
                 continuity.save()
 
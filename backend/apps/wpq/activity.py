@@ -0,0 +1,36 @@
+from django.db.models import Max
+
+from . import models
+
+
+def record_activity(project_id, welder_ids, day):
+    welder_ids = set(welder_ids)
+    if not project_id or not welder_ids:
+        return
+    rows = models.WelderProjectActivity.objects.filter(project_id=project_id, welder_id__in=welder_ids)
+    existing = set(rows.values_list("welder_id", flat=True))
+    rows.filter(last_activity_date__lt=day).update(last_activity_date=day)
+    models.WelderProjectActivity.objects.bulk_create(
+        [
+            models.WelderProjectActivity(welder_id=welder_id, project_id=project_id, last_activity_date=day)
+            for welder_id in welder_ids - existing
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def refresh_activity(welder_id, project_id):
+    """Recompute one (welder, project) row from ContinuityLog after a log moved or was deleted."""
+    if not welder_id or not project_id:
+        return
+    last = models.ContinuityLog.objects.filter(
+        welder_id=welder_id, weld__project_id=project_id
+    ).aggregate(last=Max("date"))["last"]
+    rows = models.WelderProjectActivity.objects.filter(welder_id=welder_id, project_id=project_id)
+    if last is None:
+        rows.delete()
+    elif not rows.update(last_activity_date=last):
+        models.WelderProjectActivity.objects.bulk_create(
+            [models.WelderProjectActivity(welder_id=welder_id, project_id=project_id, last_activity_date=last)],
+            ignore_conflicts=True,
+        )
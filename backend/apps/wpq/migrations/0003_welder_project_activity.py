@@ -0,0 +1,54 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:00
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_activity(apps, schema_editor):
+    ContinuityLog = apps.get_model("wpq", "ContinuityLog")
+    WelderProjectActivity = apps.get_model("wpq", "WelderProjectActivity")
+    rows = (
+        ContinuityLog.objects.filter(weld__isnull=False)
+        .values("welder_id", "weld__project_id")
+        .annotate(last_activity_date=Max("date"))
+        .order_by()
+    )
+    WelderProjectActivity.objects.bulk_create(
+        (
+            WelderProjectActivity(
+                welder_id=row["welder_id"],
+                project_id=row["weld__project_id"],
+                last_activity_date=row["last_activity_date"],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_data_version'),
+        ('wpq', '0002_alter_weldercontinuity_welder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WelderProjectActivity',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('last_activity_date', models.DateField()),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='projects.project')),
+                ('welder', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='wpq.welder')),
+            ],
+            options={
+                'db_table': 'WelderProjectActivity',
+                'indexes': [models.Index(fields=['project', 'welder'], name='welder_activity_project_idx')],
+                'constraints': [models.UniqueConstraint(fields=('welder', 'project'), name='welder_project_activity_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_activity, migrations.RunPython.noop),
+    ]
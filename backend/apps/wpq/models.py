@@ -59,6 +59,24 @@ class ContinuityLog(models.Model):
         db_table = "ContinuityLog"
 
 
+class WelderProjectActivity(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    welder = models.ForeignKey("wpq.Welder", on_delete=models.CASCADE)
+    project = models.ForeignKey("projects.Project", on_delete=models.CASCADE)
+    last_activity_date = models.DateField()
+
+    class Meta:
+        db_table = "WelderProjectActivity"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["welder", "project"], name="welder_project_activity_unique"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["project", "welder"], name="welder_activity_project_idx"),
+        ]
+
+
 class ExpiryAlert(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     welder = models.ForeignKey("wpq.Welder", on_delete=models.CASCADE)
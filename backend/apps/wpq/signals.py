@@ -0,0 +1,48 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from apps.welds import models as weld_models
+from . import models
+from .activity import record_activity, refresh_activity
+
+
+def _project_id(weld_id):
+    if not weld_id:
+        return None
+    return weld_models.Weld.objects.filter(pk=weld_id).values_list("project_id", flat=True).first()
+
+
+def _remember_pair(sender, instance, raw=False, **kwargs):
+    # A saved log may be moving to another weld, project or date: keep the stored pair.
+    if raw or instance._state.adding:
+        instance._activity_pair = None
+        return
+    instance._activity_pair = (
+        models.ContinuityLog.objects.filter(pk=instance.pk)
+        .values_list("welder_id", "weld__project_id")
+        .first()
+    )
+
+
+def _update_activity(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    project_id = _project_id(instance.weld_id)
+    if created:
+        record_activity(project_id, [instance.welder_id], instance.date)
+        return
+    pairs = {(instance.welder_id, project_id)}
+    if getattr(instance, "_activity_pair", None):
+        pairs.add(instance._activity_pair)
+    for welder_id, pair_project_id in pairs:
+        refresh_activity(welder_id, pair_project_id)
+
+
+def _remove_activity(sender, instance, **kwargs):
+    refresh_activity(instance.welder_id, _project_id(instance.weld_id))
+
+
+def connect():
+    # bulk_create (weld close) skips these; the caller calls record_activity itself.
+    pre_save.connect(_remember_pair, sender=models.ContinuityLog, dispatch_uid="continuity_activity_pre_save")
+    post_save.connect(_update_activity, sender=models.ContinuityLog, dispatch_uid="continuity_activity_save")
+    post_delete.connect(_remove_activity, sender=models.ContinuityLog, dispatch_uid="continuity_activity_delete")
@@ -5,6 +5,7 @@ from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema
 from . import models
 from . import serializers
+from apps.projects.conditional import ConditionalGetMixin
 from apps.users.project_permissions import ProjectScopedPermission
 
 
@@ -23,8 +24,11 @@ class BaseRoleViewSet(viewsets.ModelViewSet):
     write_roles = ["Admin", "Supervisor"]
 
 
-class WpqViewSet(BaseRoleViewSet):
+class WpqViewSet(ConditionalGetMixin, BaseRoleViewSet):
     queryset = models.Wpq.objects.all()
+    # ?project_id= filters through continuity logs.
+    version_resources = ("wpq", "continuity_log")
+    version_project_lookup = None
     serializer_class = serializers.WpqSerializer
 
     def get_queryset(self):
@@ -139,8 +143,10 @@ class WelderContinuityViewSet(BaseRoleViewSet):
     serializer_class = serializers.WelderContinuitySerializer
 
 
-class WelderViewSet(BaseRoleViewSet):
+class WelderViewSet(ConditionalGetMixin, BaseRoleViewSet):
     queryset = models.Welder.objects.all()
+    version_resources = ("welder", "continuity_log")
+    version_project_lookup = None
     serializer_class = serializers.WelderSerializer
 
     def get_queryset(self):
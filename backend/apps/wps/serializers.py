@@ -1,4 +1,6 @@
 from rest_framework import serializers
+
+from apps.projects.expansion import Expand, ExpandableFieldsMixin
 from . import models
 
 class MaterialBaseSerializer(serializers.ModelSerializer):
@@ -19,7 +21,24 @@ class JointTypeSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class WpsSerializer(serializers.ModelSerializer):
+class WpsSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "variables": Expand(
+            "apps.wps.serializers.WpsVariableSerializer",
+            "wpsvariable_set",
+            many=True,
+            prefetch=["wpsvariable_set"],
+            resources=["wps_detail"],
+        ),
+        "processes": Expand(
+            "apps.wps.serializers.WpsProcessSerializer",
+            "wpsprocess_set",
+            many=True,
+            prefetch=["wpsprocess_set"],
+            resources=["wps_detail"],
+        ),
+    }
+
     class Meta:
         model = models.Wps
         fields = '__all__'
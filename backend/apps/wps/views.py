@@ -5,6 +5,8 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from . import models
 from . import serializers
+from apps.projects.conditional import ConditionalGetMixin
+from apps.projects.expansion import ExpandableQuerysetMixin
 from apps.users.project_permissions import ProjectScopedPermission
 
 
@@ -40,8 +42,9 @@ class JointTypeViewSet(BaseRoleViewSet):
     serializer_class = serializers.JointTypeSerializer
 
 
-class WpsViewSet(BaseRoleViewSet):
+class WpsViewSet(ExpandableQuerysetMixin, ConditionalGetMixin, BaseRoleViewSet):
     queryset = models.Wps.objects.all()
+    version_resources = ("wps",)
     serializer_class = serializers.WpsSerializer
 
     def get_queryset(self):
@@ -175,8 +178,9 @@ class WpsViewSet(BaseRoleViewSet):
         return Response(self.get_serializer(wps).data)
 
 
-class PqrViewSet(BaseRoleViewSet):
+class PqrViewSet(ConditionalGetMixin, BaseRoleViewSet):
     queryset = models.Pqr.objects.all()
+    version_resources = ("pqr",)
     serializer_class = serializers.PqrSerializer
 
     def get_queryset(self):
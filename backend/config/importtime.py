@@ -0,0 +1,67 @@
+"""Cold-start import profiling with ``python -X importtime``.
+
+Each scenario runs in a fresh interpreter so already-imported modules in the
+test process do not hide the cost.
+"""
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+
+SCENARIOS = {
+    # What an API worker pays before serving its first request.
+    "api": (
+        "import django; django.setup(); "
+        "from django.urls import get_resolver; get_resolver().url_patterns"
+    ),
+    # The API URLconf imported with a plain import statement so -X importtime
+    # reports its cumulative cost (modules loaded through importlib.import_module,
+    # as include() does, get no line of their own).
+    "api_urls": "import django; django.setup(); import config.api_urls",
+    # A management command that does not export anything.
+    "command": (
+        "import django; django.setup(); "
+        "from django.core.management import call_command; call_command('check', verbosity=0)"
+    ),
+}
+# Export backends that must stay behind apps.reports.renderers.
+HEAVY_MODULES = ("openpyxl", "reportlab", "pypdf")
+
+
+def profile_imports(scenario):
+    """Return ``{module: (self_us, cumulative_us)}`` for a cold start of ``scenario``."""
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings.dev"),
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCENARIOS[scenario]],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def total_ms(modules):
+    return sum(self_us for self_us, _cumulative in modules.values()) / 1000
+
+
+def cumulative_ms(modules, name):
+    return modules[name][1] / 1000
+
+
+def heavy_imports(modules):
+    return sorted(
+        name for name in modules if name.split(".")[0] in HEAVY_MODULES
+    )
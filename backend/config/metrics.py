@@ -0,0 +1,140 @@
+"""Per-request SQL and latency metrics.
+
+``QueryMetricsMiddleware`` wraps every database cursor while the request runs
+and records the query count, SQL time, repeated statements (same SQL with
+different parameters, the N+1 signature) and wall time. Totals are kept per
+view in this process and served in Prometheus text format by
+``/api/_metrics``; each worker process reports its own counters.
+"""
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.db import connections
+
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    return WHITESPACE.sub(" ", sql).strip()
+
+
+class QueryCollector:
+    def __init__(self, keep_log=False):
+        self.count = 0
+        self.sql_seconds = 0.0
+        self.fingerprints = Counter()
+        # Every statement with its parameters and duration, for saved profiles.
+        self.log = [] if keep_log else None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.sql_seconds += elapsed
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+            if self.log is not None:
+                self.log.append({"sql": sql, "params": repr(params), "ms": round(elapsed * 1000, 3)})
+
+    def duplicates(self):
+        """Return ``{sql: times}`` for statements run more than once."""
+        return {sql: times for sql, times in self.fingerprints.items() if times > 1}
+
+    def duplicate_count(self):
+        return sum(times - 1 for times in self.fingerprints.values() if times > 1)
+
+    def capture(self):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+
+class RequestMetrics:
+    def __init__(self, view, collector, wall_seconds):
+        self.view = view
+        self.queries = collector.count
+        self.sql_seconds = collector.sql_seconds
+        self.duplicate_queries = collector.duplicate_count()
+        self.duplicates = collector.duplicates()
+        self.wall_seconds = wall_seconds
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, metrics):
+        with self._lock:
+            stats = self._views.setdefault(metrics.view, {
+                "requests": 0,
+                "wall_seconds": 0.0,
+                "queries": 0,
+                "sql_seconds": 0.0,
+                "duplicate_queries": 0,
+                "buckets": [0] * len(LATENCY_BUCKETS),
+            })
+            stats["requests"] += 1
+            stats["wall_seconds"] += metrics.wall_seconds
+            stats["queries"] += metrics.queries
+            stats["sql_seconds"] += metrics.sql_seconds
+            stats["duplicate_queries"] += metrics.duplicate_queries
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if metrics.wall_seconds <= bound:
+                    stats["buckets"][index] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {view: {**stats, "buckets": list(stats["buckets"])} for view, stats in self._views.items()}
+
+    def clear(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = MetricsRegistry()
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(snapshot):
+    lines = [
+        "# HELP weldoc_request_duration_seconds Wall time per request.",
+        "# TYPE weldoc_request_duration_seconds histogram",
+    ]
+    for view, stats in sorted(snapshot.items()):
+        label = f'view="{_label(view)}"'
+        for bound, count in zip(LATENCY_BUCKETS, stats["buckets"]):
+            lines.append(f'weldoc_request_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+        lines.append(f'weldoc_request_duration_seconds_bucket{{{label},le="+Inf"}} {stats["requests"]}')
+        lines.append(f"weldoc_request_duration_seconds_sum{{{label}}} {stats['wall_seconds']:.6f}")
+        lines.append(f"weldoc_request_duration_seconds_count{{{label}}} {stats['requests']}")
+    for name, key, help_text in (
+        ("weldoc_db_queries_total", "queries", "SQL statements executed."),
+        ("weldoc_db_query_seconds_total", "sql_seconds", "Time spent in SQL."),
+        ("weldoc_db_duplicate_queries_total", "duplicate_queries", "Repeated SQL statements in one request."),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for view, stats in sorted(snapshot.items()):
+            value = stats[key]
+            value = f"{value:.6f}" if isinstance(value, float) else value
+            lines.append(f'{name}{{view="{_label(view)}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name or match._func_path
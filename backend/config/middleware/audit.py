@@ -3,8 +3,9 @@ from uuid import UUID
 
 from django.utils.deprecation import MiddlewareMixin
 
-from apps.projects import models as project_models
-from apps.users import models as user_models
+from apps.projects import audit
+from apps.users.caching import MISSING
+from apps.users.permissions import cached_roles
 
 
 class AuditEventMiddleware(MiddlewareMixin):
@@ -17,9 +18,13 @@ class AuditEventMiddleware(MiddlewareMixin):
         email = getattr(request.user, "email", None) or getattr(request.user, "username", None)
         if not email:
             return response
-        app_user = user_models.User.objects.filter(email=email).first()
-        if not app_user:
+        # Usually memoized by the API permission check of this same request.
+        resolved = getattr(request, "_resolved_roles", MISSING)
+        if resolved is MISSING or email != getattr(request.user, "email", None):
+            resolved = cached_roles(email)
+        if not resolved:
             return response
+        app_user_id = resolved[0]
 
         parts = [p for p in request.path.split("/") if p]
         entity = parts[1] if len(parts) > 1 else "api"
@@ -56,11 +61,5 @@ class AuditEventMiddleware(MiddlewareMixin):
         if body is not None:
             payload["body"] = body
 
-        project_models.AuditEvent.objects.create(
-            event_code="api_write",
-            entity=entity,
-            entity_id=entity_id or app_user.id,
-            user=app_user,
-            payload_json=payload,
-        )
+        audit.record_event("api_write", entity, entity_id or app_user_id, app_user_id, payload)
         return response
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+
+from config import metrics
+
+
+class QueryMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        collector = metrics.QueryCollector()
+        started = time.perf_counter()
+        with collector.capture():
+            response = self.get_response(request)
+        request_metrics = metrics.RequestMetrics(
+            metrics.view_name(request), collector, time.perf_counter() - started
+        )
+        metrics.registry.record(request_metrics)
+        # Read by config.query_budgets in tests.
+        response.query_metrics = request_metrics
+        if settings.METRICS_RESPONSE_HEADERS:
+            response["X-Query-Count"] = str(request_metrics.queries)
+            response["X-Query-Time-Ms"] = f"{request_metrics.sql_seconds * 1000:.1f}"
+            response["X-Duplicate-Queries"] = str(request_metrics.duplicate_queries)
+            response["X-Response-Time-Ms"] = f"{request_metrics.wall_seconds * 1000:.1f}"
+        return response
@@ -0,0 +1,50 @@
+import cProfile
+import logging
+import time
+
+from django.conf import settings
+
+from config import metrics, profiling
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PROFILING_ENABLED:
+            return self.get_response(request)
+        collector = metrics.QueryCollector(keep_log=True)
+        profiler = cProfile.Profile() if profiling.has_valid_token(request) else None
+        sampler = None if profiler else profiling.get_sampler()
+        started = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        else:
+            sampler.start()
+        try:
+            with collector.capture():
+                response = self.get_response(request)
+        finally:
+            if profiler:
+                profiler.disable()
+            else:
+                samples = sampler.stop()
+        wall_seconds = time.perf_counter() - started
+        if profiler or wall_seconds * 1000 >= settings.PROFILING_SLOW_MS:
+            try:
+                profiling.save_profile(
+                    request,
+                    response,
+                    metrics.view_name(request),
+                    wall_seconds,
+                    collector.log,
+                    samples=None if profiler else samples,
+                    profiler=profiler,
+                )
+            except Exception:
+                logger.exception("Could not save request profile")
+        return response
@@ -0,0 +1,20 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """Cursor pagination on the primary key for every list endpoint.
+
+    UUID primary keys are unique and indexed, so ``WHERE id > <cursor> ORDER BY
+    id LIMIT n`` is a stable index range scan at any depth. Views may set
+    ``cursor_ordering`` to page on another indexed, unique-enough column.
+    """
+
+    ordering = "id"
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, "cursor_ordering", self.ordering)
+        return (ordering,) if isinstance(ordering, str) else tuple(ordering)
@@ -0,0 +1,178 @@
+"""Opt-in request profiling.
+
+Every request is sampled by one shared thread that reads the request thread's
+stack every ``PROFILING_SAMPLE_SECONDS``; the samples are kept only when the
+request took longer than ``PROFILING_SLOW_MS``. A request carrying a valid
+``X-Profile-Request`` token (see ``profile_token``) runs under cProfile instead.
+Each saved profile is a folder under ``MEDIA_ROOT/profiles`` with ``meta.json``,
+``sql.json`` and either ``stacks.folded`` (flamegraph input) or ``profile.prof``
+(pstats) plus ``profile.txt``.
+"""
+import io
+import json
+import pstats
+import re
+import shutil
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+
+HEADER = "X-Profile-Request"
+TOKEN_SALT = "config.profiling"
+TOKEN_MAX_AGE = 24 * 3600
+MAX_STACK_DEPTH = 80
+PROFILE_NAME = re.compile(r"^[0-9T]+-[\w.-]+-[0-9a-f]{8}$")
+PROFILE_FILES = ("meta.json", "sql.json", "stacks.folded", "profile.prof", "profile.txt")
+
+
+def profile_token():
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign("profile")
+
+
+def has_valid_token(request):
+    value = request.headers.get(HEADER)
+    if not value:
+        return False
+    try:
+        return signing.TimestampSigner(salt=TOKEN_SALT).unsign(value, max_age=TOKEN_MAX_AGE) == "profile"
+    except signing.BadSignature:
+        return False
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_filename}:{code.co_name}:{frame.f_lineno}"
+
+
+def folded_stack(frame):
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """One daemon thread sampling the stacks of the threads registered with ``start``."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._active = {}
+        self._thread = None
+
+    def start(self):
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._active[thread_id] = Counter()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+            self._wake.set()
+
+    def stop(self):
+        with self._lock:
+            return self._active.pop(threading.get_ident(), Counter())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._wake.clear()
+            self._wake.wait()
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, samples in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[folded_stack(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = StackSampler(settings.PROFILING_SAMPLE_SECONDS)
+    return _sampler
+
+
+def profiles_dir():
+    return Path(settings.MEDIA_ROOT) / "profiles"
+
+
+def save_profile(request, response, view, wall_seconds, sql_log, samples=None, profiler=None):
+    at = timezone.now()
+    safe_view = re.sub(r"[^\w.-]", "_", view)[:60] or "view"
+    folder = profiles_dir() / f"{at:%Y%m%dT%H%M%S}-{safe_view}-{uuid.uuid4().hex[:8]}"
+    folder.mkdir(parents=True)
+    meta = {
+        "at": at.isoformat(),
+        "kind": "cprofile" if profiler else "sampled",
+        "method": request.method,
+        "path": request.get_full_path(),
+        "view": view,
+        "status": response.status_code,
+        "wall_ms": round(wall_seconds * 1000, 1),
+        "queries": len(sql_log),
+        "sql_ms": round(sum(entry["ms"] for entry in sql_log), 1),
+        "user": getattr(request.user, "username", "") if hasattr(request, "user") else "",
+    }
+    (folder / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    (folder / "sql.json").write_text(json.dumps(sql_log, indent=1, default=str), encoding="utf-8")
+    if profiler is not None:
+        profiler.dump_stats(str(folder / "profile.prof"))
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(60)
+        (folder / "profile.txt").write_text(text.getvalue(), encoding="utf-8")
+    else:
+        lines = [f"{stack} {count}" for stack, count in samples.most_common()]
+        (folder / "stacks.folded").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    prune_profiles(settings.PROFILING_MAX_PROFILES)
+    return folder
+
+
+def list_profiles():
+    if not profiles_dir().is_dir():
+        return []
+    profiles = []
+    for folder in sorted(profiles_dir().iterdir(), reverse=True):
+        meta_path = folder / "meta.json"
+        if not PROFILE_NAME.match(folder.name) or not meta_path.exists():
+            continue
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        meta["name"] = folder.name
+        meta["files"] = [name for name in PROFILE_FILES if (folder / name).exists()]
+        profiles.append(meta)
+    return profiles
+
+
+def profile_file(name, filename):
+    """Return the path of a saved profile file, or None for anything else."""
+    if not PROFILE_NAME.match(name) or filename not in PROFILE_FILES:
+        return None
+    path = profiles_dir() / name / filename
+    return path if path.is_file() else None
+
+
+def prune_profiles(keep):
+    folders = sorted(
+        folder for folder in profiles_dir().iterdir() if PROFILE_NAME.match(folder.name)
+    )
+    for folder in folders[: max(0, len(folders) - keep)]:
+        shutil.rmtree(folder, ignore_errors=True)
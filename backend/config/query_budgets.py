@@ -0,0 +1,31 @@
+"""Per-view SQL query budgets, checked in tests through QueryMetricsMiddleware.
+
+Budgets are keyed by URL name and sized for the fixtures of the test that
+checks them; a view that grows a query per row fails as soon as the fixture has
+a few rows.
+"""
+
+QUERY_BUDGETS = {
+    "weld_list": 6,
+    "weld_map_detail": 6,
+    "document_list": 7,
+}
+
+
+class QueryBudgetMixin:
+    def assertWithinQueryBudget(self, response):
+        request_metrics = getattr(response, "query_metrics", None)
+        if request_metrics is None:
+            self.fail("Response has no query metrics; is QueryMetricsMiddleware enabled?")
+        view = request_metrics.view
+        if view not in QUERY_BUDGETS:
+            self.fail(f"No query budget registered for {view!r} in config.query_budgets.")
+        budget = QUERY_BUDGETS[view]
+        if request_metrics.queries > budget:
+            repeated = "\n".join(
+                f"  {times}x {sql[:200]}" for sql, times in request_metrics.duplicates.items()
+            )
+            self.fail(
+                f"{view} ran {request_metrics.queries} queries, budget is {budget}."
+                + (f"\nRepeated:\n{repeated}" if repeated else "")
+            )
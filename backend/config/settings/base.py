@@ -30,6 +30,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "config.middleware.metrics.QueryMetricsMiddleware",
+    "config.middleware.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -90,7 +92,14 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_PAGINATION_CLASS": "config.pagination.KeysetCursorPagination",
 }
+# List endpoints return API_PAGE_SIZE rows per page; ?page_size= up to API_MAX_PAGE_SIZE.
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "100"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "1000"))
+
+# Store WeldMark geometries in the packed binary column instead of JSON when lossless.
+WELD_MARK_COMPACT_GEOMETRY = os.getenv("WELD_MARK_COMPACT_GEOMETRY", "0") == "1"
 
 LOGIN_URL = "/api-auth/login/"
 LOGIN_REDIRECT_URL = "/ui/projects/"
@@ -103,3 +112,62 @@ TEST_DISCOVER_ROOT = BASE_DIR / "apps"
 
 # Allow same-origin embedding for local PDF preview inside welding map.
 X_FRAME_OPTIONS = "SAMEORIGIN"
+
+# Process-wide cache of API role lookups (apps.users.permissions), cleared on
+# User/Role/UserRole writes in the same process; other processes within the TTL.
+ROLE_CACHE_TTL_SECONDS = int(os.getenv("ROLE_CACHE_TTL_SECONDS", "60"))
+ROLE_CACHE_MAX_ENTRIES = int(os.getenv("ROLE_CACHE_MAX_ENTRIES", "1024"))
+# Same policy for the project -> roles map (apps.projects.membership).
+MEMBERSHIP_CACHE_TTL_SECONDS = int(os.getenv("MEMBERSHIP_CACHE_TTL_SECONDS", "60"))
+MEMBERSHIP_CACHE_MAX_ENTRIES = int(os.getenv("MEMBERSHIP_CACHE_MAX_ENTRIES", "1024"))
+# And for the UI nav visible to each auth user (apps.users.navigation), cleared on
+# group and permission changes.
+NAV_CACHE_TTL_SECONDS = int(os.getenv("NAV_CACHE_TTL_SECONDS", "300"))
+NAV_CACHE_MAX_ENTRIES = int(os.getenv("NAV_CACHE_MAX_ENTRIES", "1024"))
+
+# API write audit (config.middleware.audit): events are buffered in memory and
+# bulk inserted by a background thread. When the buffer is full or the insert
+# fails they are appended to AUDIT_SPILL_DIR and replayed on a later flush;
+# events the database rejects one by one go to quarantine-<pid>.jsonl there.
+# AUDIT_ASYNC=0 writes each event inside the request.
+AUDIT_ASYNC = os.getenv("AUDIT_ASYNC", "1") == "1"
+AUDIT_BUFFER_SIZE = int(os.getenv("AUDIT_BUFFER_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", "1"))
+AUDIT_SPILL_DIR = Path(os.getenv("AUDIT_SPILL_DIR", str(BASE_DIR / "var" / "audit")))
+# Months of AuditEvent/AuditLog kept in the database (manage.py archive_audit);
+# older months are moved to gzip NDJSON files under AUDIT_ARCHIVE_DIR.
+AUDIT_RETENTION_MONTHS = int(os.getenv("AUDIT_RETENTION_MONTHS", "12"))
+AUDIT_ARCHIVE_DIR = Path(os.getenv("AUDIT_ARCHIVE_DIR", str(BASE_DIR / "var" / "audit_archive")))
+
+# Background export queue (manage.py run_export_worker).
+EXPORT_WORKER_PROCESSES = int(os.getenv("EXPORT_WORKER_PROCESSES", "2"))
+EXPORT_WORKER_POLL_SECONDS = float(os.getenv("EXPORT_WORKER_POLL_SECONDS", "2"))
+EXPORT_WORKER_STALE_SECONDS = int(os.getenv("EXPORT_WORKER_STALE_SECONDS", "3600"))
+# Days between full welding list snapshots (schedule_incremental_exports).
+EXPORT_SNAPSHOT_DAYS = int(os.getenv("EXPORT_SNAPSHOT_DAYS", "7"))
+# Dossier sections rendered in parallel inside each export job (0 renders inline).
+DOSSIER_RENDER_PROCESSES = int(os.getenv("DOSSIER_RENDER_PROCESSES", "4"))
+# Ready export files kept on disk for reuse; least recently used are expired past this.
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(5 * 1024**3)))
+
+# Per-view SQL/latency counters (config.metrics), scraped from /api/_metrics with
+# "Authorization: Bearer <METRICS_TOKEN>"; without a token only staff users can read them.
+# METRICS_RESPONSE_HEADERS adds X-Query-Count & co. to every response (on in dev).
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_RESPONSE_HEADERS = os.getenv("METRICS_RESPONSE_HEADERS", "0") == "1"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Request profiling (config.profiling), off unless PROFILING_ENABLED=1: requests slower
+# than PROFILING_SLOW_MS keep their stack samples, and requests sending the token from
+# /admin/profiles/ in X-Profile-Request run under cProfile. Saved to MEDIA_ROOT/profiles.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILING_SLOW_MS = int(os.getenv("PROFILING_SLOW_MS", "2000"))
+PROFILING_SAMPLE_SECONDS = float(os.getenv("PROFILING_SAMPLE_SECONDS", "0.01"))
+PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "200"))
+
+# Export downloads: "" streams from Django, "nginx" uses X-Accel-Redirect under
+# EXPORT_DOWNLOAD_ACCEL_PREFIX (internal location aliased to MEDIA_ROOT),
+# "sendfile" sets X-Sendfile with the absolute path.
+EXPORT_DOWNLOAD_ACCEL = os.getenv("EXPORT_DOWNLOAD_ACCEL", "")
+EXPORT_DOWNLOAD_ACCEL_PREFIX = os.getenv("EXPORT_DOWNLOAD_ACCEL_PREFIX", "/protected-media/")
@@ -3,6 +3,7 @@ from .base import *  # noqa: F401,F403
 
 DEBUG = True
 ALLOWED_HOSTS = ["localhost", "127.0.0.1"]
+METRICS_RESPONSE_HEADERS = True
 
 DATABASES = {
     "default": {
@@ -1,8 +1,12 @@
+import logging
+
 from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
 
 
 class AppLabelDiscoverRunner(DiscoverRunner):
     default_labels = [
+        "config",
         "apps.users",
         "apps.projects",
         "apps.documents",
@@ -13,8 +17,49 @@ class AppLabelDiscoverRunner(DiscoverRunner):
         "apps.reports",
         "apps.integrations",
     ]
+    benchmark_labels = [
+        "apps.reports.benchmarks",
+        "apps.welds.benchmarks",
+    ]
+
+    def __init__(self, benchmarks=False, **kwargs):
+        super().__init__(**kwargs)
+        self.benchmarks = benchmarks
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--benchmarks",
+            action="store_true",
+            help="Run the benchmark modules (apps/*/benchmarks.py) with the default labels.",
+        )
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        # The audit writer thread would use its own connection outside the test transaction.
+        self._audit_settings = override_settings(AUDIT_ASYNC=False)
+        self._audit_settings.enable()
+        # Benchmarks report their measurements through their module logger.
+        self._benchmark_handler = None
+        if self.benchmarks:
+            self._benchmark_handler = logging.StreamHandler()
+            self._benchmark_handler.setFormatter(logging.Formatter("\n%(message)s"))
+            for label in self.benchmark_labels:
+                benchmark_logger = logging.getLogger(label)
+                benchmark_logger.addHandler(self._benchmark_handler)
+                benchmark_logger.setLevel(logging.INFO)
+
+    def teardown_test_environment(self, **kwargs):
+        self._audit_settings.disable()
+        if self._benchmark_handler is not None:
+            for label in self.benchmark_labels:
+                logging.getLogger(label).removeHandler(self._benchmark_handler)
+        super().teardown_test_environment(**kwargs)
 
     def run_tests(self, test_labels=None, extra_tests=None, **kwargs):
         if not test_labels:
             test_labels = list(self.default_labels)
+            if self.benchmarks:
+                test_labels += self.benchmark_labels
         return super().run_tests(test_labels, extra_tests=extra_tests, **kwargs)
@@ -1,6 +1,13 @@
-from django.test import TestCase
+import json
+import tempfile
+
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.contrib.auth import get_user_model
 
+from apps.projects.models import Project
+from apps.users import models as user_models
+from config import importtime, metrics, profiling
+
 
 User = get_user_model()
 
@@ -17,3 +24,131 @@ class HomeRoutingTests(TestCase):
         response = self.client.get("/")
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response["Location"], "/ui/projects/")
+
+
+class ListPaginationTests(TestCase):
+    def setUp(self):
+        # Project and welder lists check the app-level Admin role by email.
+        self.user = User.objects.create_user(
+            username="pagination-admin", email="pagination-admin@example.local", password="12345"
+        )
+        app_user = user_models.User.objects.create(
+            name="pagination-admin", email=self.user.email, status="active"
+        )
+        role, _ = user_models.Role.objects.get_or_create(name="Admin", defaults={"scope": "global"})
+        user_models.UserRole.objects.create(user=app_user, role=role)
+        self.client.force_login(self.user)
+
+    def test_project_list_is_a_cursor_page_instead_of_an_array(self):
+        for index in range(5):
+            Project.objects.create(name=f"Project {index}", code=f"P-PAG-{index}")
+
+        seen = []
+        url = "/api/projects/?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(set(response.data), {"next", "previous", "results"})
+            self.assertLessEqual(len(response.data["results"]), 2)
+            seen += [item["id"] for item in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(sorted(seen), sorted(str(pk) for pk in Project.objects.values_list("id", flat=True)))
+
+        # Numbered pages are not supported; ?page= leaves the first page unchanged.
+        first = self.client.get("/api/projects/?page_size=2")
+        self.assertEqual(self.client.get("/api/projects/?page_size=2&page=2").data["results"], first.data["results"])
+
+    def test_empty_list_is_still_paginated(self):
+        response = self.client.get("/api/welders/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"next": None, "previous": None, "results": []})
+
+
+class QueryMetricsTests(TestCase):
+    def setUp(self):
+        metrics.registry.clear()
+        self.addCleanup(metrics.registry.clear)
+        self.user = User.objects.create_user(username="metrics-user", password="12345", is_staff=True)
+        self.client.force_login(self.user)
+
+    @override_settings(METRICS_RESPONSE_HEADERS=True)
+    def test_response_headers_report_queries(self):
+        response = self.client.get("/ui/projects/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(int(response["X-Query-Count"]), response.query_metrics.queries)
+        self.assertGreater(response.query_metrics.queries, 0)
+        self.assertIn("X-Response-Time-Ms", response)
+
+    def test_duplicate_statements_are_fingerprinted(self):
+        collector = metrics.QueryCollector()
+        with collector.capture():
+            for username in ("a", "b", "c"):
+                User.objects.filter(username=username).exists()
+        self.assertEqual(collector.count, 3)
+        self.assertEqual(collector.duplicate_count(), 2)
+        self.assertEqual(list(collector.duplicates().values()), [3])
+
+    def test_metrics_endpoint_renders_prometheus_text(self):
+        self.client.get("/ui/projects/")
+        response = self.client.get("/api/_metrics")
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('weldoc_request_duration_seconds_count{view="project_list"} 1', body)
+        self.assertIn('weldoc_db_queries_total{view="project_list"}', body)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_endpoint_requires_token_when_configured(self):
+        self.assertEqual(self.client.get("/api/_metrics").status_code, 403)
+        response = self.client.get("/api/_metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name, PROFILING_ENABLED=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user(
+            username="profile-admin", password="12345", is_staff=True, is_superuser=True
+        )
+        self.client.force_login(self.user)
+
+    @override_settings(PROFILING_SLOW_MS=0)
+    def test_slow_request_is_saved_with_samples_and_sql(self):
+        self.client.get("/ui/projects/")
+        [profile] = [item for item in profiling.list_profiles() if item["view"] == "project_list"]
+        self.assertEqual(profile["kind"], "sampled")
+        self.assertIn("stacks.folded", profile["files"])
+        self.assertGreater(profile["queries"], 0)
+        response = self.client.get(f"/admin/profiles/{profile['name']}/sql.json")
+        self.assertEqual(response.status_code, 200)
+        sql_log = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(len(sql_log), profile["queries"])
+
+    @override_settings(PROFILING_SLOW_MS=60000)
+    def test_fast_requests_are_only_profiled_with_a_signed_header(self):
+        self.client.get("/ui/projects/")
+        self.assertEqual(profiling.list_profiles(), [])
+        self.client.get("/ui/projects/", HTTP_X_PROFILE_REQUEST="forged")
+        self.assertEqual(profiling.list_profiles(), [])
+        self.client.get("/ui/projects/", HTTP_X_PROFILE_REQUEST=profiling.profile_token())
+        [profile] = profiling.list_profiles()
+        self.assertEqual(profile["kind"], "cprofile")
+        self.assertIn("profile.prof", profile["files"])
+        response = self.client.get("/admin/profiles/")
+        self.assertContains(response, profile["name"])
+        self.assertEqual(self.client.get(f"/admin/profiles/{profile['name']}/..%2Fmeta.json").status_code, 404)
+
+
+class StartupImportTests(SimpleTestCase):
+    # Generous on purpose: catches an export backend or another heavy module
+    # landing on the API import path without flaking on slow CI machines. The
+    # tight per-scenario budgets live in apps/reports/benchmarks.py.
+    api_urls_budget_ms = 3000
+
+    def test_api_urls_cold_import_is_light(self):
+        modules = importtime.profile_imports("api_urls")
+        self.assertEqual(importtime.heavy_imports(modules), [])
+        self.assertLess(importtime.cumulative_ms(modules, "config.api_urls"), self.api_urls_budget_ms)
@@ -4,12 +4,15 @@ from django.contrib import admin
 from django.urls import include, path
 from drf_spectacular.views import SpectacularSwaggerView
 from config.schema_views import StaticSchemaView
-from config.views import home
+from config.views import home, metrics_view, profile_download, profile_list
 
 
 urlpatterns = [
     path("", home, name="home"),
+    path("admin/profiles/", profile_list, name="profile_list"),
+    path("admin/profiles/<str:name>/<str:filename>", profile_download, name="profile_download"),
     path("admin/", admin.site.urls),
+    path("api/_metrics", metrics_view, name="metrics"),
     path("api/", include("config.api_urls")),
     path("api-auth/", include("rest_framework.urls")),
     path("", include("apps.welds.urls")),
@@ -1,7 +1,54 @@
+import hmac
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import redirect
+from django.http import FileResponse, Http404, HttpResponse
+from django.shortcuts import redirect, render
+
+from config import metrics, profiling
 
 
 @login_required
 def home(request):
     return redirect("/ui/projects/")
+
+
+def _can_read_metrics(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        header = request.headers.get("Authorization", "")
+        return hmac.compare_digest(header, f"Bearer {token}")
+    return request.user.is_authenticated and request.user.is_staff
+
+
+def metrics_view(request):
+    if not _can_read_metrics(request):
+        return HttpResponse(status=403)
+    return HttpResponse(
+        metrics.render_prometheus(metrics.registry.snapshot()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@staff_member_required
+def profile_list(request):
+    context = {
+        **admin.site.each_context(request),
+        "title": "Request profiles",
+        "profiles": profiling.list_profiles(),
+        "enabled": settings.PROFILING_ENABLED,
+        "slow_ms": settings.PROFILING_SLOW_MS,
+        "header": profiling.HEADER,
+        "token": profiling.profile_token(),
+    }
+    return render(request, "admin/profiles.html", context)
+
+
+@staff_member_required
+def profile_download(request, name, filename):
+    path = profiling.profile_file(name, filename)
+    if path is None:
+        raise Http404
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=f"{name}-{filename}")